@@ -6,6 +6,8 @@ from api.v1.job.job_application_router import job_application_router
 from api.v1.job.salon_master_invitation_router import invitation_router
 from api.v1.job.vacancies_salons_router import vacancy_router
 from api.v1.photo.photo_news_router import photo_news_router
+from api.v1.photo.photo_status_router import photo_status_router
+from api.v1.photo.photo_upload_router import photo_upload_router
 from api.v1.salons.salons_list_router import salons_list_router
 from api.v1.services.service_standart_router import service_standart_router
 from api.v1.auth.user_register_router import user_router
@@ -161,5 +163,17 @@ router.include_router(
     tags=["Фото новостной ленты"]
     )
 
+router.include_router(
+    photo_status_router,
+    prefix="/api/v1/photos",
+    tags=["Фото - статус обработки"]
+    )
+
+router.include_router(
+    photo_upload_router,
+    prefix="/api/v1/uploads",
+    tags=["Фото - возобновляемая загрузка"]
+    )
+
 __all__ = ["router"]
  
\ No newline at end of file
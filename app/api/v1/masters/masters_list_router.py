@@ -1,8 +1,9 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from use_case.master_service.master_read_service import MasterListService
 from db.schemas.master_schemas.master_schemas import MasterListSchema
 from config.components.logging_config import logger
+from config.constants import NEXT_CURSOR_HEADER
 
 master_list_router = APIRouter()
 
@@ -11,16 +12,26 @@ master_list_router = APIRouter()
     "/{city_slug}/masters",
     response_model=List[MasterListSchema],
     summary="Получение списка мастеров города",
-    description="Получить список мастеров города"
+    description=
+                "Получить страницу мастеров города (сначала опытные).\n\n"
+                "Курсор следующей страницы возвращается в заголовке `X-Next-Cursor` "
+                "и передается в параметре `cursor`; на последней странице заголовка нет."
 )
-async def get_masters_by_city(city_slug: str):
+async def get_masters_by_city(
+    city_slug: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(10, ge=1, le=100, description="Размер страницы"),
+):
     """
     Получение списка мастеров для города по slug
     """
     logger.info(f"Запрос на получение мастеров для города с slug: {city_slug}")
 
     try:
-        masters = await MasterListService.get_masters_by_city(city_slug)
+        masters, next_cursor = await MasterListService.get_masters_by_city(city_slug, limit, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
         if masters is None:
             logger.warning(f"Сервис вернул None для города '{city_slug}'.")
@@ -36,6 +47,8 @@ async def get_masters_by_city(city_slug: str):
         logger.info(f"Найдено {len(masters)} мастеров для города '{city_slug}'.")
         return masters
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Ошибка при получении мастеров для города '{city_slug}': {str(e)}")
         raise HTTPException(
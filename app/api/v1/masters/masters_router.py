@@ -8,6 +8,7 @@ from use_case.utils.jwt_handler import get_current_user
 from use_case.master_service.master_service import MasterService
 from db.schemas.master_schemas.master_schemas import MasterCreateInputSchema, MasterUpdateSchema
 from use_case.photo_service.photo_base_servise import PhotoHandler
+from use_case.photo_service.photo_resumable_upload import ResumableUploadService
 from config.components.logging_config import logger
 from use_case.utils.permissions import check_user_permission
 
@@ -46,7 +47,8 @@ async def create_master_route(
     accepts_at_home: bool = Form(False),
     accepts_in_salon: bool = Form(False),
     accepts_offsite: bool = Form(False),
-    image: UploadFile = File(...),
+    image: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None, description="ID завершенной возобновляемой загрузки вместо image"),
     current_user: dict = Depends(get_current_user),
 ):
     check_user_permission(current_user, ["admin", "master"])
@@ -55,57 +57,63 @@ async def create_master_route(
 
     if not user_id or not city_id:
         raise HTTPException(status_code=400, detail="Ошибка аутентификации: данные пользователя отсутствуют.")
+    if image is None and not upload_id:
+        raise HTTPException(status_code=400, detail="Нужно передать фото: image или upload_id")
 
-    try:
-        master_data = MasterCreateInputSchema(
-            title=title,
-            specialty=specialty,
-            description=description,
-            text=text,
-            experience_years=experience_years,
-            slug=slug,
-            name=name,
-            address=address,
-            phone=phone,
-            telegram=telegram,
-            whatsapp=whatsapp,
-            website=website,
-            vk=vk,
-            instagram=instagram,
-            accepts_at_home=accepts_at_home,
-            accepts_in_salon=accepts_in_salon,
-            accepts_offsite=accepts_offsite,
-        )
+    # Файл из возобновляемой загрузки удаляется только после успешной обработки
+    async with ResumableUploadService.finalize([upload_id] if upload_id else None, user_id) as uploads:
+        image = uploads[0] if uploads else image
 
-        master = await MasterService.create_master(
-            user_id=user_id,
-            city_id=city_id,
-            **master_data.model_dump()
-        )
-        master_id = master.id
+        try:
+            master_data = MasterCreateInputSchema(
+                title=title,
+                specialty=specialty,
+                description=description,
+                text=text,
+                experience_years=experience_years,
+                slug=slug,
+                name=name,
+                address=address,
+                phone=phone,
+                telegram=telegram,
+                whatsapp=whatsapp,
+                website=website,
+                vk=vk,
+                instagram=instagram,
+                accepts_at_home=accepts_at_home,
+                accepts_in_salon=accepts_in_salon,
+                accepts_offsite=accepts_offsite,
+            )
 
-        photo_id = await PhotoHandler.add_photos_to_master(
-            images=[image],
-            master_id=master_id,
-            model=AvatarPhotoMaster,
-            city=str(city_id)
-        )
+            master = await MasterService.create_master(
+                user_id=user_id,
+                city_id=city_id,
+                **master_data.model_dump()
+            )
+            master_id = master.id
+
+            photo_id = await PhotoHandler.add_photos_to_master(
+                images=[image],
+                master_id=master_id,
+                model=AvatarPhotoMaster,
+                city=str(city_id)
+            )
 
-        # Обновляем мастера, устанавливая avatar_id на ID первого загруженного фото
-        if photo_id:
-            master = await MasterService.update_master(current_user=current_user, master_id=master_id, avatar_id=[0])
-        else:
-            logger.warning(f"Фото не загружено для мастера с ID {master_id}.")
+            # Обновляем мастера, устанавливая avatar_id на ID первого загруженного фото
+            if photo_id:
+                master = await MasterService.update_master(current_user=current_user, master_id=master_id, avatar_id=[0])
+            else:
+                logger.warning(f"Фото не загружено для мастера с ID {master_id}.")
 
-        return master
+            return master
 
-    except ValueError as ve:
-        logger.warning(f"Ошибка валидации: {ve}")
-        raise HTTPException(status_code=400, detail=str(ve))
+        except ValueError as ve:
+            logger.warning(f"Ошибка валидации: {ve}")
+            raise HTTPException(status_code=400, detail=str(ve))
 
-    except Exception as e:
-        logger.error(f"Системная ошибка при создании мастера: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+        except Exception as e:
+            logger.error(f"Системная ошибка при создании мастера: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
 #Обновление профиля мастера
@@ -135,6 +143,7 @@ async def update_master_route(
     accepts_in_salon: Optional[bool] = Form(None),
     accepts_offsite: Optional[bool] = Form(None),
     image: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None, description="ID завершенной возобновляемой загрузки вместо image"),
     current_user: dict = Depends(get_current_user),
 ):
     """Обновление данных мастера (включая фото)."""
@@ -145,83 +154,87 @@ async def update_master_route(
     if not user_id or not city_id:
         raise HTTPException(status_code=400, detail="Ошибка аутентификации: данные пользователя отсутствуют.")
 
-    try:
-        # Проверяем, есть ли мастер
-        master = await MasterService.get_master_by_id(master_id)
-        if not master:
-            raise HTTPException(status_code=404, detail="Мастер не найден")
-        if str(master.user_id) != str(user_id):
-            raise HTTPException(status_code=403, detail="Нет прав на обновление")
+    # Файл из возобновляемой загрузки удаляется только после успешной обработки
+    async with ResumableUploadService.finalize([upload_id] if upload_id else None, user_id) as uploads:
+        image = uploads[0] if uploads else image
 
-        # Формируем объект обновления
-        master_data = MasterUpdateSchema(
-            title=title,
-            specialty=specialty,
-            description=description,
-            text=text,
-            experience_years=experience_years,
-            slug=slug,
-            name=name,
-            address=address,
-            phone=phone,
-            telegram=telegram,
-            whatsapp=whatsapp,
-            website=website,
-            vk=vk,
-            instagram=instagram,
-            accepts_at_home=accepts_at_home,
-            accepts_in_salon=accepts_in_salon,
-            accepts_offsite=accepts_offsite,
-        )
+        try:
+            # Проверяем, есть ли мастер
+            master = await MasterService.get_master_by_id(master_id)
+            if not master:
+                raise HTTPException(status_code=404, detail="Мастер не найден")
+            if str(master.user_id) != str(user_id):
+                raise HTTPException(status_code=403, detail="Нет прав на обновление")
 
-        # Обновляем мастера
-        updated_master = await MasterService.update_master(
-            current_user=current_user,
-            master_id=master_id,
-            **master_data.model_dump()
-        )
+            # Формируем объект обновления
+            master_data = MasterUpdateSchema(
+                title=title,
+                specialty=specialty,
+                description=description,
+                text=text,
+                experience_years=experience_years,
+                slug=slug,
+                name=name,
+                address=address,
+                phone=phone,
+                telegram=telegram,
+                whatsapp=whatsapp,
+                website=website,
+                vk=vk,
+                instagram=instagram,
+                accepts_at_home=accepts_at_home,
+                accepts_in_salon=accepts_in_salon,
+                accepts_offsite=accepts_offsite,
+            )
 
-        logger.debug(f"Значение image перед if image: {image}") # <----  НОВОЕ ОТЛАДОЧНОЕ СООБЩЕНИЕ (ПЕРЕД if image:)
+            # Обновляем мастера
+            updated_master = await MasterService.update_master(
+                current_user=current_user,
+                master_id=master_id,
+                **master_data.model_dump()
+            )
 
-        # Если есть новое изображение
-        if image:
-            logger.info(f"Обновляем фото мастера {master_id}")
-            logger.debug(f"Тип параметра image: {type(image)}") # <----  ОТЛАДОЧНЫЕ СООБЩЕНИЯ ДЛЯ IMAGE (ВНУТРИ if image:)
-            logger.debug(f"Значение параметра image: {image}") # <----  ОТЛАДОЧНЫЕ СООБЩЕНИЯ ДЛЯ IMAGE (ВНУТРИ if image:)
+            logger.debug(f"Значение image перед if image: {image}") # <----  НОВОЕ ОТЛАДОЧНОЕ СООБЩЕНИЕ (ПЕРЕД if image:)
 
-            # Находим старое фото
-            old_photo = await PhotoRepository.get_photo(AvatarPhotoMaster, master_id=master_id)
+            # Если есть новое изображение
+            if image:
+                logger.info(f"Обновляем фото мастера {master_id}")
+                logger.debug(f"Тип параметра image: {type(image)}") # <----  ОТЛАДОЧНЫЕ СООБЩЕНИЯ ДЛЯ IMAGE (ВНУТРИ if image:)
+                logger.debug(f"Значение параметра image: {image}") # <----  ОТЛАДОЧНЫЕ СООБЩЕНИЯ ДЛЯ IMAGE (ВНУТРИ if image:)
 
-            # Удаляем фото из базы и физически
-            if old_photo:
-                await PhotoHandler.delete_photo(model=AvatarPhotoMaster,photo_id=old_photo.id)
+                # Находим старое фото
+                old_photo = await PhotoRepository.get_photo(AvatarPhotoMaster, master_id=master_id)
 
-            # Загружаем новое фото
-            photo_id = await PhotoHandler.add_photos_to_master(
-                images=[image],
-                master_id=master_id,
-                model=AvatarPhotoMaster,
-                city=str(city_id)
-            )
+                # Удаляем фото из базы и физически
+                if old_photo:
+                    await PhotoHandler.delete_photo(model=AvatarPhotoMaster,photo_id=old_photo.id)
 
-            #Устанавливаем новую фотографию как аватарку
-            if photo_id:
-                updated_master = await MasterService.update_master(
-                    current_user=current_user, 
-                    master_id=master_id, 
-                    avatar_id=[0])
-            else:
-                logger.warning(f"Фото не загружено для мастера с ID {master_id}.")
+                # Загружаем новое фото
+                photo_id = await PhotoHandler.add_photos_to_master(
+                    images=[image],
+                    master_id=master_id,
+                    model=AvatarPhotoMaster,
+                    city=str(city_id)
+                )
 
-        return updated_master
+                #Устанавливаем новую фотографию как аватарку
+                if photo_id:
+                    updated_master = await MasterService.update_master(
+                        current_user=current_user, 
+                        master_id=master_id, 
+                        avatar_id=[0])
+                else:
+                    logger.warning(f"Фото не загружено для мастера с ID {master_id}.")
 
-    except ValueError as ve:
-        logger.warning(f"Ошибка валидации: {ve}")
-        raise HTTPException(status_code=400, detail="Ошибка валидации данных: " + str(ve))
+            return updated_master
 
-    except Exception as e:
-        logger.error(f"Системная ошибка при создании мастера: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+        except ValueError as ve:
+            logger.warning(f"Ошибка валидации: {ve}")
+            raise HTTPException(status_code=400, detail="Ошибка валидации данных: " + str(ve))
+
+        except Exception as e:
+            logger.error(f"Системная ошибка при создании мастера: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
 # Удаление профиля мастера
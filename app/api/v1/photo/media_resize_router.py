@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import FileResponse
+
+from config.components.media import media_config
+from server.utils.media_files import offload_response
+from use_case.utils.image_resize import media_resizer
+
+
+media_resize_router = APIRouter()
+
+
+@media_resize_router.get(
+    "/media/resize/{path:path}",
+    response_class=FileResponse,
+    summary="Версия изображения заданной ширины",
+    description=
+                "Создает версию изображения из `original` при первом запросе и отдает ее из кэша на диске.\n\n"
+                "`w` — ширина из разрешенного списка (RESIZE_ALLOWED_WIDTHS), `fmt` — `avif`, `webp` или `jpeg`.\n"
+                "Без `fmt` формат выбирается по заголовку `Accept`."
+)
+async def resize_media(
+    request: Request,
+    path: str,
+    w: int = Query(..., description="Ширина версии в пикселях"),
+    fmt: Optional[str] = Query(None, description="Формат версии"),
+):
+    file_path, media_type = await media_resizer.get_variant(path, w, fmt, accept=request.headers.get("accept"))
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    if fmt is None:
+        headers["Vary"] = "Accept"
+    if media_config.media_delivery != "app":
+        return offload_response(file_path, media_resizer.media_root, media_config.media_delivery, media_type, headers)
+    return FileResponse(file_path, media_type=media_type, headers=headers)
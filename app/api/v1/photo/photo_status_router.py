@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, status
+
+from db.models.photo_models.photo_registry import get_photo_model
+from db.schemas.photo_schemas.photo_status_schemas import PhotoStatusSchema
+from use_case.photo_service.photo_base_servise import PhotoHandler
+from config.components.logging_config import logger
+
+
+photo_status_router = APIRouter()
+
+
+@photo_status_router.get(
+    "/{photo_kind}/{photo_id}",
+    response_model=PhotoStatusSchema,
+    summary="Статус обработки фотографии",
+    description=
+                "Возвращает статус генерации версий фотографии (`processing`, `ready`, `failed`).\n\n"
+                "`photo_kind` — имя таблицы фото, например `avatar_photo_master` или `custom_service_photo`.\n"
+                "Ссылки на версии возвращаются, когда статус `ready`."
+)
+async def get_photo_status(photo_kind: str, photo_id: int):
+    model = get_photo_model(photo_kind)
+    if model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Неизвестный тип фотографии")
+
+    photo_status = await PhotoHandler.get_photo_status(model, photo_id)
+    if photo_status is None:
+        logger.warning(f"Фото {photo_kind} id={photo_id} не найдено")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Фото не найдено")
+
+    return photo_status
@@ -0,0 +1,111 @@
+from email.utils import formatdate
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+
+from config.components.media import media_config
+from use_case.photo_service.photo_resumable_upload import (
+    TUS_EXTENSIONS, TUS_VERSION, ResumableUploadService, UploadSession, parse_upload_metadata,
+)
+from use_case.utils.jwt_handler import get_current_user
+
+
+photo_upload_router = APIRouter()
+
+
+def _tus_headers(session: Optional[UploadSession] = None) -> dict:
+    headers = {"Tus-Resumable": TUS_VERSION, "Cache-Control": "no-store"}
+    if session:
+        headers["Upload-Offset"] = str(session.offset)
+        headers["Upload-Length"] = str(session.length)
+        headers["Upload-Expires"] = formatdate(session.expires_at, usegmt=True)
+    return headers
+
+
+@photo_upload_router.options(
+    "/",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Возможности сервера возобновляемой загрузки",
+)
+async def upload_options():
+    headers = _tus_headers()
+    headers.update({
+        "Tus-Version": TUS_VERSION,
+        "Tus-Extension": TUS_EXTENSIONS,
+        "Tus-Max-Size": str(media_config.upload_max_bytes),
+    })
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+
+@photo_upload_router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    summary="Создание возобновляемой загрузки",
+    description=
+                "Создает загрузку файла длиной `Upload-Length` байт (протокол tus).\n\n"
+                "Имя файла передается в `Upload-Metadata` как `filename <base64>`. "
+                "Адрес загрузки возвращается в заголовке `Location`, данные дописываются через `PATCH`. "
+                "Завершенная загрузка передается в создание мастера или услуги параметром `upload_id`."
+)
+async def create_upload(
+    request: Request,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata"),
+    current_user: dict = Depends(get_current_user),
+):
+    session = await ResumableUploadService.create(
+        user_id=current_user.get("user_id"),
+        length=upload_length,
+        metadata=parse_upload_metadata(upload_metadata),
+    )
+    headers = _tus_headers(session)
+    headers["Location"] = f"{str(request.url).rstrip('/')}/{session.id}"
+    return Response(status_code=status.HTTP_201_CREATED, headers=headers)
+
+
+@photo_upload_router.head(
+    "/{upload_id}",
+    summary="Смещение возобновляемой загрузки",
+    description="Возвращает в `Upload-Offset` число уже принятых байт, с него клиент продолжает загрузку."
+)
+async def get_upload_offset(upload_id: str, current_user: dict = Depends(get_current_user)):
+    session = await ResumableUploadService.get(upload_id, current_user.get("user_id"))
+    return Response(status_code=status.HTTP_200_OK, headers=_tus_headers(session))
+
+
+@photo_upload_router.patch(
+    "/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Дозапись части файла",
+    description=
+                "Дописывает тело запроса (`Content-Type: application/offset+octet-stream`) с позиции `Upload-Offset`.\n\n"
+                "### Ошибки:\n"
+                "- `409 Conflict` — смещение не совпадает с принятым размером или загрузка дописывается другим запросом.\n"
+                "- `413 Request Entity Too Large` — данных больше `Upload-Length`.\n"
+                "- `415 Unsupported Media Type` — неверный `Content-Type`."
+)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_type: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    if content_type != "application/offset+octet-stream":
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Ожидается Content-Type: application/offset+octet-stream")
+
+    session = await ResumableUploadService.append(
+        upload_id, current_user.get("user_id"), upload_offset, request.stream()
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_tus_headers(session))
+
+
+@photo_upload_router.delete(
+    "/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Отмена возобновляемой загрузки",
+)
+async def delete_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    await ResumableUploadService.delete(upload_id, current_user.get("user_id"))
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_tus_headers())
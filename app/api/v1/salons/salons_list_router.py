@@ -1,8 +1,9 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from app.use_case.salon_service.salon_read_list_service import SalonListService
 from db.schemas.salon_schemas.salon_schemas import SalonListSchema
 from config.components.logging_config import logger
+from config.constants import NEXT_CURSOR_HEADER
 
 salons_list_router = APIRouter()
 
@@ -11,15 +12,25 @@ salons_list_router = APIRouter()
     "/{city_slug}/salons",
     response_model=List[SalonListSchema],
     summary="Получение салонов города",
-    description="Получить салоны определенного города по слагу"
+    description=
+                "Получить страницу салонов определенного города по слагу (сначала новые).\n\n"
+                "Курсор следующей страницы возвращается в заголовке `X-Next-Cursor` "
+                "и передается в параметре `cursor`; на последней странице заголовка нет."
 )
-async def get_salon_by_city_slug(city_slug: str):
+async def get_salon_by_city_slug(
+    city_slug: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(10, ge=1, le=100, description="Размер страницы"),
+):
     """
     Получение списка мастеров для города по slug
     """
     try:
         salon_service = SalonListService()  # Создаем экземпляр, если метод не @classmethod
-        salons = await salon_service.get_salon_by_city(city_slug)
+        salons, next_cursor = await salon_service.get_salon_by_city(city_slug, limit, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
         if not salons:  # Исправленный вариант проверки на пустой список
             raise HTTPException(
@@ -29,6 +40,8 @@ async def get_salon_by_city_slug(city_slug: str):
 
         return salons
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка при получении списка салонов: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, File, HTTPException, status, Form, Uploa
 
 from db.schemas.service_schemas.service_custom_schemas import CustomServiceOut, CustomServiceCreate, CustomServiceUpdate
 from use_case.service_service.custom_service import CustomServiceService
+from use_case.photo_service.photo_resumable_upload import ResumableUploadService
 from use_case.utils.permissions import check_user_permission
 from use_case.utils.jwt_handler import get_current_user
 from config.components.logging_config import logger
@@ -25,29 +26,32 @@ async def create_custom_service_route(
     duration_minutes: int = Form(..., description="Длительность услуги в минутах"),
     description: Optional[str] = Form(None, description="Описание услуги"),
     photos: Optional[List[UploadFile]] = File(None, description="Фото для услуги"),
+    upload_ids: Optional[List[str]] = Form(None, description="ID завершенных возобновляемых загрузок (см. /api/v1/uploads)"),
     current_user: dict = Depends(get_current_user),
 ):
     # Проверка прав пользователя
     check_user_permission(current_user, ["admin", "master", "salon"])
 
-    try:
-        service = await CustomServiceService.create_custom_service(
-            current_user=current_user,
-            standard_service_id=standard_service_id,
-            base_price=base_price,
-            duration_minutes=duration_minutes,
-            description=description,
-            images=photos,
-            master_id=None,
-            salon_id = None,
-        )
-        return service
-    except ValueError as e:
-        logger.warning(f"Ошибка бизнес-логики: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Системная ошибка при создании услуги: {e}")
-        raise HTTPException(status_code=500, detail="Системная ошибка при создании услуги")
+    # Файлы возобновляемых загрузок удаляются только после успешной обработки
+    async with ResumableUploadService.finalize(upload_ids, current_user.get("user_id")) as uploads:
+        try:
+            service = await CustomServiceService.create_custom_service(
+                current_user=current_user,
+                standard_service_id=standard_service_id,
+                base_price=base_price,
+                duration_minutes=duration_minutes,
+                description=description,
+                images=(photos or []) + uploads,
+                master_id=None,
+                salon_id = None,
+            )
+            return service
+        except ValueError as e:
+            logger.warning(f"Ошибка бизнес-логики: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Системная ошибка при создании услуги: {e}")
+            raise HTTPException(status_code=500, detail="Системная ошибка при создании услуги")
 
 
 @service_custom_router.put(
@@ -62,6 +66,7 @@ async def update_custom_service_route(
     custom_service_id: int,
     updated_service_data: CustomServiceUpdate = Depends(),
     photos: Optional[List[UploadFile]] = File(None, description="Новые фото для услуги"),
+    upload_ids: Optional[List[str]] = Form(None, description="ID завершенных возобновляемых загрузок (см. /api/v1/uploads)"),
     current_user: dict = Depends(get_current_user),
 ):
     logger.info(f"Текущий пользователь: {current_user}")
@@ -69,20 +74,22 @@ async def update_custom_service_route(
     # Проверка прав доступа
     check_user_permission(current_user, ["admin", "master", "salon"])
 
-    try:
-        updated_service = await CustomServiceService.update_custom_service(
-            custom_service_id=custom_service_id,
-            updated_service_data=updated_service_data.dict(exclude_unset=True), # exclude_unset, чтобы не затереть существующие значения в базе данных
-            images=photos,
-            current_user=current_user
-        )
-        return updated_service
-    except ValueError as e:
-        logger.warning(f"Ошибка бизнес-логики: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Системная ошибка при обновлении услуги: {e}")
-        raise HTTPException(status_code=500, detail="Системная ошибка при обновлении услуги")
+    # Файлы возобновляемых загрузок удаляются только после успешной обработки
+    async with ResumableUploadService.finalize(upload_ids, current_user.get("user_id")) as uploads:
+        try:
+            updated_service = await CustomServiceService.update_custom_service(
+                custom_service_id=custom_service_id,
+                updated_service_data=updated_service_data.dict(exclude_unset=True), # exclude_unset, чтобы не затереть существующие значения в базе данных
+                images=(photos or []) + uploads,
+                current_user=current_user
+            )
+            return updated_service
+        except ValueError as e:
+            logger.warning(f"Ошибка бизнес-логики: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Системная ошибка при обновлении услуги: {e}")
+            raise HTTPException(status_code=500, detail="Системная ошибка при обновлении услуги")
 
 
 @service_custom_router.delete(
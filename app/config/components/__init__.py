@@ -1,9 +1,10 @@
 from config.components.base import BaseConfig
 from config.components.db import DatabaseConfig
+from config.components.media import MediaConfig
 from config.components.redis import RedisConfig
 
 
-class ComponentsConfig(BaseConfig, DatabaseConfig, RedisConfig):
+class ComponentsConfig(BaseConfig, DatabaseConfig, RedisConfig, MediaConfig):
     env: str = "development"  # значение по умолчанию
 
     # Делаем поля опциональными с значениями по умолчанию:
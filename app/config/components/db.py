@@ -13,9 +13,17 @@ class DatabaseConfig(BaseSettings):
     postgres_dsn: str = Field(default='')
     test_db_url: str = Field(default='sqlite://:memory:')
 
+    # Учет SQL-запросов каждого запроса к API: число, время в БД, повторы одинаковых запросов
+    query_stats_enabled: bool = Field(default=True)
+    # Одинаковый запрос (с точностью до параметров), выполненный столько раз за запрос к API, — признак N+1
+    query_repeat_threshold: int = Field(default=5)
+    # Запрос к API, выполнивший больше SQL-запросов, пишется в лог с предупреждением
+    query_count_warning: int = Field(default=50)
+
     model_config = {
         'env_file': ENV_FILE_PATH,
         'env_file_encoding': 'utf-8',
+        'extra': 'ignore',  # Игнорировать лишние переменные
     }
 
     @computed_field(return_type=str)
@@ -54,3 +62,7 @@ class DatabaseConfig(BaseSettings):
                 app_modules[app_name] = test_models
 
         return app_modules
+
+
+# Создаем экземпляр конфигурации БД
+db_config = DatabaseConfig()
@@ -0,0 +1,129 @@
+from typing import Dict, List
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+from config.constants import ENV_FILE_PATH
+
+
+class MediaConfig(BaseSettings):
+    # Движок обработки изображений: "process" — пул процессов, "inline" — в потоке (asyncio.to_thread)
+    # внутри процесса приложения, без пула
+    image_engine: str = Field(default='process')
+    # Количество процессов в пуле обработки изображений
+    image_pool_workers: int = Field(default=2)
+    # Библиотека обработки изображений: "pillow" или "vips" (libvips: потоковое декодирование
+    # с уменьшением при загрузке; нужны pyvips и libvips, иначе используется Pillow)
+    image_backend: str = Field(default='pillow')
+    # Максимум задач, одновременно ожидающих или выполняющихся в пуле
+    image_pool_max_queue: int = Field(default=16)
+    # Каскадное уменьшение: original → large → medium → small вместо ресайза каждой версии из исходника
+    image_cascade: bool = Field(default=True)
+
+    # Сколько изображений одного запроса обрабатываются одновременно
+    upload_concurrency: int = Field(default=4)
+    # Максимальный размер загружаемого файла в байтах
+    upload_max_bytes: int = Field(default=20 * 1024 * 1024)
+    # Максимальное разрешение (ширина * высота), защита от decompression bomb
+    image_max_pixels: int = Field(default=50_000_000)
+    # Каталог для временных файлов загрузок (пусто — системный по умолчанию)
+    upload_tmp_dir: str = Field(default='')
+    # Каталог возобновляемых загрузок (пусто — MEDIA_DIR/.incoming/resumable, общий для узлов)
+    upload_resumable_dir: str = Field(default='')
+    # Сколько секунд хранится незавершенная или неиспользованная возобновляемая загрузка
+    upload_resumable_ttl: int = Field(default=24 * 3600)
+
+    # Подбор качества основного формата: "fixed" — из профиля версий,
+    # "budget" — наибольшее качество в пределах image_byte_budgets, "perceptual" — наименьшее с ошибкой до image_max_error
+    image_quality_mode: str = Field(default='fixed')
+    # Бюджет размера файла по версиям, байт (версии без бюджета кодируются с качеством профиля)
+    image_byte_budgets: Dict[str, int] = Field(
+        default={'small': 20 * 1024, 'medium': 70 * 1024, 'large': 140 * 1024, 'original': 300 * 1024}
+    )
+    # Допустимая ошибка 1 - SSIM по яркости для режима "perceptual"
+    image_max_error: float = Field(default=0.01)
+    # Границы поиска качества и максимум пробных кодирований одной версии
+    image_quality_min: int = Field(default=40)
+    image_quality_max: int = Field(default=90)
+    image_quality_steps: int = Field(default=6)
+
+    # Фоновая генерация версий: запись фото создается сразу со статусом processing
+    image_background: bool = Field(default=False)
+    # Ключ очереди задач обработки фото в Redis
+    photo_queue_key: str = Field(default='photo_jobs')
+    # Количество фоновых обработчиков очереди в одном процессе приложения
+    photo_worker_concurrency: int = Field(default=2)
+    # Попыток обработки задачи, завершившейся исключением, до ее отбрасывания
+    photo_job_max_attempts: int = Field(default=3)
+    # Время жизни отметки обработчика (сек): задачи обработчика без отметки возвращаются в очередь
+    photo_worker_heartbeat_ttl: int = Field(default=30)
+
+    # Дополнительные форматы версий к основному WebP: avif, jpeg (AVIF — если поддерживается Pillow).
+    # По умолчанию выключены: каждый формат кодируется для каждой версии при загрузке
+    image_extra_formats: List[str] = Field(default=[])
+
+    # Раскладка каталогов версий: "sharded" — <город>/<роль>/<ab>/<cd>/<slug>/<тип> (префикс хэша slug
+    # ограничивает число подкаталогов), "flat" — прежняя <город>/<роль>/<slug>/<тип>.
+    # Существующие файлы переносятся скриптом scripts/shard_media.py
+    media_layout: str = Field(default='sharded')
+    # Записей фото в пачке при переносе файлов в шардированную раскладку
+    media_shard_batch_size: int = Field(default=500)
+
+    # Дедупликация: одинаковые файлы хранятся один раз по SHA-256 и не обрабатываются повторно
+    media_dedup: bool = Field(default=True)
+
+    # Поиск похожих фото по pHash: "off", "flag" — отметить near_duplicate_of, "reuse" — взять версии
+    # похожего фото того же владельца вместо обработки (только для фото, хранимых по хэшу содержимого).
+    # Индекс хэшей всей таблицы фото держит в памяти каждый процесс приложения: около 2 КБ на фото
+    # (100 тыс. фото — около 200 МБ на таблицу в каждом воркере), поэтому по умолчанию выключен
+    image_near_dup_mode: str = Field(default='off')
+    # Максимальное расстояние Хэмминга между pHash (из 64 бит) для похожих фото
+    image_near_dup_distance: int = Field(default=6)
+    # Через сколько секунд индекс хэшей перечитывается из БД: до этого загрузки в других процессах
+    # в индексе процесса не видны
+    image_near_dup_index_ttl: int = Field(default=600)
+
+    # Отдача /media и /media/resize: "app" — файл отправляет приложение, "x-accel" — заголовок
+    # X-Accel-Redirect для nginx, "x-sendfile" — X-Sendfile (Apache mod_xsendfile, lighttpd)
+    media_delivery: str = Field(default='app')
+    # Префикс internal location nginx с alias на MEDIA_DIR для режима "x-accel"
+    media_accel_prefix: str = Field(default='/_media/')
+
+    # Время кэширования статики app/static в браузере (секунды); версии /media кэшируются навсегда
+    static_max_age: int = Field(default=3600)
+
+    # Разрешенные ширины для /media/resize (защита от генерации произвольных размеров)
+    resize_allowed_widths: List[int] = Field(default=[160, 320, 480, 640, 768, 1024, 1200, 1600, 1920])
+    # Разрешенные форматы для /media/resize
+    resize_allowed_formats: List[str] = Field(default=['avif', 'webp', 'jpeg'])
+    # Предельный размер кэша версий на диске, при превышении удаляются давно не запрашиваемые.
+    # Учитывается в каждом воркере отдельно: при N воркерах кэш может занять до N × этого значения
+    resize_cache_max_bytes: int = Field(default=512 * 1024 * 1024)
+    # Качество кодирования версий, создаваемых по запросу
+    resize_quality: int = Field(default=82)
+
+    # Сборка файлов-сирот: режим "quarantine" (перенос в .quarantine) или "delete"
+    media_gc_mode: str = Field(default='quarantine')
+    # Файлы моложе этого возраста (секунды) не проверяются — загрузка может быть еще не записана в БД
+    media_gc_min_age: int = Field(default=3600)
+    # Сколько путей сверяется с БД за один запрос
+    media_gc_batch_size: int = Field(default=1000)
+    # Потоков обхода каталогов
+    media_gc_workers: int = Field(default=8)
+    # Интервал периодической сборки в секундах (0 — выключена)
+    media_gc_interval: int = Field(default=0)
+
+    # Пересоздание версий (scripts/reencode_media.py): записей в пачке, доля CPU машины и файл контрольной точки
+    media_reencode_batch_size: int = Field(default=100)
+    media_reencode_cpu_share: float = Field(default=0.5)
+    media_reencode_checkpoint: str = Field(default='reencode_checkpoint.json')
+
+    model_config = {
+        'env_file': ENV_FILE_PATH,
+        'env_file_encoding': 'utf-8',
+        'extra': 'ignore',  # Игнорировать лишние переменные
+    }
+
+
+# Создаем экземпляр конфигурации медиа
+media_config = MediaConfig()
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings
 from pathlib import Path
@@ -11,6 +13,19 @@ class RedisConfig(BaseSettings):
     redis_db: int = Field(default=0)
     redis_url: str = Field(default='')
 
+    # Ключи идемпотентности (заголовок Idempotency-Key): методы, к которым они применяются
+    idempotency_methods: List[str] = Field(default=['POST'])
+    # Сколько секунд хранится ответ для повтора запроса
+    idempotency_ttl: int = Field(default=24 * 3600)
+    # Предельное время обработки первого запроса: после него блокировка ключа снимается
+    idempotency_lock_ttl: int = Field(default=300)
+    # Сколько секунд параллельный дубликат ждет ответа первого запроса (затем 409)
+    idempotency_wait_timeout: int = Field(default=60)
+    # Ответы больше этого размера (байт) не сохраняются
+    idempotency_max_response_bytes: int = Field(default=1024 * 1024)
+    # Префикс ключей в Redis
+    idempotency_key_prefix: str = Field(default='idempotency')
+
     model_config = {
         'env_file': ENV_FILE_PATH,
         'env_file_encoding': 'utf-8',
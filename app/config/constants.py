@@ -10,6 +10,25 @@ APP_DIR = ROOT_DIR.joinpath('app')
 ENV_FILE_PATH = ROOT_DIR.joinpath('.env')
 
 MEDIA_DIR = ROOT_DIR.joinpath('media')
+
+# Статические файлы приложения (css, js, данные)
+STATIC_DIR = APP_DIR.joinpath('static')
+STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 
+# Служебный каталог внутри MEDIA_DIR для исходников, ожидающих фоновой обработки
+INCOMING_DIR = ".incoming"
+
+# Служебный каталог внутри MEDIA_DIR для кэша версий, создаваемых по запросу
+RESIZE_CACHE_DIR = ".resize"
+
+# Каталог внутри MEDIA_DIR для версий, хранимых по хэшу содержимого
+CONTENT_DIR = "content"
+
+# Каталог внутри MEDIA_DIR для файлов, отложенных сборщиком мусора
+QUARANTINE_DIR = ".quarantine"
+
+# Заголовок ответа списков с курсором следующей страницы (keyset-пагинация, см. BaseRepository.paginate_keyset)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 # Важно: Убираем импорт RedisConfig и создание redis_config отсюда
\ No newline at end of file
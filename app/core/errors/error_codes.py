@@ -25,6 +25,9 @@ ERROR_CODES = {
     # Модуль салонов (5000-5099)
     "SALON_NOT_FOUND": {"code": "5000", "message": "Салон не найден"},
     "SALON_INACTIVE": {"code": "5001", "message": "Салон не активен"},
+
+    # Модуль изображений (5100-5199)
+    "IMAGE_QUEUE_FULL": {"code": "5100", "message": "Очередь обработки изображений переполнена"},
 }
 
 
@@ -0,0 +1,19 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "status" VARCHAR(10) NOT NULL  DEFAULT 'ready';
+        ALTER TABLE "avatar_photo_salon" ADD "status" VARCHAR(10) NOT NULL  DEFAULT 'ready';
+        ALTER TABLE "photo_news" ADD "status" VARCHAR(10) NOT NULL  DEFAULT 'ready';
+        ALTER TABLE "standard_service_photo" ADD "status" VARCHAR(10) NOT NULL  DEFAULT 'ready';
+        ALTER TABLE "custom_service_photo" ADD "status" VARCHAR(10) NOT NULL  DEFAULT 'ready';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "status";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "status";
+        ALTER TABLE "photo_news" DROP COLUMN "status";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "status";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "status";"""
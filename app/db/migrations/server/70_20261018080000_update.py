@@ -0,0 +1,29 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "content_hash" VARCHAR(64);
+        ALTER TABLE "avatar_photo_salon" ADD "content_hash" VARCHAR(64);
+        ALTER TABLE "photo_news" ADD "content_hash" VARCHAR(64);
+        ALTER TABLE "standard_service_photo" ADD "content_hash" VARCHAR(64);
+        ALTER TABLE "custom_service_photo" ADD "content_hash" VARCHAR(64);
+        CREATE INDEX IF NOT EXISTS "idx_avatar_phot_content_8a358c" ON "avatar_photo_master" ("content_hash");
+        CREATE INDEX IF NOT EXISTS "idx_avatar_phot_content_e2bef0" ON "avatar_photo_salon" ("content_hash");
+        CREATE INDEX IF NOT EXISTS "idx_photo_news_content_88675a" ON "photo_news" ("content_hash");
+        CREATE INDEX IF NOT EXISTS "idx_standard_se_content_201f19" ON "standard_service_photo" ("content_hash");
+        CREATE INDEX IF NOT EXISTS "idx_custom_serv_content_20ded2" ON "custom_service_photo" ("content_hash");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_avatar_phot_content_8a358c";
+        DROP INDEX IF EXISTS "idx_avatar_phot_content_e2bef0";
+        DROP INDEX IF EXISTS "idx_photo_news_content_88675a";
+        DROP INDEX IF EXISTS "idx_standard_se_content_201f19";
+        DROP INDEX IF EXISTS "idx_custom_serv_content_20ded2";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "content_hash";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "content_hash";
+        ALTER TABLE "photo_news" DROP COLUMN "content_hash";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "content_hash";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "content_hash";"""
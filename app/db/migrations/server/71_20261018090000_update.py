@@ -0,0 +1,19 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "formats" JSONB;
+        ALTER TABLE "avatar_photo_salon" ADD "formats" JSONB;
+        ALTER TABLE "photo_news" ADD "formats" JSONB;
+        ALTER TABLE "standard_service_photo" ADD "formats" JSONB;
+        ALTER TABLE "custom_service_photo" ADD "formats" JSONB;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "formats";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "formats";
+        ALTER TABLE "photo_news" DROP COLUMN "formats";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "formats";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "formats";"""
@@ -0,0 +1,29 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "placeholder" TEXT;
+        ALTER TABLE "avatar_photo_master" ADD "dominant_color" VARCHAR(7);
+        ALTER TABLE "avatar_photo_salon" ADD "placeholder" TEXT;
+        ALTER TABLE "avatar_photo_salon" ADD "dominant_color" VARCHAR(7);
+        ALTER TABLE "photo_news" ADD "placeholder" TEXT;
+        ALTER TABLE "photo_news" ADD "dominant_color" VARCHAR(7);
+        ALTER TABLE "standard_service_photo" ADD "placeholder" TEXT;
+        ALTER TABLE "standard_service_photo" ADD "dominant_color" VARCHAR(7);
+        ALTER TABLE "custom_service_photo" ADD "placeholder" TEXT;
+        ALTER TABLE "custom_service_photo" ADD "dominant_color" VARCHAR(7);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "placeholder";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "dominant_color";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "placeholder";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "dominant_color";
+        ALTER TABLE "photo_news" DROP COLUMN "placeholder";
+        ALTER TABLE "photo_news" DROP COLUMN "dominant_color";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "placeholder";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "dominant_color";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "placeholder";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "dominant_color";"""
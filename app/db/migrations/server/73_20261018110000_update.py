@@ -0,0 +1,19 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "quality" JSONB;
+        ALTER TABLE "avatar_photo_salon" ADD "quality" JSONB;
+        ALTER TABLE "photo_news" ADD "quality" JSONB;
+        ALTER TABLE "standard_service_photo" ADD "quality" JSONB;
+        ALTER TABLE "custom_service_photo" ADD "quality" JSONB;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "quality";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "quality";
+        ALTER TABLE "photo_news" DROP COLUMN "quality";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "quality";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "quality";"""
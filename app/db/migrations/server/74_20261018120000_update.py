@@ -0,0 +1,39 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "phash" VARCHAR(16);
+        ALTER TABLE "avatar_photo_master" ADD "dhash" VARCHAR(16);
+        ALTER TABLE "avatar_photo_master" ADD "near_duplicate_of" INT;
+        ALTER TABLE "avatar_photo_salon" ADD "phash" VARCHAR(16);
+        ALTER TABLE "avatar_photo_salon" ADD "dhash" VARCHAR(16);
+        ALTER TABLE "avatar_photo_salon" ADD "near_duplicate_of" INT;
+        ALTER TABLE "photo_news" ADD "phash" VARCHAR(16);
+        ALTER TABLE "photo_news" ADD "dhash" VARCHAR(16);
+        ALTER TABLE "photo_news" ADD "near_duplicate_of" INT;
+        ALTER TABLE "standard_service_photo" ADD "phash" VARCHAR(16);
+        ALTER TABLE "standard_service_photo" ADD "dhash" VARCHAR(16);
+        ALTER TABLE "standard_service_photo" ADD "near_duplicate_of" INT;
+        ALTER TABLE "custom_service_photo" ADD "phash" VARCHAR(16);
+        ALTER TABLE "custom_service_photo" ADD "dhash" VARCHAR(16);
+        ALTER TABLE "custom_service_photo" ADD "near_duplicate_of" INT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "phash";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "dhash";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "near_duplicate_of";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "phash";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "dhash";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "near_duplicate_of";
+        ALTER TABLE "photo_news" DROP COLUMN "phash";
+        ALTER TABLE "photo_news" DROP COLUMN "dhash";
+        ALTER TABLE "photo_news" DROP COLUMN "near_duplicate_of";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "phash";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "dhash";
+        ALTER TABLE "standard_service_photo" DROP COLUMN "near_duplicate_of";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "phash";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "dhash";
+        ALTER TABLE "custom_service_photo" DROP COLUMN "near_duplicate_of";"""
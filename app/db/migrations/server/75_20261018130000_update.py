@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" ADD "square_96" VARCHAR(255);
+        ALTER TABLE "avatar_photo_master" ADD "square_192" VARCHAR(255);
+        ALTER TABLE "avatar_photo_master" ADD "square_384" VARCHAR(255);
+        ALTER TABLE "avatar_photo_salon" ADD "square_96" VARCHAR(255);
+        ALTER TABLE "avatar_photo_salon" ADD "square_192" VARCHAR(255);
+        ALTER TABLE "avatar_photo_salon" ADD "square_384" VARCHAR(255);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "square_96";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "square_192";
+        ALTER TABLE "avatar_photo_master" DROP COLUMN "square_384";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "square_96";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "square_192";
+        ALTER TABLE "avatar_photo_salon" DROP COLUMN "square_384";"""
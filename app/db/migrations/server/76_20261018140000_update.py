@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_master_city_id_415a21" ON "master" ("city_id", "experience_years", "id");
+        CREATE INDEX IF NOT EXISTS "idx_salon_city_id_52404a" ON "salon" ("city_id", "created_at", "id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_master_city_id_415a21";
+        DROP INDEX IF EXISTS "idx_salon_city_id_52404a";"""
@@ -1,9 +1,10 @@
 from .abstract_model import AbstractModel
 from .abstract_service import AbstractService
-from .abstract_photo import AbstractPhoto
+from .abstract_photo import AbstractPhoto, PhotoStatus
 
 __all__ = [
     'AbstractModel',
     'AbstractService',
-    'AbstractPhoto'
+    'AbstractPhoto',
+    'PhotoStatus'
 ]
\ No newline at end of file
@@ -1,8 +1,16 @@
+from enum import Enum
 from tortoise import fields
 from db.models.abstract.abstract_model import AbstractModel
 from typing import Optional
 
 
+# Статус обработки версий изображения
+class PhotoStatus(str, Enum):
+    processing = "processing"  # Версии генерируются в фоне
+    ready = "ready"            # Все версии готовы
+    failed = "failed"          # Ошибка обработки
+
+
 class AbstractPhoto(AbstractModel):
     """
     Абстрактная модель для фотографий
@@ -20,6 +28,25 @@ class AbstractPhoto(AbstractModel):
     medium = fields.CharField(max_length=255, null=True) # Средняя версия (768px)
     large = fields.CharField(max_length=255, null=True)  # Большая версия (1200px)
     original = fields.TextField(null=True, description="Относительный путь к оригинальной аватарке")
+    status = fields.CharEnumField(PhotoStatus, default=PhotoStatus.ready, description="Статус обработки версий")
+    content_hash = fields.CharField(max_length=64, null=True, index=True, description="SHA-256 исходного файла")
+    formats = fields.JSONField(null=True, description="Размер original в каждом сохраненном формате, байт")
+    placeholder = fields.TextField(null=True, description="Заглушка ~16px WebP в виде data URI")
+    dominant_color = fields.CharField(max_length=7, null=True, description="Доминирующий цвет #rrggbb")
+    quality = fields.JSONField(null=True, description="Качество кодирования основного формата по версиям")
+    phash = fields.CharField(max_length=16, null=True, description="Перцептивный хэш (pHash, 64 бита в hex)")
+    dhash = fields.CharField(max_length=16, null=True, description="Разностный хэш (dHash, 64 бита в hex)")
+    near_duplicate_of = fields.IntField(null=True, description="ID похожего фото в той же таблице")
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class SquarePhotoMixin:
+    """
+    Квадратные версии (для аватаров): кадрирование по карте значимости, стороны 96/192/384px.
+    Список выводит квадрат в несколько КБ вместо версии medium.
+    """
+    square_96 = fields.CharField(max_length=255, null=True, description="Квадратная версия 96px")
+    square_192 = fields.CharField(max_length=255, null=True, description="Квадратная версия 192px")
+    square_384 = fields.CharField(max_length=255, null=True, description="Квадратная версия 384px")
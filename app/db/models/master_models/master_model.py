@@ -52,3 +52,5 @@ class Master(AbstractModel):
 
     class Meta:
         table = "master"
+        # Keyset-пагинация списка мастеров города (см. MasterRepository.get_masters_in_city)
+        indexes = [("city_id", "experience_years", "id")]
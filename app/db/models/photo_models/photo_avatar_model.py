@@ -1,10 +1,10 @@
 from tortoise import fields
 
-from db.models.abstract.abstract_photo import AbstractPhoto
+from db.models.abstract.abstract_photo import AbstractPhoto, SquarePhotoMixin
 
 
 
-class AvatarPhotoMaster(AbstractPhoto):
+class AvatarPhotoMaster(AbstractPhoto, SquarePhotoMixin):
     """
     Фотографии стандартных услуг
     """
@@ -12,7 +12,7 @@ class AvatarPhotoMaster(AbstractPhoto):
     class Meta:
         table = "avatar_photo_master"
 
-class AvatarPhotoSalon(AbstractPhoto):
+class AvatarPhotoSalon(AbstractPhoto, SquarePhotoMixin):
     """
     Фотографии стандартных услуг
     """
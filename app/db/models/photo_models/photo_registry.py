@@ -0,0 +1,29 @@
+from typing import Dict, Optional, Tuple, Type
+
+from db.models.abstract.abstract_photo import AbstractPhoto
+from db.models.photo_models.photo_avatar_model import AvatarPhotoMaster, AvatarPhotoSalon
+from db.models.photo_models.photo_news_models import NewsPhoto
+from db.models.photo_models.photo_standart_service_model import StandardServicePhoto, CustomServicePhoto
+
+
+# Все модели фотографий по имени таблицы (ключ используется в фоновых задачах и API)
+PHOTO_MODELS: Dict[str, Type[AbstractPhoto]] = {
+    model._meta.db_table: model
+    for model in (AvatarPhotoMaster, AvatarPhotoSalon, NewsPhoto, StandardServicePhoto, CustomServicePhoto)
+}
+
+
+def get_photo_model(key: str) -> Optional[Type[AbstractPhoto]]:
+    """Получение модели фотографии по имени таблицы."""
+    return PHOTO_MODELS.get(key)
+
+
+def get_owner_field(model: Type[AbstractPhoto]) -> Optional[str]:
+    """Поле владельца фото (внешний ключ на сущность) или None, если у фото нет владельца."""
+    fk_fields = sorted(model._meta.fk_fields)
+    return f"{fk_fields[0]}_id" if fk_fields else None
+
+
+def get_square_fields(model: Type[AbstractPhoto]) -> Tuple[str, ...]:
+    """Поля квадратных версий модели (есть только у аватаров, см. SquarePhotoMixin)."""
+    return tuple(name for name in model._meta.fields_map if name.startswith("square_"))
@@ -44,4 +44,6 @@ class Salon(AbstractModel):
     invitations = fields.ReverseRelation["SalonMasterInvitation"]  # Связь с приглашениями мастеров
 
     class Meta:
-        table = "salon"
\ No newline at end of file
+        table = "salon"
+        # Keyset-пагинация списка салонов города (см. SalonRepository.get_salon_in_city)
+        indexes = [("city_id", "created_at", "id")]
\ No newline at end of file
@@ -0,0 +1,125 @@
+import functools
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Set, Tuple
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+# Методы клиента БД, через которые Tortoise выполняет SQL (запросы QuerySet и executor модели)
+EXECUTE_METHODS = ("execute_insert", "execute_many", "execute_query", "execute_query_dict", "execute_script")
+
+# Литералы, отличающие запросы одной формы: строки, числа, плейсхолдеры ($1, ?, %s)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"\$\d+|%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+# Активные счетчики текущего запроса к API (вложенные — например, тест поверх middleware)
+_active: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_stats_active", default=())
+# Вызов внутри учтенного метода (переопределенный метод клиента, вызывающий родительский) не считается
+_inside: ContextVar[bool] = ContextVar("query_stats_inside", default=False)
+
+# Классы клиентов, методы которых уже обернуты
+_patched: Set[type] = set()
+
+
+def query_shape(sql: str) -> str:
+    """Форма запроса: SQL без значений параметров, списки IN (?, ?, ?) свернуты в (?)."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0  # Секунды в БД
+    shapes: Counter = field(default_factory=Counter)
+    examples: Dict[str, str] = field(default_factory=dict)
+
+    def add(self, sql: str, duration: float) -> None:
+        shape = query_shape(sql)
+        self.count += 1
+        self.duration += duration
+        self.shapes[shape] += 1
+        self.examples.setdefault(shape, sql)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Формы запросов, выполненные не меньше threshold раз (признак N+1), по убыванию числа."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} SQL-запросов, {self.duration * 1000:.1f} мс в БД"]
+        lines += [f"  {count} x {shape}" for shape, count in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+def _record(method):
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        active = _active.get()
+        if not active or _inside.get():
+            return await method(self, query, *args, **kwargs)
+
+        token = _inside.set(True)
+        start = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            _inside.reset(token)
+            for stats in active:
+                stats.add(query, duration)
+
+    wrapper.__query_stats__ = True
+    return wrapper
+
+
+def _client_classes(cls: type = BaseDBAsyncClient) -> Iterator[type]:
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _client_classes(subclass)
+
+
+def install() -> None:
+    """
+    Оборачивает методы выполнения SQL у клиентов БД Tortoise.
+
+    Модули бэкендов импортируются при Tortoise.init, поэтому классы ищутся среди уже загруженных
+    наследников BaseDBAsyncClient (включая TransactionWrapper); повторный вызов оборачивает только новые.
+    Без активного счетчика обертка сводится к чтению ContextVar.
+    """
+    for cls in _client_classes():
+        if cls in _patched:
+            continue
+        for name in EXECUTE_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, "__query_stats__", False):
+                setattr(cls, name, _record(method))
+        _patched.add(cls)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Считает SQL-запросы, выполненные внутри блока (в том числе в задачах, созданных в нем).
+
+    Пример:
+        with track_queries() as stats:
+            await MasterReadService.get_master(city_slug, master_slug)
+        assert stats.count <= 3, stats.report()
+    """
+    install()
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
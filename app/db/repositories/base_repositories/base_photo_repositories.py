@@ -53,15 +53,17 @@ class BasePhotoRepository:
     async def set_main_photo(cls, id: int, entity_id: int, entity_field: str = "entity_id") -> bool:
         """Установка фотографии как основной для указанной сущности"""
         async with in_transaction() as conn:
+            # Сначала признак основной у текущей фотографии: если она чужая, остальные не трогаются
+            updated = await cls.model.filter(id=id, **{entity_field: entity_id}).using_db(conn).update(is_main=True)
+            if not updated:
+                logger.warning(f"Не удалось установить {cls.model.__name__} с ID {id} как основную.")
+                return False
             # Снимаем признак основной с других фотографий
-            await cls.model.filter(**{entity_field: entity_id}).using_db(conn).update(is_main=False)
-            # Устанавливаем текущей фотографии признак основной
-            updated = await cls.model.filter(id=id).using_db(conn).update(is_main=True)
-            if updated:
-                logger.info(f"{cls.model.__name__} с ID {id} установлена как основная.")
-                return True
-            logger.warning(f"Не удалось установить {cls.model.__name__} с ID {id} как основную.")
-            return False
+            await cls.model.filter(is_main=True, **{entity_field: entity_id}).exclude(id=id).using_db(conn).update(
+                is_main=False
+            )
+            logger.info(f"{cls.model.__name__} с ID {id} установлена как основная.")
+            return True
 
     @classmethod
     async def bulk_create(cls, data_list: List[Dict[str, Any]], batch_size: int = 100) -> List[ModelType]:
@@ -76,9 +78,12 @@ class BasePhotoRepository:
 
     @classmethod
     async def reorder_photos(cls, entity_id: int, new_order: List[int], entity_field: str = "entity_id") -> bool:
-        """Переназначение порядка фотографий для указанной сущности"""
-        async with in_transaction() as conn:
-            for sort_order, photo_id in enumerate(new_order):
-                await cls.model.filter(id=photo_id, **{entity_field: entity_id}).using_db(conn).update(sort_order=sort_order)
-            logger.info(f"Переназначен порядок для {cls.model.__name__} сущности с ID {entity_id}.")
+        """Переназначение порядка фотографий для указанной сущности одним UPDATE ... CASE"""
+        if not new_order:
             return True
+        photos = [cls.model(id=photo_id, sort_order=sort_order) for sort_order, photo_id in enumerate(new_order)]
+        await cls.model.filter(**{entity_field: entity_id}).bulk_update(
+            photos, fields=["sort_order"], batch_size=len(photos)
+        )
+        logger.info(f"Переназначен порядок для {cls.model.__name__} сущности с ID {entity_id}.")
+        return True
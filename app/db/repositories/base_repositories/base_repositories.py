@@ -1,6 +1,13 @@
-from typing import TypeVar, Type, Optional, List, Any, Dict
+import base64
+import binascii
+import hashlib
+import json
+from typing import TypeVar, Type, Optional, List, Any, Dict, Sequence, Tuple
+from fastapi import HTTPException, status
+from tortoise.expressions import Q
 from tortoise.models import Model
 from tortoise.exceptions import DoesNotExist
+from tortoise.queryset import QuerySet
 from tortoise.transactions import in_transaction
 from config.components.logging_config import logger
 
@@ -29,12 +36,89 @@ class BaseRepository:
             return None
 
     @classmethod
-    async def get_all_with_pagination(cls, limit: int = 10, offset: int = 0, *related_fields) -> List[ModelType]:
-        """Получение всех объектов с пагинацией и связанными полями"""
+    async def get_all_with_pagination(
+            cls, limit: int = 10, cursor: Optional[str] = None, *related_fields
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Страница всех объектов (по id) со связанными полями и курсор следующей (см. paginate_keyset)"""
         query = cls.model.all()
         if related_fields:
             query = query.prefetch_related(*related_fields)
-        return await query.offset(offset).limit(limit)
+        return await cls.paginate_keyset(query, cursor=cursor, limit=limit)
+
+    @classmethod
+    async def paginate_keyset(
+            cls,
+            query: Optional[QuerySet] = None,
+            order_by: Sequence[str] = ("id",),
+            cursor: Optional[str] = None,
+            limit: int = 10,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset-пагинация: следующая страница выбирается условием по значениям полей сортировки
+        последней записи предыдущей страницы, а не OFFSET, поэтому любая страница стоит как первая.
+
+        Args:
+            query: Запрос с фильтрами и prefetch_related (по умолчанию все записи модели)
+            order_by: Поля сортировки, "-" — по убыванию, например ("-experience_years", "-id").
+                Поля не должны содержать NULL; если последнее поле не id, id добавляется для однозначности
+            cursor: Непрозрачный курсор из предыдущего ответа (None — первая страница)
+            limit: Размер страницы
+
+        Returns:
+            Записи страницы и курсор следующей страницы (None — страница последняя)
+
+        Raises:
+            HTTPException: 400, если курсор поврежден или получен для другой сортировки
+        """
+        order_by = list(order_by)
+        if order_by[-1].lstrip("-") != "id":
+            order_by.append("id")
+        fields = [field.lstrip("-") for field in order_by]
+        spec = hashlib.blake2b(",".join(order_by).encode(), digest_size=4).hexdigest()
+
+        query = query if query is not None else cls.model.all()
+        if cursor:
+            query = query.filter(cls._keyset_condition(order_by, cls._decode_cursor(cursor, spec, fields)))
+
+        # Запись сверх страницы показывает, есть ли следующая
+        items = list(await query.order_by(*order_by).limit(limit + 1))
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        values = [cls.model._meta.fields_map[field].to_db_value(getattr(items[-1], field), items[-1]) for field in fields]
+        return items, cls._encode_cursor(spec, values)
+
+    @staticmethod
+    def _keyset_condition(order_by: List[str], values: List[Any]) -> Q:
+        """
+        (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... с направлением сравнения каждого поля.
+        Отдельное нестрогое условие на первое поле ограничивает диапазон индекса.
+        """
+        fields = [field.lstrip("-") for field in order_by]
+        operators = ["lt" if field.startswith("-") else "gt" for field in order_by]
+
+        branches = []
+        for position, (field, operator) in enumerate(zip(fields, operators)):
+            equal = {fields[index]: values[index] for index in range(position)}
+            branches.append(Q(**equal, **{f"{field}__{operator}": values[position]}))
+        return Q(**{f"{fields[0]}__{operators[0]}e": values[0]}) & Q(*branches, join_type="OR")
+
+    @staticmethod
+    def _encode_cursor(spec: str, values: List[Any]) -> str:
+        payload = json.dumps([spec, values], default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def _decode_cursor(cls, cursor: str, spec: str, fields: List[str]) -> List[Any]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            cursor_spec, values = payload
+            if cursor_spec != spec or len(values) != len(fields):
+                raise ValueError("курсор получен для другой сортировки")
+            return [cls.model._meta.fields_map[field].to_python_value(value) for field, value in zip(fields, values)]
+        except (ValueError, TypeError, binascii.Error) as e:
+            logger.warning(f"Некорректный курсор пагинации {cls.model.__name__}: {e}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор")
 
     @classmethod
     async def get_all(cls) -> List[ModelType]:
@@ -68,9 +152,9 @@ class BaseRepository:
         return deleted_count
 
     @classmethod
-    async def filter(cls, limit: int = 10, offset: int = 0, **kwargs: Any) -> List[ModelType]:
-        """Фильтрация объектов по указанным параметрам с пагинацией"""
-        return await cls.model.filter(**kwargs).offset(offset).limit(limit)
+    async def filter(cls, limit: int = 10, **kwargs: Any) -> List[ModelType]:
+        """Первые limit объектов с указанными параметрами (постранично — через paginate_keyset)"""
+        return await cls.model.filter(**kwargs).limit(limit)
 
     @classmethod
     async def exists(cls, **kwargs: Any) -> bool:
@@ -1,12 +1,15 @@
-from typing import Optional, List, Union, Any
+from typing import Optional, List, Tuple, Union, Any
 
 from fastapi import HTTPException
 from tortoise.exceptions import DoesNotExist
+from tortoise.query_utils import Prefetch
 
 from app.core.exceptions.repository import EntityNotFoundException
 from app.db.schemas.master_schemas.master_schemas import MasterUpdateSchema
 from db.models.services_models.service_custom_model import CustomService
 from db.models.master_models.master_model import Master
+from db.models.photo_models.photo_avatar_model import AvatarPhotoMaster
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
 from db.models.location.city import City
 from db.repositories.base_repositories.base_repositories import BaseRepository
 from config.components.logging_config import logger
@@ -72,32 +75,34 @@ class MasterRepository(BaseRepository):
         return await cls.filter(city=city)
 
     @classmethod
-    async def get_masters_in_city(cls, city_slug: str, limit: int = 10, offset: int = 0) -> List[Master]:
+    async def get_masters_in_city(
+            cls, city_slug: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[Master], Optional[str]]:
         """
-        Получение мастеров для конкретного города.
+        Получение мастеров для конкретного города: страница и курсор следующей (см. paginate_keyset).
         """
         try:
             # Один запрос для получения города и всех мастеров в нем
             city = await City.get(slug=city_slug)  # Получаем город по slug
 
             # Получаем мастеров, связанных с этим городом
-            masters = await Master.filter(
-                city=city
-            ).offset(offset).limit(limit).prefetch_related('city')  # Загружаем город для каждого мастера
-
-            return masters
+            query = Master.filter(city=city).prefetch_related(
+                'city',  # Загружаем город для каждого мастера
+                # Аватары всех мастеров страницы одним запросом, главный — первым
+                Prefetch('images', queryset=PhotoRepository.card_photos_queryset(AvatarPhotoMaster)),
+            )
+            # Сначала опытные; порядок совпадает с индексом (city_id, experience_years, id)
+            return await cls.paginate_keyset(query, ("-experience_years", "-id"), cursor, limit)
         except City.DoesNotExist:
             raise HTTPException(status_code=404, detail="Город не найден.")
 
 
     @classmethod
-    async def get_masters_with_specialty(cls, specialty: str, limit: int = 10, offset: int = 0) -> List[Master]:
-        """Получение мастеров по специализации."""
-        return await cls.filter(
-            limit=limit,
-            offset=offset,
-            specialty__icontains=specialty
-        )
+    async def get_masters_with_specialty(
+            cls, specialty: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[Master], Optional[str]]:
+        """Страница мастеров по специализации и курсор следующей."""
+        return await cls.paginate_keyset(Master.filter(specialty__icontains=specialty), cursor=cursor, limit=limit)
 
     @classmethod
     async def add_service_to_master(cls, master_id: int, service_id: int) -> bool:
@@ -1,6 +1,14 @@
-from typing import Type, Any, Dict, Union
+import os
+from typing import Type, Any, Dict, List, Optional, Set, Tuple, Union
+from tortoise.expressions import Q
 from tortoise.models import Model
+from tortoise.transactions import in_transaction
 from config.components.logging_config import logger
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.models.photo_models.photo_registry import get_square_fields
+
+# Предел числа параметров одного запроса в протоколе PostgreSQL
+POSTGRES_MAX_PARAMETERS = 32767
 
 
 class PhotoRepository:
@@ -24,6 +32,58 @@ class PhotoRepository:
             logger.error(f"Ошибка при создании фото {model.__name__}: {str(e)}")
             raise
 
+    @staticmethod
+    async def bulk_create_photos(model: Type[Model], rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Создает несколько записей фотографий в одной транзакции.
+
+        bulk_create Tortoise не возвращает первичные ключи, поэтому на PostgreSQL записи
+        вставляются одним INSERT ... RETURNING id (строки RETURNING идут в порядке VALUES),
+        на остальных бэкендах — по одной, и ключ каждой записи берется из ее INSERT.
+
+        Args:
+            model: Класс модели
+            rows: Параметры записей
+
+        Returns:
+            ID созданных записей в порядке rows
+        """
+        if not rows:
+            return []
+        try:
+            instances = [model(**row) for row in rows]
+            async with in_transaction() as conn:
+                if conn.capabilities.dialect == "postgres":
+                    ids = await PhotoRepository._insert_returning_ids(model, instances, conn)
+                else:
+                    for instance in instances:
+                        await instance.save(using_db=conn, force_create=True)
+                    ids = [instance.pk for instance in instances]
+            logger.info(f"Создано записей фото {model.__name__}: {len(rows)}")
+            return ids
+        except Exception as e:
+            logger.error(f"Ошибка при массовом создании фото {model.__name__}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def _insert_returning_ids(model: Type[Model], instances: List[Model], conn) -> List[int]:
+        """Многострочный INSERT ... RETURNING первичного ключа (пачками в пределах лимита параметров)."""
+        executor = conn.executor_class(model=model, db=conn)
+        fields, columns = executor._prepare_insert_columns()
+        pk_column = model._meta.db_pk_column
+        batch_size = max(1, POSTGRES_MAX_PARAMETERS // len(fields))
+
+        ids = []
+        for start in range(0, len(instances), batch_size):
+            query = conn.query_class.into(model._meta.basetable).columns(*columns)
+            values = []
+            for instance in instances[start:start + batch_size]:
+                query = query.insert(*[executor.parameter(len(values) + i) for i in range(len(fields))])
+                values.extend(executor.column_map[field](getattr(instance, field), instance) for field in fields)
+            _, result = await conn.execute_query(str(query.returning(pk_column)), values)
+            ids.extend(row[pk_column] for row in result)
+        return ids
+
     @staticmethod
     async def get_photo_by_id(model: Type[Model], photo_id: int) -> Union[Model, None]:
         """
@@ -84,6 +144,189 @@ class PhotoRepository:
             return photo
         return None
 
+    @staticmethod
+    async def update_photo_fields(model: Type[Model], photo_id: int, **kwargs) -> bool:
+        """
+        Обновляет поля фотографии одним UPDATE без предварительной выборки.
+
+        Args:
+            model: Класс модели
+            photo_id: ID фотографии
+            **kwargs: Параметры для обновления
+
+        Returns:
+            True, если запись обновлена
+        """
+        updated = await model.filter(id=photo_id).update(**kwargs)
+        return updated > 0
+
+    @staticmethod
+    async def get_perceptual_hashes(
+            model: Type[Model], owner_field: Optional[str] = None,
+    ) -> List[Tuple[int, str, Optional[str], Any]]:
+        """
+        Получает перцептивные хэши всех фото таблицы для индекса похожих фото.
+
+        Args:
+            model: Класс модели
+            owner_field: Поле владельца (например, master_id) или None
+
+        Returns:
+            Список (id, phash, dhash, владелец)
+        """
+        rows = await model.filter(phash__isnull=False).values_list(
+            "id", "phash", "dhash", *([owner_field] if owner_field else [])
+        )
+        if owner_field:
+            return [tuple(row) for row in rows]
+        return [(*row, None) for row in rows]
+
+    @staticmethod
+    async def get_photos_after(
+            model: Type[Model], last_id: int, limit: int, status: Optional[PhotoStatus] = PhotoStatus.ready,
+    ) -> List[Model]:
+        """
+        Получает следующую пачку фотографий по возрастанию id (keyset-пагинация).
+
+        Args:
+            model: Класс модели
+            last_id: id последней обработанной записи (0 — с начала таблицы)
+            limit: Размер пачки
+            status: Статус записей (по умолчанию только готовые, None — любой)
+
+        Returns:
+            Список фотографий с id > last_id
+        """
+        query = model.filter(id__gt=last_id)
+        if status is not None:
+            query = query.filter(status=status)
+        return await query.order_by("id").limit(limit)
+
+    @staticmethod
+    async def bulk_update_photos(model: Type[Model], photos: List[Model], fields: List[str]) -> None:
+        """
+        Сохраняет измененные поля нескольких фотографий одним UPDATE ... CASE в транзакции.
+
+        Args:
+            model: Класс модели
+            photos: Объекты с уже измененными значениями
+            fields: Имена обновляемых полей
+        """
+        if not photos:
+            return
+        async with in_transaction() as conn:
+            await model.bulk_update(photos, fields=fields, using_db=conn)
+        logger.info(f"Обновлено записей фото {model.__name__}: {len(photos)}")
+
+    @staticmethod
+    async def get_ready_photo_by_hash(model: Type[Model], content_hash: str, file_path: str) -> Union[Model, None]:
+        """
+        Получает готовую фотографию с тем же содержимым (по SHA-256 исходника) и тем же профилем версий.
+
+        Args:
+            model: Класс модели
+            content_hash: SHA-256 исходного файла
+            file_path: Путь самой большой версии профиля. Подходят и версии, пересозданные
+                MediaReencoder: у них перед расширением стоит отпечаток настроек
+
+        Returns:
+            Объект фото с готовыми версиями (самый новый) или None
+        """
+        return await model.filter(
+            content_hash=content_hash, status=PhotoStatus.ready,
+            file_path__startswith=f"{os.path.splitext(file_path)[0]}.",
+        ).order_by("-id").first()
+
+    @staticmethod
+    async def update_content_photos(model: Type[Model], content_hash: str, file_path: str, **kwargs) -> int:
+        """
+        Обновляет все записи, ссылающиеся на один набор версий в хранилище по хэшу содержимого.
+
+        Args:
+            model: Класс модели
+            content_hash: SHA-256 исходного файла
+            file_path: Текущий путь самой большой версии набора
+            **kwargs: Параметры для обновления
+
+        Returns:
+            Количество обновленных записей
+        """
+        return await model.filter(content_hash=content_hash, file_path=file_path).update(**kwargs)
+
+    @staticmethod
+    async def count_by_content_hash(model: Type[Model], content_hash: str) -> int:
+        """
+        Считает записи, ссылающиеся на файлы с данным хэшем содержимого.
+
+        Args:
+            model: Класс модели
+            content_hash: SHA-256 исходного файла
+
+        Returns:
+            Количество записей
+        """
+        return await model.filter(content_hash=content_hash).count()
+
+    @staticmethod
+    async def get_referenced_hashes(model: Type[Model], content_hashes: List[str]) -> Set[str]:
+        """
+        Хэши содержимого из списка, на которые ссылаются записи таблицы.
+
+        Args:
+            model: Класс модели
+            content_hashes: SHA-256 исходных файлов
+
+        Returns:
+            Множество найденных хэшей
+        """
+        rows = await model.filter(content_hash__in=content_hashes).distinct().values_list("content_hash", flat=True)
+        return set(rows)
+
+    @staticmethod
+    async def get_content_hashes(model: Type[Model], photo_ids: Optional[List[int]] = None, **filters) -> Set[str]:
+        """
+        Хэши содержимого фотографий (для блокировки перед удалением).
+
+        Args:
+            model: Класс модели
+            photo_ids: ID фотографий (None — все фото, подходящие под filters)
+            **filters: Дополнительные условия
+
+        Returns:
+            Множество хэшей (фото без хэша не учитываются)
+        """
+        if photo_ids is not None:
+            filters["id__in"] = photo_ids
+        rows = await model.filter(content_hash__isnull=False, **filters).values_list("content_hash", flat=True)
+        return set(rows)
+
+    @staticmethod
+    def card_photos_queryset(model: Type[Model]):
+        """
+        Готовые фото для карточек в списках (для Prefetch): главное фото первым,
+        затем по sort_order.
+        """
+        return model.filter(status=PhotoStatus.ready).order_by("-is_main", "sort_order", "id")
+
+    @staticmethod
+    async def get_referenced_paths(model: Type[Model], paths: List[str]) -> Set[str]:
+        """
+        Возвращает пути из paths, на которые ссылается хотя бы одна запись фото.
+
+        Args:
+            model: Класс модели
+            paths: Пути файлов относительно MEDIA_DIR
+
+        Returns:
+            Множество путей, встречающихся в полях file_path/small/medium/large/original
+            и в полях квадратных версий
+        """
+        columns = ("file_path", "small", "medium", "large", "original", *get_square_fields(model))
+        condition = Q(*(Q(**{f"{column}__in": paths}) for column in columns), join_type="OR")
+        rows = await model.filter(condition).values_list(*columns)
+        wanted = set(paths)
+        return {value for row in rows for value in row if value in wanted}
+
     @staticmethod
     async def delete_photo(model: Type[Model], photo_id: int) -> bool:
         """
@@ -99,10 +342,59 @@ class PhotoRepository:
         deleted_count = await model.filter(id=photo_id).delete()
         return deleted_count > 0
 
+    @staticmethod
+    async def delete_photos(model: Type[Model], photo_ids: Optional[List[int]] = None, **filters) -> List[Model]:
+        """
+        Удаляет несколько фотографий в одной транзакции: SELECT ... FOR UPDATE и один DELETE.
+
+        Args:
+            model: Класс модели
+            photo_ids: ID фотографий (None — все фото, подходящие под filters)
+            **filters: Дополнительные условия, например master_id=5 — чужие фото не удаляются
+
+        Returns:
+            Удаленные записи: по ним удаляются файлы версий
+        """
+        if photo_ids is not None:
+            if not photo_ids:
+                return []
+            filters["id__in"] = photo_ids
+        if not filters:
+            raise ValueError("Не заданы условия удаления фотографий")
+
+        async with in_transaction() as conn:
+            photos = await model.filter(**filters).select_for_update().using_db(conn)
+            if photos:
+                await model.filter(id__in=[photo.id for photo in photos]).using_db(conn).delete()
+        logger.info(f"Удалено записей фото {model.__name__}: {len(photos)}")
+        return photos
+
+    @staticmethod
+    async def reorder_photos(model: Type[Model], entity_field: str, entity_id: int, photo_ids: List[int]) -> int:
+        """
+        Задает порядок фотографий сущности одним UPDATE ... SET sort_order = CASE id WHEN ... END.
+
+        Args:
+            model: Класс модели
+            entity_field: Имя поля для фильтрации (например, 'master_id')
+            entity_id: ID сущности
+            photo_ids: ID фотографий в новом порядке (sort_order — позиция в списке)
+
+        Returns:
+            Количество обновленных записей (фото других сущностей не обновляются)
+        """
+        if not photo_ids:
+            return 0
+        # bulk_update строит один UPDATE ... CASE id WHEN ... END, условие сущности добавляется в WHERE
+        photos = [model(id=photo_id, sort_order=position) for position, photo_id in enumerate(photo_ids)]
+        return await model.filter(**{entity_field: entity_id}).bulk_update(
+            photos, fields=["sort_order"], batch_size=len(photos)
+        )
+
     @staticmethod
     async def set_main_photo(model: Type[Model], entity_field: str, entity_id: int, photo_id: int) -> bool:
         """
-        Устанавливает фото в качестве основного, сбрасывая флаг у остальных.
+        Устанавливает фото в качестве основного, сбрасывая флаг у остальных, в одной транзакции.
 
         Args:
             model: Класс модели
@@ -111,18 +403,18 @@ class PhotoRepository:
             photo_id: ID фотографии, которая должна стать основной
 
         Returns:
-            True при успешном обновлении, False при ошибке
+            True при успешном обновлении, False если фото не принадлежит сущности
         """
-        try:
-            filter_params = {entity_field: entity_id}
-            # Сбрасываем флаг у всех фотографий сущности
-            await model.filter(**filter_params).update(is_main=False)
-            # Устанавливаем флаг у выбранной фотографии
-            await model.filter(id=photo_id).update(is_main=True)
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка при установке основного фото: {str(e)}")
-            return False
+        filter_params = {entity_field: entity_id}
+        async with in_transaction() as conn:
+            # Сначала флаг выбранной фотографии: если она чужая, остальные не трогаются
+            updated = await model.filter(id=photo_id, **filter_params).using_db(conn).update(is_main=True)
+            if not updated:
+                logger.warning(f"Фото {model.__name__} id={photo_id} не найдено у {entity_field}={entity_id}")
+                return False
+            # Сбрасываем флаг только у фотографий, где он установлен
+            await model.filter(is_main=True, **filter_params).exclude(id=photo_id).using_db(conn).update(is_main=False)
+        return True
 
     @staticmethod
     async def get_photo(model: Type[Model], **filters) -> Union[Model, None]:
@@ -1,13 +1,16 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Tuple, Any
 from fastapi import HTTPException
 from tortoise.exceptions import DoesNotExist
 from tortoise.expressions import Q
 from tortoise.transactions import atomic
 from tortoise.functions import Count
+from tortoise.query_utils import Prefetch
 
 from core.exceptions.repository import EntityNotFoundException
 from db.models import City
 from db.models.salon_models.salon_model import Salon
+from db.models.photo_models.photo_avatar_model import AvatarPhotoSalon
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
 from db.repositories.base_repositories.base_repositories import BaseRepository
 from db.schemas.salon_schemas.salon_schemas import SalonUpdateSchema
 from config.components.logging_config import logger
@@ -61,9 +64,11 @@ class SalonRepository(BaseRepository):
         return await cls.filter(city=city)
 
     @classmethod
-    async def get_salon_in_city(cls, city_slug: str, limit: int = 10, offset: int = 0) -> List[Salon]:
+    async def get_salon_in_city(
+            cls, city_slug: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[Salon], Optional[str]]:
         """
-        Получение салонов для конкретного города.
+        Получение салонов для конкретного города: страница и курсор следующей (см. paginate_keyset).
         """
         try:
             # Получаем город по slug
@@ -72,13 +77,17 @@ class SalonRepository(BaseRepository):
         except DoesNotExist:
             raise HTTPException(status_code=404, detail="Город не найден.")
 
-        # Получаем салоны в этом городе
-        salons = await Salon.filter(city=city).offset(offset).limit(limit).all()
+        # Получаем салоны в этом городе, сначала новые; порядок совпадает с индексом (city_id, created_at, id)
+        query = Salon.filter(city=city).prefetch_related(
+            # Аватары всех салонов страницы одним запросом, главный — первым
+            Prefetch('images', queryset=PhotoRepository.card_photos_queryset(AvatarPhotoSalon)),
+        )
+        salons, next_cursor = await cls.paginate_keyset(query, ("-created_at", "-id"), cursor, limit)
 
-        if not salons:
+        if not salons and not cursor:
             raise HTTPException(status_code=404, detail="Салоны не найдены в данном городе.")
 
-        return salons
+        return salons, next_cursor
 
     @classmethod
     async def search_salons(cls, query: str) -> List[Salon]:
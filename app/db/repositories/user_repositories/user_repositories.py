@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from db.repositories.base_repositories.base_repositories import BaseRepository
 from db.repositories.location_repositories.city_repositories import CityRepository
 from db.models.user.user import User, UserRole
@@ -60,21 +60,25 @@ class UserRepository(BaseRepository):
         return user
 
     @classmethod
-    async def get_users_by_city(cls, city_name: str, limit: int = 10, offset: int = 0) -> List[User]:
-        """Получение пользователей по городу с пагинацией."""
+    async def get_users_by_city(
+            cls, city_name: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Страница пользователей города и курсор следующей."""
         city = await CityRepository.get_city_by_name(city_name)
         if not city:
             raise ValueError(f"Город {city_name} не найден.")
 
-        return await cls.filter(limit=limit, offset=offset, city=city)
+        return await cls.paginate_keyset(cls.model.filter(city=city), cursor=cursor, limit=limit)
 
     @classmethod
-    async def get_users_by_role(cls, role: UserRole, limit: int = 10, offset: int = 0) -> List[User]:
-        """Получение пользователей по роли."""
+    async def get_users_by_role(
+            cls, role: UserRole, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Страница пользователей с ролью и курсор следующей."""
         if role not in UserRole.__members__.values():
             raise ValueError(f"Роль {role} недопустима. Возможные роли: {', '.join(UserRole.__members__.keys())}")
 
-        return await cls.filter(limit=limit, offset=offset, role=role)
+        return await cls.paginate_keyset(cls.model.filter(role=role), cursor=cursor, limit=limit)
 
     @classmethod
     async def is_username_used(cls, username: str) -> bool:
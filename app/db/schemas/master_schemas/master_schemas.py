@@ -116,6 +116,9 @@ class MasterListSchema(BaseModel):
     accepts_at_home: bool = Field(False, title="Прием у себя")
     accepts_in_salon: bool = Field(False, title="Прием в салоне")
     accepts_offsite: bool = Field(False, title="Выезд к клиенту")
+    avatar_urls: Optional[Dict[str, str]] = Field(
+        None, title="Квадратные версии аватара, заглушка и доминирующий цвет для карточки"
+    )
 
     class Config:
         from_attributes = True  # Поддержка работы с объектами Tortoise ORM
@@ -0,0 +1,11 @@
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+from db.models.abstract.abstract_photo import PhotoStatus
+
+
+class PhotoStatusSchema(BaseModel):
+    id: int = Field(..., title="ID фотографии", example=1)
+    status: PhotoStatus = Field(..., title="Статус обработки", example=PhotoStatus.ready)
+    urls: Dict[str, str] = Field(default_factory=dict, description="Ссылки на готовые версии изображения")
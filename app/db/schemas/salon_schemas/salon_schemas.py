@@ -139,4 +139,7 @@ class SalonListSchema(BaseModel):
     slug: str = Field(..., title="Slug (уникальный идентификатор салона)", example="opytnyj-master")
     name: str = Field(..., title="Название салона", example="Когти")
     address: Optional[str] = Field(None, title="Адрес", example="ул. Ленина, 13")
-    phone: Optional[str] = Field(None, title="Телефон", example="+7 900 123-45-67")
\ No newline at end of file
+    phone: Optional[str] = Field(None, title="Телефон", example="+7 900 123-45-67")
+    avatar_urls: Optional[Dict[str, str]] = Field(
+        None, title="Квадратные версии аватара, заглушка и доминирующий цвет для карточки"
+    )
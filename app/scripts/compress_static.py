@@ -0,0 +1,80 @@
+import argparse
+import gzip
+import os
+import sys
+from mimetypes import guess_type
+
+from config.components.logging_config import logger
+from config.constants import STATIC_DIR
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него создаются только .gz
+    brotli = None
+
+# Файлы меньше этого размера не сжимаются: выигрыш меньше накладных расходов
+MIN_SIZE = 256
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def is_compressible(path: str) -> bool:
+    media_type = guess_type(path)[0] or ""
+    if path.endswith(COMPRESSED_SUFFIXES) or media_type.startswith("image/"):
+        return False
+    return media_type.startswith("text/") or media_type in (
+        "application/javascript", "application/json", "image/svg+xml", "application/xml"
+    )
+
+
+def compress_file(path: str, force: bool = False) -> int:
+    """Создает рядом с файлом .gz и .br копии, если они устарели. Возвращает число записанных файлов."""
+    stat = os.stat(path)
+    if stat.st_size < MIN_SIZE:
+        return 0
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    written = 0
+    targets = [(".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        targets.append((".br", lambda: brotli.compress(data, quality=11)))
+
+    for suffix, compress in targets:
+        target = path + suffix
+        if not force and os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+            continue
+        compressed = compress()
+        if len(compressed) >= stat.st_size:
+            continue
+        with open(target, "wb") as f:
+            f.write(compressed)
+        written += 1
+    return written
+
+
+def compress_static(root: str, force: bool = False) -> int:
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            if is_compressible(path):
+                written += compress_file(path, force)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Предварительное сжатие статики (gzip и brotli)")
+    parser.add_argument("--root", default=str(STATIC_DIR), help="Каталог статики")
+    parser.add_argument("--force", action="store_true", help="Пересоздать все сжатые копии")
+    args = parser.parse_args()
+
+    if brotli is None:
+        logger.warning("Модуль brotli не установлен, создаются только .gz")
+    try:
+        count = compress_static(args.root, args.force)
+        print(f"Создано сжатых файлов: {count}")
+    except Exception as e:
+        logger.critical(f"Сжатие статики завершилось с ошибкой: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+import argparse
+import sys
+
+from tortoise import Tortoise, run_async
+
+from config import settings
+from config.components.logging_config import logger
+from use_case.photo_service.media_gc import MediaGarbageCollector
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Удаление файлов MEDIA_DIR, на которые не ссылается ни одно фото")
+    parser.add_argument("--mode", choices=["quarantine", "delete"], help="Перенести в .quarantine или удалить")
+    parser.add_argument("--min-age", type=int, help="Не трогать файлы моложе N секунд")
+    parser.add_argument("--batch-size", type=int, help="Сколько путей сверять с БД за один запрос")
+    parser.add_argument("--workers", type=int, help="Потоков обхода каталогов")
+    parser.add_argument("--dry-run", action="store_true", help="Только посчитать файлы-сироты")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    await Tortoise.init(config=settings.tortoise_config)
+    try:
+        collector = MediaGarbageCollector(
+            mode=args.mode,
+            min_age=args.min_age,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+        report = await collector.run()
+        print(
+            f"Просмотрено файлов: {report.scanned}\n"
+            f"Пропущено новых: {report.skipped_recent}\n"
+            f"Файлов-сирот: {report.orphans}\n"
+            f"{'Можно освободить' if report.dry_run else 'Освобождено'}: {report.reclaimed_bytes} байт"
+        )
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    try:
+        run_async(main(parse_args()))
+    except Exception as e:
+        logger.critical(f"Сборка медиа завершилась с ошибкой: {str(e)}")
+        sys.exit(1)
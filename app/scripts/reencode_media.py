@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from tortoise import Tortoise, run_async
+
+from config import settings
+from config.components.logging_config import logger
+from use_case.photo_service.media_reencode import MediaReencoder
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Пересоздание версий загруженных фото по текущим SIZE_CONFIGS, форматам и качеству"
+    )
+    parser.add_argument("--tables", nargs="+", help="Таблицы фото (по умолчанию все)")
+    parser.add_argument("--batch-size", type=int, help="Записей в пачке")
+    parser.add_argument("--cpu-share", type=float, help="Доля CPU машины, от 0 до 1")
+    parser.add_argument("--workers", type=int, help="Процессов обработки (по умолчанию по доле CPU)")
+    parser.add_argument("--checkpoint", help="Файл контрольной точки")
+    parser.add_argument("--reset", action="store_true", help="Начать сначала, игнорируя контрольную точку")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    await Tortoise.init(config=settings.tortoise_config)
+    try:
+        reencoder = MediaReencoder(
+            tables=args.tables,
+            batch_size=args.batch_size,
+            cpu_share=args.cpu_share,
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            reset=args.reset,
+        )
+        report = await reencoder.run()
+        print(
+            f"Просмотрено записей: {report.scanned}\n"
+            f"Пересоздано: {report.reencoded}\n"
+            f"Уже актуальных: {report.up_to_date}\n"
+            f"Без исходника: {report.missing_source}\n"
+            f"Ошибок: {report.failed}"
+        )
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    try:
+        run_async(main(parse_args()))
+    except Exception as e:
+        logger.critical(f"Пересоздание версий завершилось с ошибкой: {str(e)}")
+        sys.exit(1)
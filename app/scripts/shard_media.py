@@ -0,0 +1,42 @@
+import argparse
+import sys
+
+from tortoise import Tortoise, run_async
+
+from config import settings
+from config.components.logging_config import logger
+from use_case.photo_service.media_shard import MediaShardMigrator
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Перенос версий фото из каталогов <город>/<роль>/<slug> в шардированную раскладку"
+    )
+    parser.add_argument("--tables", nargs="+", help="Таблицы фото (по умолчанию все)")
+    parser.add_argument("--batch-size", type=int, help="Записей в пачке")
+    parser.add_argument("--dry-run", action="store_true", help="Только посчитать файлы для переноса")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    await Tortoise.init(config=settings.tortoise_config)
+    try:
+        migrator = MediaShardMigrator(tables=args.tables, batch_size=args.batch_size, dry_run=args.dry_run)
+        report = await migrator.run()
+        print(
+            f"Просмотрено записей: {report.scanned}\n"
+            f"{'Нужно перенести' if report.dry_run else 'Перенесено'} фото: {report.moved_photos}, "
+            f"файлов: {report.moved_files}\n"
+            f"Отсутствующих файлов: {report.missing_files}\n"
+            f"В обработке (запустите повторно после ее завершения): {report.processing}"
+        )
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    try:
+        run_async(main(parse_args()))
+    except Exception as e:
+        logger.critical(f"Перенос медиа в шардированную раскладку завершился с ошибкой: {str(e)}")
+        sys.exit(1)
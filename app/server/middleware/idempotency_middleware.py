@@ -0,0 +1,222 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from tempfile import SpooledTemporaryFile
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError, WatchError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.components.logging_config import logger
+from config.components.redis import redis_config
+from core.redis import get_redis_client
+
+# Заголовок запроса с ключом и заголовок ответа, отданного из сохраненного
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+# Ответы, которые не сохраняются: повтор такого запроса выполняется заново
+RETRYABLE_STATUSES = {408, 429}
+
+# Заголовки ответа, которые не повторяются при отдаче сохраненного ответа
+SKIPPED_HEADERS = {b"date", b"server", b"set-cookie"}
+
+# Тело запроса до этого размера держится в памяти, больше — во временном файле
+SPOOL_MEMORY_BYTES = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class IdempotencyMiddleware:
+    """
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает сохраненный ответ без повторной обработки.
+
+    Запись в Redis (ключ — хэш Authorization и Idempotency-Key) хранит отпечаток запроса:
+    метод, путь, query, Content-Type и SHA-256 тела. Первый запрос ставит запись-блокировку
+    (SET NX с idempotency_lock_ttl), по завершении на ее место записывается ответ с idempotency_ttl.
+    Параллельный дубликат ждет завершения первого (до idempotency_wait_timeout, затем 409),
+    запрос с тем же ключом и другим телом получает 422. Ответы 5xx, 408, 429 и ответы
+    больше idempotency_max_response_bytes не сохраняются — такой запрос можно повторить.
+
+    Тело запроса читается целиком до вызова приложения (нужно для отпечатка) во временный файл
+    и передается приложению из него. При недоступном Redis запросы обрабатываются как обычно.
+    """
+
+    def __init__(self, app: ASGIApp, redis=None):
+        self.app = app
+        self._redis = redis
+
+    @property
+    def redis(self):
+        # Клиент создается при первом запросе: при импорте приложения Redis может быть недоступен
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in redis_config.idempotency_methods:
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return await self.app(scope, receive, send)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await JSONResponse({"detail": "Некорректный заголовок Idempotency-Key"}, 400)(scope, receive, send)
+
+        with SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as body:
+            fingerprint = await self._read_body(scope, headers, receive, body)
+            if fingerprint is None:
+                return  # Клиент отключился, не дописав тело
+
+            redis_key = self._redis_key(headers, key)
+            lock_value = json.dumps({"fingerprint": fingerprint, "owner": uuid.uuid4().hex})
+            try:
+                record = await self._acquire(redis_key, fingerprint, lock_value)
+            except RedisError as e:
+                logger.error(f"Ключи идемпотентности недоступны, запрос обрабатывается без них: {e}")
+                return await self.app(scope, self._replay_body(body, receive), send)
+
+            if isinstance(record, Response):
+                return await record(scope, receive, send)
+            if record is not None:
+                return await self._replay_response(record)(scope, receive, send)
+            await self._run(scope, receive, send, body, redis_key, lock_value, fingerprint)
+
+    @staticmethod
+    def _redis_key(headers: Headers, key: str) -> str:
+        # Ключ действует в пределах пользователя: токен не хранится, только его хэш
+        scope = hashlib.sha256(f"{headers.get('authorization', '')}\0{key}".encode()).hexdigest()
+        return f"{redis_config.idempotency_key_prefix}:{scope}"
+
+    @staticmethod
+    async def _read_body(scope: Scope, headers: Headers, receive: Receive, body) -> Optional[str]:
+        digest = hashlib.sha256()
+        for part in (scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"),
+                     headers.get("content-type", "")):
+            digest.update(part.encode() + b"\0")
+
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            digest.update(chunk)
+            body.write(chunk)
+            if not message.get("more_body", False):
+                return digest.hexdigest()
+
+    async def _acquire(self, redis_key: str, fingerprint: str, lock_value: str):
+        """
+        Ставит блокировку ключа. Returns: None — запрос выполняет этот обработчик,
+        dict — сохраненный ответ, Response — ответ об ошибке (другое тело, ожидание истекло).
+        """
+        deadline = time.monotonic() + redis_config.idempotency_wait_timeout
+        delay = 0.05
+        while True:
+            if await self.redis.set(redis_key, lock_value, nx=True, ex=redis_config.idempotency_lock_ttl):
+                return None
+
+            raw = await self.redis.get(redis_key)
+            if raw is None:
+                continue  # Блокировку сняли между SET и GET
+            record = json.loads(raw)
+            if record["fingerprint"] != fingerprint:
+                return JSONResponse(
+                    {"detail": "Idempotency-Key уже использован с другим запросом"}, status_code=422
+                )
+            if "status" in record:
+                return record
+            if time.monotonic() >= deadline:
+                return JSONResponse({"detail": "Запрос с этим Idempotency-Key еще выполняется"}, status_code=409)
+
+            # Первый запрос еще выполняется — ждем его ответа
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _run(
+            self, scope: Scope, receive: Receive, send: Send, body, redis_key: str, lock_value: str, fingerprint: str,
+    ) -> None:
+        response: Dict[str, Any] = {"status": None, "headers": [], "body": bytearray(), "storable": True}
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", []) if name.lower() not in SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and response["storable"]:
+                response["body"] += message.get("body", b"")
+                if len(response["body"]) > redis_config.idempotency_max_response_bytes:
+                    response["storable"] = False
+                    response["body"] = bytearray()
+            elif message["type"] != "http.response.body":
+                # Файл, отправленный расширением сервера (pathsend и т.п.), не сохраняется
+                response["storable"] = False
+            await send(message)
+
+        try:
+            await self.app(scope, self._replay_body(body, receive), capture)
+        except BaseException:
+            await self._finish(redis_key, lock_value, None)
+            raise
+
+        status = response["status"]
+        if status is None or status >= 500 or status in RETRYABLE_STATUSES or not response["storable"]:
+            await self._finish(redis_key, lock_value, None)
+            return
+        record = {
+            "fingerprint": fingerprint,
+            "status": status,
+            "headers": response["headers"],
+            "body": base64.b64encode(bytes(response["body"])).decode(),
+        }
+        await self._finish(redis_key, lock_value, json.dumps(record))
+
+    async def _finish(self, redis_key: str, lock_value: str, record: Optional[str]) -> None:
+        """Заменяет свою блокировку ответом или снимает ее (чужую блокировку после истечения TTL не трогает)."""
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(redis_key)
+                if await pipe.get(redis_key) != lock_value:
+                    return
+                pipe.multi()
+                if record is None:
+                    pipe.delete(redis_key)
+                else:
+                    pipe.set(redis_key, record, ex=redis_config.idempotency_ttl)
+                await pipe.execute()
+        except WatchError:
+            pass
+        except RedisError as e:
+            logger.error(f"Не удалось сохранить ответ для ключа идемпотентности: {e}")
+
+    @staticmethod
+    def _replay_body(body, receive: Receive) -> Receive:
+        """receive, отдающий приложению прочитанное тело, затем — сообщения клиента (отключение)."""
+        size = body.tell()
+        body.seek(0)
+        state = {"sent": 0}
+
+        async def replay() -> Message:
+            if state["sent"] > size or (state["sent"] == size and size > 0):
+                return await receive()
+            chunk = body.read(CHUNK_SIZE)
+            state["sent"] += len(chunk) or 1
+            return {"type": "http.request", "body": chunk, "more_body": state["sent"] < size}
+
+        return replay
+
+    @staticmethod
+    def _replay_response(record: Dict[str, Any]) -> Response:
+        response = Response(content=base64.b64decode(record["body"]), status_code=record["status"])
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]
+        ] + [(REPLAYED_HEADER.encode(), b"true")]
+        return response
@@ -0,0 +1,54 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.components.db import db_config
+from config.components.logging_config import logger
+from db.query_stats import QueryStats, track_queries
+
+# Заголовки ответа с числом SQL-запросов и временем в БД (только при headers=True)
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time"
+
+
+class QueryStatsMiddleware:
+    """
+    Считает SQL-запросы и время в БД для каждого HTTP-запроса (см. db.query_stats).
+
+    Одинаковые по форме запросы, выполненные query_repeat_threshold раз и больше (запрос в цикле
+    по результатам другого — N+1), и запросы к API больше query_count_warning SQL-запросов
+    пишутся в лог с предупреждением. С headers=True (окружение разработки) число запросов
+    и время добавляются в заголовки ответа и в Server-Timing для инструментов браузера.
+    Запросы, выполненные после начала отправки ответа (потоковое тело), в заголовки не попадают.
+    """
+
+    def __init__(self, app: ASGIApp, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not db_config.query_stats_enabled:
+            return await self.app(scope, receive, send)
+
+        with track_queries() as stats:
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.headers:
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.count)
+                    headers[QUERY_TIME_HEADER] = f"{stats.duration * 1000:.1f}"
+                    headers.append("Server-Timing", f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} SQL"')
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                self._warn(scope, stats)
+
+    @staticmethod
+    def _warn(scope: Scope, stats: QueryStats) -> None:
+        endpoint = f"{scope['method']} {scope['path']}"
+        for shape, count in stats.repeated(db_config.query_repeat_threshold):
+            logger.warning(
+                f"⚠️ Возможный N+1 в {endpoint}: {count} одинаковых SQL-запросов: {stats.examples[shape]}"
+            )
+        if stats.count > db_config.query_count_warning:
+            logger.warning(f"⚠️ {endpoint} выполнил {stats.count} SQL-запросов:\n{stats.report()}")
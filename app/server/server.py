@@ -1,5 +1,6 @@
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from fastapi.exceptions import RequestValidationError
 from fastapi_babel import BabelMiddleware, BabelConfigs
@@ -8,12 +9,20 @@ from tortoise import Tortoise, generate_config
 from tortoise.contrib.fastapi import RegisterTortoise
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles # <-- Импортируйте StaticFiles
 from config import settings
-from config.constants import APP_DIR, MEDIA_DIR
+from config.constants import APP_DIR, MEDIA_DIR, NEXT_CURSOR_HEADER, STATIC_DIR
 from core.exceptions.base import ApplicationException
 from core.exceptions.handlers import application_exception_handler, internal_server_error_handler
+from server.middleware.idempotency_middleware import IdempotencyMiddleware
+from server.middleware.query_stats_middleware import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStatsMiddleware,
+)
 from server.utils.exception_handler import validation_exception_handler
+from server.utils.media_files import MediaStaticFiles, PrecompressedStaticFiles
+from config.components.media import media_config
+from use_case.photo_service.media_gc import run_periodic_gc
+from use_case.photo_service.photo_job_queue import PhotoJobWorker
+from use_case.utils.image import ImageOptimizer
 import os # <-- Импортируйте модуль os
 
 
@@ -23,12 +32,21 @@ def _init_router(_app: FastAPI) -> None:
 
 
 def _init_middleware(_app: FastAPI) -> None:
+    # Число SQL-запросов и время в БД на запрос; в разработке — и в заголовках ответа
+    query_stats_headers = settings.env == "development"
+    _app.add_middleware(QueryStatsMiddleware, headers=query_stats_headers)
+    # Повторы POST с заголовком Idempotency-Key (внутри CORS: предварительные запросы обрабатывает CORS)
+    _app.add_middleware(IdempotencyMiddleware)
     _app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_origins,
         allow_credentials=settings.cors_allow_credentials,
         allow_methods=settings.cors_allow_methods,
         allow_headers=settings.cors_allow_headers,
+        # Курсор следующей страницы списков должен быть доступен браузерному клиенту
+        expose_headers=[NEXT_CURSOR_HEADER] + (
+            [QUERY_COUNT_HEADER, QUERY_TIME_HEADER, "Server-Timing"] if query_stats_headers else []
+        ),
     )
 
 
@@ -47,7 +65,20 @@ def _init_static_files(_app: FastAPI) -> None:
     MEDIA_DIRECTORY = MEDIA_DIR  # <---- Используем константу MEDIA_DIR
     if not os.path.exists(MEDIA_DIRECTORY):
         os.makedirs(MEDIA_DIRECTORY, exist_ok=True)
-    _app.mount("/media", StaticFiles(directory=MEDIA_DIRECTORY), name="media")
+    # Роут ресайза регистрируется до монтирования /media, иначе его перехватит StaticFiles
+    from api.v1.photo.media_resize_router import media_resize_router
+    _app.include_router(media_resize_router, tags=["Фото - версии по запросу"])
+    _app.mount(
+        "/media", MediaStaticFiles(directory=MEDIA_DIRECTORY, delivery=media_config.media_delivery), name="media"
+    )
+    # Статика приложения: отдаются заранее сжатые .br/.gz копии (scripts/compress_static.py)
+    _app.mount(
+        "/static",
+        PrecompressedStaticFiles(
+            directory=STATIC_DIR, cache_control=f"public, max-age={media_config.static_max_age}"
+        ),
+        name="static",
+    )
 
 
 # Обработка глобальных ошибок
@@ -70,6 +101,22 @@ def _init_pagination(_app: FastAPI) -> None:
     add_pagination(_app)
 
 
+# Фоновые обработчики очереди генерации версий фото
+async def _start_photo_worker() -> Optional[PhotoJobWorker]:
+    if not media_config.image_background:
+        return None
+    photo_worker = PhotoJobWorker()
+    await photo_worker.start()
+    return photo_worker
+
+
+# Периодическая сборка файлов-сирот в MEDIA_DIR
+def _start_media_gc() -> Optional[asyncio.Task]:
+    if not media_config.media_gc_interval:
+        return None
+    return asyncio.create_task(run_periodic_gc(media_config.media_gc_interval))
+
+
 @asynccontextmanager
 async def lifespan_test(_app: FastAPI) -> AsyncGenerator[None, None]:
     config = generate_config(
@@ -109,9 +156,19 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
             ):
                 _init_router(_app)
                 _init_pagination(_app)
-                yield
+                photo_worker = await _start_photo_worker()
+                media_gc_task = _start_media_gc()
+                try:
+                    yield
+                finally:
+                    if photo_worker:
+                        await photo_worker.stop()
+                    if media_gc_task:
+                        media_gc_task.cancel()
     except Exception as e:
         raise
+    finally:
+        ImageOptimizer.shutdown_pool()
 
 
 def create_app() -> FastAPI:
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import stat
+from mimetypes import guess_type
+from typing import Dict, Optional
+from urllib.parse import parse_qs, quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from config.components.media import media_config
+from config.constants import INCOMING_DIR, QUARANTINE_DIR, RESIZE_CACHE_DIR
+from use_case.utils.image_formats import FORMAT_PROFILES, FORMATS_QUERY_PARAM, format_path, negotiate_format
+
+# Версии изображений не перезаписываются (имя из uuid или хэша содержимого)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Предварительно сжатые копии: (Content-Encoding, суффикс файла) в порядке предпочтения
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Режимы отдачи файлов: "app" — приложение, "x-accel" — nginx, "x-sendfile" — Apache/lighttpd
+MEDIA_DELIVERY_MODES = ("app", "x-accel", "x-sendfile")
+
+# Служебные каталоги MEDIA_DIR (загрузки пользователей, кэш, карантин), которые не отдаются через /media
+PRIVATE_MEDIA_DIRS = (INCOMING_DIR, RESIZE_CACHE_DIR, QUARANTINE_DIR)
+
+
+class CachedFileResponse(FileResponse):
+    """
+    FileResponse со строгим ETag и отправкой файла без копирования,
+    если ASGI-сервер поддерживает расширения http.response.zerocopysend или pathsend.
+
+    Отправка через расширения реализована в __call__ на публичных атрибутах ответа (path,
+    stat_result, raw_headers, background): HEAD, Range-запросы и файл без stat_result
+    обрабатывает FileResponse.
+    """
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        # Наносекундный mtime и inode: при любой замене файла тег меняется
+        etag_base = f"{stat_result.st_ino}-{stat_result.st_size}-{stat_result.st_mtime_ns}"
+        self.headers.setdefault("etag", f'"{hashlib.blake2b(etag_base.encode(), digest_size=16).hexdigest()}"')
+        super().set_stat_headers(stat_result)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if (
+                scope["method"].upper() != "GET"
+                or self.stat_result is None
+                or "range" in Headers(scope=scope)
+                or not {"http.response.zerocopysend", "http.response.pathsend"} & set(extensions)
+        ):
+            return await super().__call__(scope, receive, send)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file})
+        else:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+
+        if self.background is not None:
+            await self.background()
+
+
+def offload_response(
+        full_path: str, root: str, mode: str, media_type: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Пустой ответ, содержимое которого отправляет веб-сервер перед приложением.
+
+    "x-accel" — X-Accel-Redirect с путем от root под префиксом media_accel_prefix: в nginx нужна
+    internal location с этим префиксом и alias на root. "x-sendfile" — X-Sendfile с абсолютным путем.
+    Range, If-None-Match и отправку файла выполняет веб-сервер. nginx передает клиенту из этого ответа
+    Content-Type и Cache-Control, но не Vary — его нужно добавить в internal location.
+    """
+    headers = dict(headers or {})
+    if mode == "x-accel":
+        relative = os.path.relpath(full_path, root).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = quote(f"{media_config.media_accel_prefix.rstrip('/')}/{relative}")
+    elif mode == "x-sendfile":
+        headers["X-Sendfile"] = os.path.realpath(full_path)
+    else:
+        raise ValueError(f"Неизвестный режим отдачи файлов: {mode}")
+    return Response(media_type=media_type or guess_type(full_path)[0], headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles с заданным Cache-Control, строгим ETag и ответом 304 на If-None-Match.
+    В режимах delivery "x-accel" и "x-sendfile" приложение только находит файл,
+    а отправляет его веб-сервер (см. offload_response).
+    """
+
+    def __init__(self, *args, cache_control: str = IMMUTABLE_CACHE_CONTROL, delivery: str = "app", **kwargs):
+        super().__init__(*args, **kwargs)
+        if delivery not in MEDIA_DELIVERY_MODES:
+            raise ValueError(f"Неизвестный режим отдачи файлов: {delivery}")
+        self.cache_control = cache_control
+        self.delivery = delivery
+
+    def file_response(
+            self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200,
+            media_type: Optional[str] = None,
+    ) -> Response:
+        response = CachedFileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers={"Cache-Control": self.cache_control},
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        if self.delivery != "app":
+            return offload_response(
+                full_path, self.directory, self.delivery, response.media_type,
+                headers={"Cache-Control": self.cache_control},
+            )
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if request_headers.get("if-none-match", "").strip() == "*":
+            return True
+        return super().is_not_modified(response_headers, request_headers)
+
+
+class MediaStaticFiles(CachedStaticFiles):
+    """
+    Раздача /media с выбором формата версии по заголовку Accept.
+
+    Список форматов приходит в параметре f (его формирует media_url из поля formats фото),
+    поэтому выбор делается без проверки файлов на диске. Без параметра файл отдается как есть.
+    Служебные каталоги PRIVATE_MEDIA_DIRS не отдаются.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.split(os.sep, 1)[0] in PRIVATE_MEDIA_DIRS:
+            raise HTTPException(status_code=404)
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        candidates = [
+            fmt for fmt in query.get(FORMATS_QUERY_PARAM, [""])[0].split(",") if fmt in FORMAT_PROFILES
+        ]
+        if not candidates:
+            return await super().get_response(path, scope)
+
+        fmt = negotiate_format(Headers(scope=scope).get("accept"), candidates)
+        try:
+            response = await super().get_response(format_path(path, fmt), scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            # Версии в выбранном формате нет — отдаем запрошенный файл
+            response = await super().get_response(path, scope)
+
+        response.headers["Vary"] = "Accept"
+        return response
+
+
+class PrecompressedStaticFiles(CachedStaticFiles):
+    """
+    Раздача статики с предварительно сжатыми копиями (file.css.br, file.css.gz),
+    подготовленными scripts/compress_static.py. Сжатие на лету не выполняется.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        media_type = guess_type(path)[0]
+
+        if media_type and not media_type.startswith("image/"):
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                    continue
+                response = self.file_response(full_path, stat_result, scope, media_type=media_type)
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Vary"] = "Accept-Encoding"
+                return response
+
+        response = await super().get_response(path, scope)
+        if media_type and not media_type.startswith("image/"):
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+def _accepted_encodings(header: Optional[str]) -> set:
+    encodings = set()
+    for item in (header or "").split(","):
+        parts = [part.strip() for part in item.split(";")]
+        if parts[0] and not any(param in ("q=0", "q=0.0", "q=0.00", "q=0.000") for param in parts[1:]):
+            encodings.add(parts[0].lower())
+    return encodings
@@ -1,6 +1,7 @@
+from typing import Optional
+
 from fastapi import HTTPException
 
-from app.config.constants import MEDIA_URL
 from app.core.exceptions.repository import EntityNotFoundException
 from app.core.exceptions.service import ResourceNotFoundException, ServiceException
 from app.core.exceptions.validation import ValidationException
@@ -9,15 +10,20 @@ from db.repositories.photo_repositories.photo_repository import PhotoRepository
 from db.schemas.master_schemas.master_schemas import MasterDetailSchema
 from db.repositories.master_repositories.master_repositories import MasterRepository
 from config.components.logging_config import logger
+from use_case.photo_service.photo_base_servise import PhotoHandler
 
 
 class MasterListService:
     @staticmethod
-    async def get_masters_by_city(city_slug: str, limit: int = 10, offset: int = 0):
+    async def get_masters_by_city(city_slug: str, limit: int = 10, cursor: Optional[str] = None):
         """
-        Получение всех мастеров города по slug
+        Страница мастеров города по slug (с квадратным аватаром для карточки) и курсор следующей
         """
-        return await MasterRepository.get_masters_in_city(city_slug, limit, offset)
+        masters, next_cursor = await MasterRepository.get_masters_in_city(city_slug, limit, cursor)
+        for master in masters:
+            avatars = list(master.images)
+            master.avatar_urls = PhotoHandler.build_card_urls(avatars[0]) if avatars else None
+        return masters, next_cursor
     
 
 class MasterReadService:
@@ -54,17 +60,8 @@ class MasterReadService:
             if avatar_photos: # Если есть аватарки
                 avatar_photo = avatar_photos[0] # Берем первую аватарку (можно доработать, если нужно несколько)
 
-                if avatar_photo.small:
-                    avatar_urls['small'] = f"{MEDIA_URL}{avatar_photo.small}"
-
-                if avatar_photo.medium:
-                    avatar_urls['medium'] = f"{MEDIA_URL}{avatar_photo.medium}"
-
-                if avatar_photo.large:
-                    avatar_urls['large'] = f"{MEDIA_URL}{avatar_photo.large}"
-
-                if avatar_photo.original:
-                    avatar_urls['original'] = f"{MEDIA_URL}{avatar_photo.original}"
+                # URL версий (включая квадратные), заглушка и доминирующий цвет
+                avatar_urls = PhotoHandler.build_detail_urls(avatar_photo)
 
 
             master_data = {
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional, Set, Tuple
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import INCOMING_DIR, MEDIA_DIR, QUARANTINE_DIR, RESIZE_CACHE_DIR
+from core.redis import get_redis_client
+from db.models.photo_models.photo_registry import PHOTO_MODELS
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.utils.image_formats import FORMAT_PROFILES, PRIMARY_FORMAT, format_path
+
+# Каталоги, которые сборщик не просматривает: у кэша версий своя политика вытеснения, а в .incoming
+# лежат исходники фоновой очереди и части возобновляемых загрузок, на которые записи фото не ссылаются
+EXCLUDED_DIRS = {INCOMING_DIR, RESIZE_CACHE_DIR, QUARANTINE_DIR}
+
+# Расширения версий, которые могут быть записаны рядом с основным форматом
+VARIANT_EXTENSIONS = {f".{profile.extension}" for profile in FORMAT_PROFILES.values()}
+
+# Ключ блокировки в Redis, чтобы периодическую сборку выполнял один воркер
+GC_LOCK_KEY = "media_gc_lock"
+
+# (путь относительно MEDIA_DIR, размер, mtime)
+MediaFile = Tuple[str, int, float]
+
+
+@dataclass
+class GCReport:
+    scanned: int = 0
+    skipped_recent: int = 0
+    orphans: int = 0
+    reclaimed_bytes: int = 0
+    dry_run: bool = False
+
+
+def iter_media_files(root: str, workers: int, max_pending: int = 64) -> Iterator[List[MediaFile]]:
+    """
+    Параллельный обход каталога через os.scandir.
+
+    Потоки берут каталоги из общей очереди, файлы каждого каталога отдаются пачкой.
+    Очередь пачек ограничена max_pending, поэтому при медленной обработке обход
+    приостанавливается и память не растет с числом файлов.
+    """
+    dirs: "queue.Queue[Optional[str]]" = queue.Queue()
+    out: "queue.Queue[Optional[List[MediaFile]]]" = queue.Queue(maxsize=max_pending)
+    root = os.fspath(root)
+
+    def worker() -> None:
+        while True:
+            directory = dirs.get()
+            if directory is None:
+                return
+            try:
+                files = []
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if directory == root and entry.name in EXCLUDED_DIRS:
+                                continue
+                            dirs.put(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            files.append((os.path.relpath(entry.path, root), stat.st_size, stat.st_mtime))
+                if files:
+                    out.put(files)
+            except OSError as e:
+                logger.warning(f"Не удалось прочитать каталог {directory}: {e}")
+            finally:
+                dirs.task_done()
+
+    def coordinator(threads: List[threading.Thread]) -> None:
+        dirs.join()
+        for _ in threads:
+            dirs.put(None)
+        out.put(None)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    dirs.put(root)
+    for thread in threads:
+        thread.start()
+    threading.Thread(target=coordinator, args=(threads,), daemon=True).start()
+
+    while True:
+        files = out.get()
+        if files is None:
+            return
+        yield files
+
+
+def reference_key(path: str) -> str:
+    """Путь, под которым файл хранится в БД: версии в других форматах сводятся к основному."""
+    if os.path.splitext(path)[1] in VARIANT_EXTENSIONS:
+        return format_path(path, PRIMARY_FORMAT)
+    return path
+
+
+class MediaGarbageCollector:
+    """
+    Поиск и удаление файлов MEDIA_DIR, на которые не ссылается ни одна запись фото.
+
+    Пути сверяются пачками по batch_size с полями small/medium/large/original/file_path
+    всех моделей фото, в памяти одновременно находится не больше нескольких пачек.
+    Файлы моложе min_age не трогаются: версии записываются на диск раньше, чем создается запись.
+    """
+
+    def __init__(
+            self,
+            media_root=MEDIA_DIR,
+            mode: Optional[str] = None,
+            min_age: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            workers: Optional[int] = None,
+            dry_run: bool = False,
+    ):
+        self.media_root = os.fspath(media_root)
+        self.mode = mode or media_config.media_gc_mode
+        self.min_age = media_config.media_gc_min_age if min_age is None else min_age
+        self.batch_size = batch_size or media_config.media_gc_batch_size
+        self.workers = workers or media_config.media_gc_workers
+        self.dry_run = dry_run
+        self.quarantine_root = os.path.join(
+            self.media_root, QUARANTINE_DIR, datetime.now().strftime("%Y%m%d%H%M%S")
+        )
+
+        if self.mode not in ("quarantine", "delete"):
+            raise ValueError(f"Неизвестный режим сборки: {self.mode}")
+
+    async def run(self) -> GCReport:
+        report = GCReport(dry_run=self.dry_run)
+        threshold = time.time() - self.min_age
+        batch: List[MediaFile] = []
+
+        files_iter = iter_media_files(self.media_root, self.workers)
+        while True:
+            files = await asyncio.to_thread(next, files_iter, None)
+            if files is None:
+                break
+            for item in files:
+                report.scanned += 1
+                if item[2] > threshold:
+                    report.skipped_recent += 1
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    await self._process_batch(batch, report)
+                    batch = []
+
+        if batch:
+            await self._process_batch(batch, report)
+
+        action = "будет освобождено" if self.dry_run else "освобождено"
+        logger.info(
+            f"Сборка медиа завершена: просмотрено {report.scanned}, сирот {report.orphans}, "
+            f"{action} {report.reclaimed_bytes} байт (режим {self.mode})"
+        )
+        return report
+
+    async def _process_batch(self, batch: List[MediaFile], report: GCReport) -> None:
+        keys = {reference_key(path) for path, _, _ in batch}
+        referenced = await self._referenced_paths(list(keys))
+
+        orphans = [(path, size) for path, size, _ in batch if reference_key(path) not in referenced]
+        if not orphans:
+            return
+
+        report.orphans += len(orphans)
+        report.reclaimed_bytes += sum(size for _, size in orphans)
+        if not self.dry_run:
+            await asyncio.to_thread(self._dispose, [path for path, _ in orphans])
+
+    @staticmethod
+    async def _referenced_paths(paths: List[str]) -> Set[str]:
+        referenced: Set[str] = set()
+        for model in PHOTO_MODELS.values():
+            referenced |= await PhotoRepository.get_referenced_paths(model, paths)
+        return referenced
+
+    def _dispose(self, paths: List[str]) -> None:
+        for path in paths:
+            source = os.path.join(self.media_root, path)
+            try:
+                if self.mode == "delete":
+                    os.remove(source)
+                else:
+                    target = os.path.join(self.quarantine_root, path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(source, target)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.error(f"Не удалось убрать файл {path}: {e}")
+        logger.info(f"Убрано файлов-сирот: {len(paths)} (режим {self.mode})")
+
+
+async def run_periodic_gc(interval: int) -> None:
+    """
+    Периодическая сборка медиа. Блокировка в Redis не дает нескольким воркерам
+    приложения запускать сборку одновременно.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await get_redis_client().set(GC_LOCK_KEY, "1", nx=True, ex=interval):
+                continue
+            await MediaGarbageCollector().run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка периодической сборки медиа: {e}")
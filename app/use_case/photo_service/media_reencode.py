@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import MEDIA_DIR
+from db.models.photo_models.photo_registry import PHOTO_MODELS, get_square_fields
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_content_store import ContentStore
+from use_case.utils.image import ImageOptimizer, _render_variants, get_image_backend
+from use_case.utils.image_formats import collect_format_sizes
+from use_case.utils.image_profiles import ALL_SIZES, VARIANT_PROFILES, VariantProfile, largest_variant, profile_formats
+
+# Профиль версий для каждой таблицы (соответствует image_type при загрузке)
+TABLE_PROFILES = {
+    "avatar_photo_master": "avatar",
+    "avatar_photo_salon": "avatar",
+    "photo_news": "news_photo",
+    "standard_service_photo": "portfolio",
+    "custom_service_photo": "portfolio",
+}
+
+# Поля записи, которые перезаписываются после пересоздания версий (и квадратные версии у аватаров)
+UPDATED_FIELDS = ["file_path", *ALL_SIZES, "placeholder", "dominant_color", "quality", "formats"]
+
+# Суффикс имени с отпечатком настроек: small_<имя>.<отпечаток>.webp
+_FINGERPRINT_SUFFIX = re.compile(r"\.[0-9a-f]{8}$")
+
+
+@dataclass
+class ReencodeReport:
+    scanned: int = 0
+    reencoded: int = 0
+    up_to_date: int = 0
+    missing_source: int = 0
+    failed: int = 0
+
+
+def _nice_worker(niceness: int) -> None:
+    """Инициализатор процессов пула: пониженный приоритет, чтобы не мешать приложению."""
+    try:
+        os.nice(niceness)
+    except OSError:
+        pass
+
+
+def settings_fingerprint(profile: VariantProfile) -> str:
+    """
+    Отпечаток настроек кодирования профиля: размеры, форматы, качество и режим подбора качества.
+    Входит в имя новых версий, поэтому URL меняется вместе с содержимым (версии кэшируются навсегда).
+    """
+    settings = {
+        "sizes": {size: ImageOptimizer.SIZE_CONFIGS[size] for size in profile.sizes},
+        "formats": profile.formats,
+        "quality": profile.quality,
+        "extra_formats": list(media_config.image_extra_formats),
+        "adaptive": ImageOptimizer._adaptive_settings(),
+        "cascade": media_config.image_cascade,
+    }
+    # Ключ добавляется только для профилей с квадратами, чтобы не менять отпечаток остальных
+    if profile.squares:
+        settings["squares"] = list(profile.squares)
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=4).hexdigest()
+
+
+def variant_base_name(path: str) -> str:
+    """Имя версии без префикса размера, расширения и прежнего отпечатка."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    name = name.split("_", 1)[1] if name.split("_", 1)[0] in ALL_SIZES else name
+    return _FINGERPRINT_SUFFIX.sub("", name)
+
+
+class MediaReencoder:
+    """
+    Пересоздание версий уже загруженных фото после изменения SIZE_CONFIGS, форматов или качества.
+
+    Таблицы фото читаются пачками по id (keyset), версии создаются из original (или самой
+    большой сохраненной версии) в пуле процессов, записи пачки обновляются одним bulk_update.
+    Новые версии получают имя с отпечатком настроек, старые файлы остаются для сборщика медиа.
+    Фото, хранимые по хэшу содержимого, пересоздаются один раз на хэш под его блокировкой
+    в каталоге содержимого (имя — ContentStore.stored_name с отпечатком), и новые версии
+    записываются во все записи всех таблиц, ссылающиеся на те же версии.
+    После каждой пачки последний id сохраняется в контрольную точку, прерванный запуск продолжается с нее.
+    Нагрузка ограничивается долей CPU машины: процессы пула работают с пониженным приоритетом
+    и после каждой задачи простаивают пропорционально времени ее выполнения.
+    """
+
+    def __init__(
+            self,
+            tables: Optional[List[str]] = None,
+            batch_size: Optional[int] = None,
+            cpu_share: Optional[float] = None,
+            workers: Optional[int] = None,
+            checkpoint_path: Optional[str] = None,
+            reset: bool = False,
+    ):
+        self.tables = tables or list(PHOTO_MODELS)
+        self.batch_size = batch_size or media_config.media_reencode_batch_size
+        self.cpu_share = cpu_share or media_config.media_reencode_cpu_share
+        self.checkpoint_path = checkpoint_path or media_config.media_reencode_checkpoint
+
+        if not 0 < self.cpu_share <= 1:
+            raise ValueError("Доля CPU должна быть в диапазоне (0, 1]")
+        unknown = set(self.tables) - set(PHOTO_MODELS)
+        if unknown:
+            raise ValueError(f"Неизвестные таблицы фото: {', '.join(sorted(unknown))}")
+
+        # Процессов столько, сколько ядер приходится на долю CPU; доля на процесс добирается простоем
+        budget = (os.cpu_count() or 1) * self.cpu_share
+        self.workers = workers or max(1, math.floor(budget))
+        self.busy_fraction = min(1.0, budget / self.workers)
+
+        self.checkpoint = {} if reset else self._load_checkpoint()
+
+    async def run(self) -> ReencodeReport:
+        report = ReencodeReport()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_nice_worker,
+            initargs=(10,),
+        )
+        try:
+            for table in self.tables:
+                await self._reencode_table(table, pool, report)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        logger.info(
+            f"Пересоздание версий завершено: просмотрено {report.scanned}, пересоздано {report.reencoded}, "
+            f"актуальных {report.up_to_date}, без исходника {report.missing_source}, ошибок {report.failed}"
+        )
+        return report
+
+    async def _reencode_table(self, table: str, pool: ProcessPoolExecutor, report: ReencodeReport) -> None:
+        model = PHOTO_MODELS[table]
+        profile_name = TABLE_PROFILES.get(table, "default")
+        profile = VARIANT_PROFILES[profile_name]
+        fingerprint = settings_fingerprint(profile)
+
+        state = self.checkpoint.get(table, {})
+        # Настройки изменились с прошлого запуска — таблица проходится заново
+        last_id = state.get("last_id", 0) if state.get("fingerprint") == fingerprint else 0
+        logger.info(f"Пересоздание версий {table}: профиль {profile}, начиная с id > {last_id}")
+
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            photos = await PhotoRepository.get_photos_after(model, last_id, self.batch_size)
+            if not photos:
+                break
+
+            private = [photo for photo in photos if not photo.content_hash]
+            shared: Dict[str, List[Any]] = {}
+            for photo in photos:
+                if photo.content_hash:
+                    shared.setdefault(photo.content_hash, []).append(photo)
+
+            results = await asyncio.gather(
+                *(self._reencode_photo(photo, profile, fingerprint, pool, slots, report) for photo in private),
+                *(self._reencode_content(group, profile_name, profile, fingerprint, pool, slots, report)
+                  for group in shared.values()),
+            )
+            changed = [photo for photo, updated in zip(private, results) if updated]
+            await PhotoRepository.bulk_update_photos(model, changed, UPDATED_FIELDS + list(get_square_fields(model)))
+
+            last_id = photos[-1].id
+            report.scanned += len(photos)
+            self.checkpoint[table] = {"last_id": last_id, "fingerprint": fingerprint}
+            self._save_checkpoint()
+
+    async def _reencode_photo(
+            self, photo: Any, profile: VariantProfile, fingerprint: str,
+            pool: ProcessPoolExecutor, slots: asyncio.Semaphore, report: ReencodeReport,
+    ) -> bool:
+        """Пересоздает версии одного фото и меняет поля объекта. Возвращает True, если запись нужно сохранить."""
+        if self._up_to_date(photo, fingerprint):
+            report.up_to_date += 1
+            return False
+
+        source = self._source(photo)
+        if source is None:
+            report.missing_source += 1
+            return False
+
+        new_filename = f"{variant_base_name(source)}.{fingerprint}"
+        saved_paths = await self._render(photo, source, os.path.dirname(source), new_filename, profile, pool, slots)
+        if saved_paths is None:
+            report.failed += 1
+            return False
+
+        for field, value in self._variant_fields(saved_paths, type(photo)).items():
+            setattr(photo, field, value)
+        report.reencoded += 1
+        return True
+
+    async def _reencode_content(
+            self, photos: List[Any], profile_name: str, profile: VariantProfile, fingerprint: str,
+            pool: ProcessPoolExecutor, slots: asyncio.Semaphore, report: ReencodeReport,
+    ) -> None:
+        """
+        Пересоздает версии, общие для записей с одним content_hash, и обновляет все ссылающиеся
+        на них записи во всех таблицах фото. Имя версий строится по ContentStore.stored_name,
+        поэтому поиск готовых версий при загрузке того же содержимого находит новые версии.
+        """
+        photo = photos[0]
+        content_hash = photo.content_hash
+        async with ContentStore.lock(content_hash):
+            if self._up_to_date(photo, fingerprint):
+                report.up_to_date += len(photos)
+                return
+
+            source = self._source(photo)
+            if source is None:
+                report.missing_source += len(photos)
+                return
+
+            new_filename = f"{ContentStore.stored_name(content_hash, profile_name)}.{fingerprint}"
+            saved_paths = await self._render(
+                photo, source, ContentStore.content_dir(content_hash), new_filename, profile, pool, slots
+            )
+            if saved_paths is None:
+                report.failed += len(photos)
+                return
+
+            # Записи с тем же набором версий (тот же file_path) есть и в других таблицах того же профиля
+            updated = 0
+            for model in PHOTO_MODELS.values():
+                updated += await PhotoRepository.update_content_photos(
+                    model, content_hash, photo.file_path, **self._variant_fields(saved_paths, model)
+                )
+        logger.info(f"Пересозданы версии содержимого {content_hash}: обновлено записей {updated}")
+        report.reencoded += len(photos)
+
+    @staticmethod
+    def _up_to_date(photo: Any, fingerprint: str) -> bool:
+        return os.path.splitext(photo.file_path or "")[0].endswith(f".{fingerprint}")
+
+    @staticmethod
+    def _source(photo: Any) -> Optional[str]:
+        """Исходник для пересоздания: original или самая большая сохраненная версия (None — файла нет)."""
+        source = photo.original or largest_variant({size: getattr(photo, size) for size in ALL_SIZES})
+        if not source or not os.path.isfile(os.path.join(MEDIA_DIR, source)):
+            logger.warning(f"Нет исходника для пересоздания версий фото id={photo.id}: {source}")
+            return None
+        return source
+
+    async def _render(
+            self, photo: Any, source: str, save_dir: str, new_filename: str, profile: VariantProfile,
+            pool: ProcessPoolExecutor, slots: asyncio.Semaphore,
+    ) -> Optional[Dict[str, Any]]:
+        """Создает версии в пуле процессов. Returns: пути версий или None при ошибке."""
+        args = (
+            os.path.join(MEDIA_DIR, source), os.path.join(MEDIA_DIR, save_dir), new_filename, profile.quality,
+            media_config.image_cascade, profile_formats(profile), profile.sizes,
+            ImageOptimizer._adaptive_settings(), profile.squares, get_image_backend().name,
+        )
+
+        async with slots:
+            started = time.monotonic()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, _render_variants, *args)
+            except Exception as e:
+                logger.error(f"Ошибка пересоздания версий фото id={photo.id}: {e}")
+                return None
+            finally:
+                # Простой после задачи: процесс занят не больше busy_fraction времени
+                elapsed = time.monotonic() - started
+                await asyncio.sleep(elapsed * (1 / self.busy_fraction - 1))
+
+    @staticmethod
+    def _variant_fields(saved_paths: Dict[str, Any], model: Type[Any]) -> Dict[str, Any]:
+        """Новые значения полей записи фото модели model по созданным версиям."""
+        fields = {}
+        for size in ALL_SIZES:
+            # Если профиль не создает original, прежний original остается исходником для следующих запусков
+            if size == "original" and size not in saved_paths:
+                continue
+            fields[size] = saved_paths.get(size)
+        for field in get_square_fields(model):
+            fields[field] = saved_paths.get(field)
+        fields["file_path"] = largest_variant(saved_paths)
+        fields["placeholder"] = saved_paths.get("placeholder")
+        fields["dominant_color"] = saved_paths.get("dominant_color")
+        fields["quality"] = saved_paths.get("quality")
+        fields["formats"] = collect_format_sizes(fields["file_path"])
+        return fields
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoint(self) -> None:
+        # Запись через временный файл: прерывание не оставляет поврежденную контрольную точку
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
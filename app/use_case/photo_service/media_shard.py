@@ -0,0 +1,130 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import MEDIA_DIR
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.models.photo_models.photo_registry import PHOTO_MODELS, get_square_fields
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.utils.image_formats import FORMAT_PROFILES, format_path
+from use_case.utils.image_profiles import ALL_SIZES
+from use_case.utils.media_layout import ensure_dir, sharded_path
+
+# Поля записи фото с путями файлов (и квадратные версии у аватаров)
+PATH_FIELDS = ["file_path", *ALL_SIZES]
+
+
+@dataclass
+class ShardReport:
+    scanned: int = 0
+    moved_photos: int = 0
+    moved_files: int = 0
+    missing_files: int = 0
+    processing: int = 0  # Записи, которые еще обрабатывались очередью во время переноса
+    dry_run: bool = False
+
+
+class MediaShardMigrator:
+    """
+    Перенос версий фото из раскладки "flat" в "sharded" (см. entity_media_dir).
+
+    Таблицы читаются пачками по id (keyset). Файлы всех форматов каждой версии переносятся
+    через os.replace (в пределах одного диска это переименование, содержимое не копируется),
+    затем пути записей пачки обновляются одним bulk_update. Повторный запуск безопасен:
+    записи с новыми путями пропускаются, а уже перенесенный файл (прерванный запуск
+    или общий файл нескольких записей) только переписывается в БД.
+
+    Просматриваются записи в любом статусе. У записей в статусе processing версий еще нет:
+    их создаст очередь в каталоге текущей MEDIA_LAYOUT, поэтому перенос запускается после
+    переключения на "sharded", а если такие записи были, запуск повторяется после их обработки
+    (их число выводится в отчете).
+    """
+
+    def __init__(self, tables: Optional[List[str]] = None, batch_size: Optional[int] = None, dry_run: bool = False):
+        self.tables = tables or list(PHOTO_MODELS)
+        self.batch_size = batch_size or media_config.media_shard_batch_size
+        self.dry_run = dry_run
+
+        unknown = set(self.tables) - set(PHOTO_MODELS)
+        if unknown:
+            raise ValueError(f"Неизвестные таблицы фото: {', '.join(sorted(unknown))}")
+
+    async def run(self) -> ShardReport:
+        report = ShardReport(dry_run=self.dry_run)
+        for table in self.tables:
+            await self._migrate_table(table, report)
+
+        logger.info(
+            f"Перенос в шардированную раскладку завершен: просмотрено {report.scanned}, "
+            f"перенесено фото {report.moved_photos}, файлов {report.moved_files}, "
+            f"отсутствующих файлов {report.missing_files}"
+        )
+        if report.processing:
+            logger.warning(
+                f"Во время переноса обрабатывалось фото: {report.processing}. "
+                f"Запустите перенос повторно после завершения их обработки"
+            )
+        return report
+
+    async def _migrate_table(self, table: str, report: ShardReport) -> None:
+        model = PHOTO_MODELS[table]
+        fields = PATH_FIELDS + list(get_square_fields(model))
+        logger.info(f"Перенос файлов {table} в шардированную раскладку")
+
+        last_id = 0
+        while True:
+            photos = await PhotoRepository.get_photos_after(model, last_id, self.batch_size, status=None)
+            if not photos:
+                break
+            report.processing += sum(photo.status == PhotoStatus.processing for photo in photos)
+
+            # Перенос файлов — блокирующие вызовы, пачка выполняется в потоке
+            changed = await asyncio.to_thread(self._migrate_batch, photos, fields, report)
+            if not self.dry_run:
+                await PhotoRepository.bulk_update_photos(model, changed, fields)
+
+            last_id = photos[-1].id
+            report.scanned += len(photos)
+
+    def _migrate_batch(self, photos: List[Any], fields: List[str], report: ShardReport) -> List[Any]:
+        changed = []
+        for photo in photos:
+            updated = False
+            for field in fields:
+                path = getattr(photo, field, None)
+                target = sharded_path(path) if path else None
+                if target is None:
+                    continue
+                if self._move_variant(path, target, report):
+                    setattr(photo, field, target)
+                    updated = True
+            if updated:
+                changed.append(photo)
+                report.moved_photos += 1
+        return changed
+
+    def _move_variant(self, path: str, target: str, report: ShardReport) -> bool:
+        """
+        Переносит версию во всех форматах. Возвращает True, если версия есть по новому пути
+        (после переноса или уже была перенесена) и запись можно обновить.
+        """
+        found = False
+        for fmt in FORMAT_PROFILES:
+            source, dest = format_path(path, fmt), format_path(target, fmt)
+            source_full, dest_full = os.path.join(MEDIA_DIR, source), os.path.join(MEDIA_DIR, dest)
+            if os.path.isfile(source_full):
+                if not self.dry_run:
+                    ensure_dir(os.path.dirname(dest_full))
+                    os.replace(source_full, dest_full)
+                report.moved_files += 1
+                found = True
+            elif os.path.isfile(dest_full):
+                found = True
+
+        if not found:
+            logger.warning(f"Файл версии не найден ни по старому, ни по новому пути: {path}")
+            report.missing_files += 1
+        return found
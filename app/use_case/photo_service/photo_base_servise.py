@@ -1,12 +1,25 @@
-from typing import Union, List, Type, Any
+import asyncio
+import contextlib
+import os
+import shutil
+from types import SimpleNamespace
+from typing import Union, List, Type, Any, Dict, Optional, Tuple
 from fastapi import HTTPException, UploadFile
-from io import BytesIO
-from PIL import Image as PILImage
 import uuid
 
 from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import INCOMING_DIR, MEDIA_DIR
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.models.photo_models.photo_registry import get_owner_field
 from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_content_store import ContentStore
+from use_case.photo_service.photo_job_queue import PhotoJobQueue, PhotoJobWorker
+from use_case.photo_service.photo_similarity import NearDuplicate, near_duplicate_index
 from use_case.utils.image import ImageOptimizer
+from use_case.utils.image_formats import FORMAT_PROFILES, PRIMARY_FORMAT, collect_format_sizes, format_path, media_url
+from use_case.utils.image_ingest import IngestedImage, ingest_upload
+from use_case.utils.image_profiles import SQUARE_FIELDS, get_variant_profile, largest_size, largest_variant
 from use_case.utils.unique_name import generate_unique_filename
 
 
@@ -22,6 +35,7 @@ class PhotoHandler:
             is_main: bool = False,  # Является ли главным изображением
             sort_order: int = 0,  # Порядок сортировки
             city: str = "default_city", # Город для определения директории сохранения
+            background: Optional[bool] = None,  # Генерировать версии в фоне (по умолчанию из настроек)
     ) -> List[int]:
         """
         Универсальный метод для добавления фотографий к различным сущностям.
@@ -36,9 +50,17 @@ class PhotoHandler:
             is_main: Является ли изображение главным.
             sort_order: Порядок сортировки изображений.
             city: Город для определения директории сохранения.
+            background: Если True, запись создается сразу со статусом processing,
+                а версии генерирует обработчик очереди PhotoJobQueue.
+
+        Изображения одного запроса обрабатываются параллельно (не больше UPLOAD_CONCURRENCY
+        одновременно), все записи создаются одним bulk_create в транзакции.
+        Набор версий, форматы и качество задаются профилем image_type (см. VARIANT_PROFILES).
+        Похожие фото (по pHash) отмечаются в near_duplicate_of, в режиме IMAGE_NEAR_DUP_MODE=reuse
+        вместо обработки берутся версии похожего фото того же владельца.
 
         Returns:
-            List[int]: Список ID созданных записей фотографий.
+            List[int]: Список ID созданных записей фотографий (в порядке images).
 
         Raises:
             HTTPException: В случае ошибок валидации или сохранения.
@@ -47,75 +69,323 @@ class PhotoHandler:
             if not isinstance(images, list):  # Если это одно изображение
                 images = [images]
 
-            photo_ids = []  # Список для хранения ID созданных записей
+            if background is None:
+                background = media_config.image_background
 
             for image in images:
                 if not image.content_type.startswith("image"):
                     raise HTTPException(status_code=400, detail="Загруженный файл не является изображением")
 
-                # Прочитаем изображение
-                image_bytes = await image.read()
-                image_stream = BytesIO(image_bytes)
+            # Владелец для поиска похожих фото — сущность, к которой привязывается фото
+            owner_id = None
+            if media_config.image_near_dup_mode != "off" and entity_field_name:
+                owner_id = entity_id if entity_field_name == get_owner_field(model) else None
+
+            # Ограничение параллельной обработки изображений одного запроса
+            semaphore = asyncio.Semaphore(media_config.upload_concurrency)
+
+            # Отметки хэшей держатся до создания записей: удаление не тронет выбранные версии
+            with contextlib.ExitStack() as pins:
+                async def process(image: UploadFile) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+                    async with semaphore:
+                        return await PhotoHandler._prepare_photo(
+                            image, model=model, entity_id=entity_id, owner_id=owner_id, role=role,
+                            image_type=image_type, is_main=is_main, sort_order=sort_order, city=city,
+                            background=background, pins=pins,
+                        )
+
+                # Ошибка одного изображения не прерывает остальные: они дорабатывают,
+                # и их файлы удаляются, так как записи фото не будут созданы
+                results = await asyncio.gather(*(process(image) for image in images), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    await PhotoHandler._discard_prepared(
+                        [result for result in results if not isinstance(result, BaseException)]
+                    )
+                    raise errors[0]
+
+                rows = []
+                for params, _ in results:
+                    # Добавляем ID сущности, если он предоставлен и имя поля указано
+                    if entity_field_name and entity_id:
+                        params[entity_field_name] = entity_id
+                    rows.append(params)
+
+                try:
+                    photo_ids = await PhotoRepository.bulk_create_photos(model, rows)
+                except Exception:
+                    await PhotoHandler._discard_prepared(results)
+                    raise
+
+            for photo_id, (params, job) in zip(photo_ids, results):
+                if job:
+                    await PhotoHandler._enqueue_job({"model": model._meta.db_table, "photo_id": photo_id, **job})
+                if params.get("phash"):
+                    try:
+                        await near_duplicate_index.add(model, photo_id, params["phash"], params["dhash"], owner_id)
+                    except Exception as e:
+                        logger.warning(f"Не удалось добавить фото id={photo_id} в индекс похожих: {e}")
 
-                # Получим размеры изображения
-                with PILImage.open(image_stream) as pil_image:
-                    width, height = pil_image.size
+                logger.info(f"Создана запись фото для {model.__name__}: "
+                            f"file_name={params['file_name']}, entity_id={entity_id}, "
+                            f"small={params['small']}, medium={params['medium']}, large={params['large']}")
 
-                # Сбрасываем поток, чтобы можно было повторно его использовать
-                image_stream.seek(0)
+            return photo_ids
 
-                # Асинхронно генерируем уникальное имя файла
-                new_filename = await generate_unique_filename(image.filename)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении фото: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Ошибка при добавлении фото: {str(e)}")
 
-                # Определяем slug для сохранения
-                entity_slug = f"{role}_{entity_id}" if entity_id else str(uuid.uuid4())
+    @staticmethod
+    async def _discard_prepared(prepared: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> None:
+        """
+        Удаляет файлы, записанные при подготовке фото, для которых не будет создана запись:
+        исходник фоновой задачи или версии. Версии в хранилище по хэшу содержимого могут
+        использоваться другими фото, их оставшиеся без ссылок файлы собирает media_gc.
+        """
+        paths = []
+        for params, job in prepared:
+            if job:
+                paths.append(params["file_path"])
+            elif not params["content_hash"]:
+                paths.extend(PhotoHandler._photo_file_paths(SimpleNamespace(**params)))
+        if paths:
+            removed = await asyncio.to_thread(PhotoHandler._unlink_files, paths)
+            logger.info(f"Удалены файлы неудавшейся загрузки фото: {removed}")
 
-                # Асинхронно обрабатываем изображение (оптимизируем и сохраняем)
-                saved_paths = await ImageOptimizer.optimize_and_save_async(
-                    image_stream,
-                    city=city,
-                    role=role,
-                    slug=entity_slug,
-                    image_type=image_type,
-                    new_filename=new_filename
-                )
+    @staticmethod
+    async def _enqueue_job(job: Dict[str, Any]) -> None:
+        """
+        Ставит задачу в очередь. Если очередь недоступна, задача обрабатывается сразу,
+        чтобы запись фото не осталась в статусе processing.
+        """
+        try:
+            await PhotoJobQueue().enqueue(job)
+        except Exception as e:
+            logger.error(f"Очередь обработки фото недоступна, фото {job['model']} id={job['photo_id']} "
+                         f"обрабатывается сразу: {e}")
+            await PhotoJobWorker.process_job(job)
 
-                image_stream.close()
-
-                # Создаем запись в БД
-                params = {
-                    "file_name": new_filename,
-                    "file_path": saved_paths.get("original", ""),
-                    "mime_type": image.content_type,
-                    "size": len(image_bytes),
-                    "width": width,
-                    "height": height,
-                    "is_main": is_main,
-                    "sort_order": sort_order,
-                    "small": saved_paths.get("small", None),
-                    "medium": saved_paths.get("medium", None),
-                    "large": saved_paths.get("large", None),
-                    "original": saved_paths.get("original", None)
-                }
-
-                # Добавляем ID сущности, если он предоставлен и имя поля указано
-                if entity_field_name and entity_id:
-                    params[entity_field_name] = entity_id
-
-                photo = await PhotoRepository.create_photo(model=model, **params)
+    @staticmethod
+    async def _prepare_photo(
+            image: UploadFile, model: Type[Any], entity_id: Optional[int], owner_id: Optional[int], role: str,
+            image_type: str, is_main: bool, sort_order: int, city: str, background: bool,
+            pins: contextlib.ExitStack,
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Принимает одно изображение и сохраняет его версии.
 
-                logger.info(f"Создана запись фото для {model.__name__}: "
-                            f"file_name={new_filename}, entity_id={entity_id}, "
-                            f"small={saved_paths.get('small')}, medium={saved_paths.get('medium')}, "
-                            f"large={saved_paths.get('large')}")
+        Хэш содержимого отмечается в pins под его блокировкой (см. ContentStore.pin):
+        отметку снимает вызывающий после создания записи.
 
-                photo_ids.append(photo.id)
+        Returns:
+            Параметры записи фото и задача для очереди (None, если версии уже готовы).
+        """
+        # Потоково сохраняем загрузку во временный файл и проверяем заголовок
+        ingested = await ingest_upload(image)
 
-            return photo_ids
+        # Временный файл удаляется при любом исходе (после переноса в очередь cleanup ничего не делает)
+        try:
+            # Асинхронно генерируем уникальное имя файла
+            new_filename = await generate_unique_filename(image.filename)
+
+            # Определяем slug для сохранения
+            entity_slug = f"{role}_{entity_id}" if entity_id else str(uuid.uuid4())
+
+            # Похожее фото, загруженное ранее (другое кадрирование или сжатие)
+            near = await PhotoHandler._find_near_duplicate(model, ingested, owner_id)
+            reused = await PhotoHandler._reuse_near_duplicate(model, near) if near else None
+
+            # При дедупликации версии лежат в каталоге по хэшу и называются по нему и профилю
+            dedup = media_config.media_dedup
+            profile_name, profile = get_variant_profile(image_type, role)
+            content_hash = reused[0] if reused else (ingested.sha256 if dedup else None)
+            save_dir = ContentStore.content_dir(content_hash) if dedup else None
+            stored_name = ContentStore.stored_name(content_hash, profile_name) if dedup else new_filename
+            job = None
+
+            async with ContentStore.lock(content_hash) if content_hash else contextlib.nullcontext():
+                cached_paths = reused[1] if reused else None
+                if dedup and not reused:
+                    extension = FORMAT_PROFILES[PRIMARY_FORMAT].extension
+                    expected_path = os.path.join(save_dir, f"{largest_size(profile)}_{stored_name}.{extension}")
+                    cached_paths = await ContentStore.find_variants(content_hash, expected_path)
+
+                if cached_paths:
+                    # Такое содержимое уже обработано — оптимизатор не запускается
+                    saved_paths = cached_paths
+                    source = largest_variant(saved_paths)
+                elif background:
+                    # Исходник переносится в MEDIA_DIR, чтобы его мог забрать обработчик на любом узле
+                    source = PhotoHandler._stash_source(ingested, new_filename)
+                    saved_paths = {}
+                    job = {
+                        "source": source,
+                        "city": city,
+                        "role": role,
+                        "slug": entity_slug,
+                        "image_type": image_type,
+                        "new_filename": stored_name,
+                        "save_dir": save_dir,
+                    }
+                else:
+                    # Асинхронно обрабатываем изображение (оптимизируем и сохраняем)
+                    saved_paths = await ImageOptimizer.optimize_and_save_async(
+                        ingested.path,
+                        city=city,
+                        role=role,
+                        slug=entity_slug,
+                        image_type=image_type,
+                        new_filename=stored_name,
+                        save_dir=save_dir,
+                        profile=profile,
+                    )
+                    source = largest_variant(saved_paths) or ""
+
+                if content_hash:
+                    pins.enter_context(ContentStore.pin(content_hash))
+        finally:
+            ingested.cleanup()
+
+        params = {
+            "file_name": new_filename,
+            "file_path": source,
+            "mime_type": ingested.mime_type,
+            "size": ingested.size,
+            "width": ingested.width,
+            "height": ingested.height,
+            "is_main": is_main,
+            "sort_order": sort_order,
+            "small": saved_paths.get("small", None),
+            "medium": saved_paths.get("medium", None),
+            "large": saved_paths.get("large", None),
+            "original": saved_paths.get("original", None),
+            "placeholder": saved_paths.get("placeholder", None),
+            "dominant_color": saved_paths.get("dominant_color", None),
+            "quality": saved_paths.get("quality", None),
+            "status": PhotoStatus.processing if job else PhotoStatus.ready,
+            "content_hash": content_hash,
+            "formats": collect_format_sizes(largest_variant(saved_paths)),
+            "phash": ingested.phash,
+            "dhash": ingested.dhash,
+            "near_duplicate_of": near.photo_id if near else None,
+            # Квадратные версии создаются только по профилю аватаров (у их моделей есть эти поля)
+            **{field: path for field, path in saved_paths.items() if field in SQUARE_FIELDS},
+        }
+        return params, job
 
+    @staticmethod
+    async def _find_near_duplicate(
+            model: Type[Any], ingested: IngestedImage, owner_id: Optional[int],
+    ) -> Optional[NearDuplicate]:
+        """Ищет похожее фото по pHash. Ошибка индекса не мешает загрузке."""
+        if media_config.image_near_dup_mode == "off" or not ingested.phash:
+            return None
+        try:
+            near = await near_duplicate_index.find(model, ingested.phash, ingested.dhash, owner_id)
         except Exception as e:
-            logger.error(f"Ошибка при добавлении фото: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Ошибка при добавлении фото: {str(e)}")
+            logger.warning(f"Не удалось выполнить поиск похожих фото: {e}")
+            return None
+        if near:
+            logger.info(f"Загружено фото, похожее на {model.__name__} id={near.photo_id} "
+                        f"(расстояние {near.distance}, {'тот же' if near.same_owner else 'другой'} владелец)")
+        return near
+
+    @staticmethod
+    async def _reuse_near_duplicate(
+            model: Type[Any], near: NearDuplicate,
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Версии похожего фото того же владельца для повторного использования (режим reuse).
+
+        Используются только фото, хранимые по хэшу содержимого: новая запись получает тот же
+        content_hash, и файлы удаляются лишь вместе с последней ссылающейся записью.
+
+        Returns:
+            content_hash и версии похожего фото или None.
+        """
+        if media_config.image_near_dup_mode != "reuse" or not near.same_owner:
+            return None
+        photo = await PhotoRepository.get_photo_by_id(model, near.photo_id)
+        if photo is None or not photo.content_hash or photo.status != PhotoStatus.ready:
+            return None
+        async with ContentStore.lock(photo.content_hash):
+            variants = ContentStore.photo_variants(photo)
+        return (photo.content_hash, variants) if variants else None
+
+    @staticmethod
+    def _stash_source(ingested: IngestedImage, new_filename: str) -> str:
+        """
+        Переносит временный файл загрузки в MEDIA_DIR/.incoming для фоновой обработки.
+
+        Returns:
+            str: Путь к исходнику относительно MEDIA_DIR.
+        """
+        incoming_dir = os.path.join(MEDIA_DIR, INCOMING_DIR)
+        os.makedirs(incoming_dir, exist_ok=True)
+        target = os.path.join(incoming_dir, new_filename)
+        shutil.move(ingested.path, target)
+        ingested.release()
+        return os.path.relpath(target, MEDIA_DIR)
+
+    @staticmethod
+    async def get_photo_status(model: Type[Any], photo_id: int) -> Union[Dict[str, Any], None]:
+        """
+        Возвращает статус обработки фото и ссылки на готовые версии.
+
+        Returns:
+            Словарь со статусом и URL версий или None, если фото не найдено.
+        """
+        photo = await PhotoRepository.get_photo_by_id(model, photo_id)
+        if not photo:
+            return None
+
+        urls = {}
+        if photo.status == PhotoStatus.ready:
+            urls = PhotoHandler.build_urls(photo)
+
+        return {"id": photo.id, "status": photo.status, "urls": urls}
+
+    @staticmethod
+    def build_urls(photo: Any) -> Dict[str, str]:
+        """
+        URL версий фото. Для версий в нескольких форматах формат выбирается
+        при запросе к /media по заголовку Accept (см. media_url).
+        """
+        urls = {}
+        for size in ("small", "medium", "large", "original") + SQUARE_FIELDS:
+            path = getattr(photo, size, None)
+            if path:
+                urls[size] = media_url(path, photo.formats)
+        return urls
+
+    @staticmethod
+    def build_detail_urls(photo: Any) -> Dict[str, str]:
+        """URL всех версий фото, заглушка и доминирующий цвет — для страницы сущности."""
+        return {**PhotoHandler.build_urls(photo), **PhotoHandler._preview_fields(photo)}
+
+    @staticmethod
+    def build_card_urls(photo: Any) -> Dict[str, str]:
+        """
+        Ссылки для карточки в списке: квадратные версии, заглушка и доминирующий цвет.
+        Вместо версии medium (768px) список загружает квадрат в несколько КБ.
+        """
+        urls = {field: media_url(getattr(photo, field), photo.formats)
+                for field in SQUARE_FIELDS if getattr(photo, field, None)}
+        urls.update(PhotoHandler._preview_fields(photo))
+        return urls
+
+    @staticmethod
+    def _preview_fields(photo: Any) -> Dict[str, str]:
+        """Заглушка и цвет для первой отрисовки без дополнительных запросов."""
+        fields = {}
+        if photo.placeholder:
+            fields["placeholder"] = photo.placeholder
+        if photo.dominant_color:
+            fields["dominant_color"] = photo.dominant_color
+        return fields
 
     # Вспомогательные методы для удобства использования
     @staticmethod
@@ -189,6 +459,8 @@ class PhotoHandler:
         """
         Удаляет фото из базы данных и физические файлы.
 
+        Файлы, хранимые по хэшу содержимого, удаляются только вместе с последней ссылающейся записью.
+
         Args:
             photo_id: ID фото в базе данных.
             model: Модель SQLAlchemy, к которой относится фото.
@@ -197,27 +469,85 @@ class PhotoHandler:
             HTTPException: Если фото не найдено или возникла ошибка удаления.
         """
         try:
-            # Получаем фото из базы данных
-            photo = await PhotoRepository.get_photo_by_id(model,
-                                                          photo_id)  # <---- Исправленный порядок: model, photo_id
-            if not photo:
+            if not await PhotoHandler.delete_photos(model, [photo_id]):
                 raise HTTPException(status_code=404, detail="Фото не найдено")
-
-            # Удаляем файлы с сервера
-            for size in ["original", "small", "medium", "large"]:
-                file_path = getattr(photo, size, None)
-                if file_path:
-                    await ImageOptimizer.delete_file(file_path)
-
-            # Удаляем запись из базы данных
-            await PhotoRepository.delete_photo(model, photo_id)  # <---- Исправленный порядок: model, photo_id
-
             logger.info(f"Фото (ID: {photo_id}) удалено.")
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при удалении фото (ID: {photo_id}): {str(e)}")
             raise HTTPException(status_code=500, detail="Ошибка при удалении фото")
 
+    @staticmethod
+    async def delete_photos(model: Type[Any], photo_ids: Optional[List[int]] = None, **filters) -> int:
+        """
+        Удаляет несколько фото: записи — одной транзакцией, файлы — одним пакетом в потоке.
+
+        Файлы, хранимые по хэшу содержимого, удаляются, только если на хэш больше не ссылается
+        ни одна запись и ни одна загрузка, еще не создавшая запись (ContentStore.pin). Блокировки
+        хэшей удерживаются до удаления файлов, поэтому параллельная загрузка того же содержимого
+        не получит удаляемые версии. Блокировки и отметки действуют в пределах процесса.
+
+        Args:
+            model: Модель фото.
+            photo_ids: ID фото (None — все фото, подходящие под filters).
+            **filters: Условия, например master_id=5 — фото других сущностей не удаляются.
+
+        Returns:
+            Количество удаленных записей.
+        """
+        content_hashes = await PhotoRepository.get_content_hashes(model, photo_ids, **filters)
+        async with contextlib.AsyncExitStack() as stack:
+            # Порядок блокировок одинаков для всех удалений — без взаимных ожиданий
+            for content_hash in sorted(content_hashes):
+                await stack.enter_async_context(ContentStore.lock(content_hash))
+
+            photos = await PhotoRepository.delete_photos(model, photo_ids, **filters)
+            if not photos:
+                return 0
+            hashes = {photo.content_hash for photo in photos if photo.content_hash}
+            shared = await ContentStore.referenced_hashes(hashes) | ContentStore.pinned_hashes(hashes)
+            paths = {
+                path for photo in photos if not photo.content_hash or photo.content_hash not in shared
+                for path in PhotoHandler._photo_file_paths(photo)
+            }
+            removed = await asyncio.to_thread(PhotoHandler._unlink_files, paths)
+
+        hashed = [photo for photo in photos if getattr(photo, "phash", None)]
+        if hashed:
+            owner_field = get_owner_field(model)
+            for photo in hashed:
+                near_duplicate_index.remove(
+                    model, photo.id, photo.phash, photo.dhash, getattr(photo, owner_field) if owner_field else None
+                )
+
+        logger.info(f"Удалено фото {model.__name__}: {len(photos)}, файлов: {removed}")
+        return len(photos)
+
+    @staticmethod
+    def _photo_file_paths(photo: Any) -> List[str]:
+        """Пути всех файлов версий фото во всех сохраненных форматах."""
+        formats = list(photo.formats or [PRIMARY_FORMAT])
+        paths = []
+        for size in ["original", "small", "medium", "large", *SQUARE_FIELDS]:
+            file_path = getattr(photo, size, None)
+            if file_path:
+                paths.extend(format_path(file_path, fmt) for fmt in formats)
+        return paths
+
+    @staticmethod
+    def _unlink_files(paths) -> int:
+        """Удаляет файлы (пути относительно MEDIA_DIR), отсутствующие пропускаются. Возвращает число удаленных."""
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(os.path.join(MEDIA_DIR, path))
+                removed += 1
+            except FileNotFoundError:
+                logger.warning(f"Файл не найден: {path}")
+        return removed
+
     @staticmethod
     async def get_photo_by_id(model: Type[Any], **filters) -> Union[Any, None]:
         return await PhotoRepository.get_photo(model, **filters)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+import contextlib
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+from weakref import WeakValueDictionary
+
+from config.components.logging_config import logger
+from config.constants import CONTENT_DIR, MEDIA_DIR
+from db.models.photo_models.photo_registry import PHOTO_MODELS
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.utils.image_profiles import SQUARE_FIELDS
+
+# Версии изображения, хранимые в записи фото (квадратные — только у аватаров)
+VARIANT_FIELDS = ("small", "medium", "large", "original") + SQUARE_FIELDS
+
+# Поля, которые вычисляются по содержимому и переносятся в новую запись вместе с версиями
+DERIVED_FIELDS = ("placeholder", "dominant_color", "quality")
+
+# Блокировки по хэшу: поиск, обработка и удаление одного содержимого не пересекаются (в пределах процесса)
+_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+# Хэши, версии которых выбраны для записей фото, еще не созданных в БД, — число таких записей
+_pinned: Counter = Counter()
+
+
+class ContentStore:
+    """
+    Хранилище версий изображений по хэшу содержимого.
+
+    Версии одного файла лежат в MEDIA_DIR/content/ab/cd/<sha256>/ и используются всеми
+    записями фото с этим content_hash. Отдельного счетчика нет: число ссылок — это
+    количество записей во всех таблицах фото, поэтому он не расходится с БД.
+
+    Блокировки и отметки незавершенных загрузок хранятся в памяти процесса и защищают
+    от гонок только загрузки и удаления внутри одного процесса приложения. Между воркерами
+    uvicorn и узлами они не действуют: там параллельное удаление последней записи может
+    удалить версии, выбранные загрузкой в другом процессе.
+    """
+
+    @staticmethod
+    def content_dir(content_hash: str) -> str:
+        """Каталог версий относительно MEDIA_DIR."""
+        return os.path.join(CONTENT_DIR, content_hash[:2], content_hash[2:4], content_hash)
+
+    @staticmethod
+    def stored_name(content_hash: str, profile_name: str) -> str:
+        """
+        Имя версий в каталоге содержимого. Профиль входит в имя: версии одного файла
+        для разных профилей отличаются набором размеров и качеством.
+        """
+        return f"{content_hash}-{profile_name}"
+
+    @staticmethod
+    def lock(content_hash: str) -> asyncio.Lock:
+        """Блокировка хэша в текущем процессе."""
+        lock = _locks.get(content_hash)
+        if lock is None:
+            lock = asyncio.Lock()
+            _locks[content_hash] = lock
+        return lock
+
+    @staticmethod
+    @contextlib.contextmanager
+    def pin(content_hash: str) -> Iterator[None]:
+        """
+        Отмечает, что версии хэша выбраны для записи, которая еще не создана.
+
+        Отметка ставится под блокировкой хэша и снимается после создания записи (или ошибки),
+        блокировка же отпускается раньше: удерживать ее до bulk_create нельзя, так как загрузка
+        нескольких изображений берет блокировки в произвольном порядке.
+        """
+        _pinned[content_hash] += 1
+        try:
+            yield
+        finally:
+            _pinned[content_hash] -= 1
+            if not _pinned[content_hash]:
+                del _pinned[content_hash]
+
+    @staticmethod
+    def pinned_hashes(content_hashes: Iterable[str]) -> Set[str]:
+        """Хэши из content_hashes, на которые ссылаются еще не созданные записи."""
+        return {content_hash for content_hash in content_hashes if content_hash in _pinned}
+
+    @staticmethod
+    async def find_variants(content_hash: str, file_path: str) -> Optional[Dict[str, str]]:
+        """
+        Ищет готовые версии этого содержимого в любой таблице фото.
+
+        Args:
+            content_hash: SHA-256 исходного файла.
+            file_path: Ожидаемый путь самой большой версии профиля — по нему (без расширения
+                и отпечатка настроек MediaReencoder) отбираются записи с тем же набором версий.
+
+        Returns:
+            Пути версий относительно MEDIA_DIR (и placeholder/dominant_color/quality)
+            или None, если содержимое еще не сохранялось.
+        """
+        for model in PHOTO_MODELS.values():
+            photo = await PhotoRepository.get_ready_photo_by_hash(model, content_hash, file_path)
+            if photo is None:
+                continue
+
+            variants = ContentStore.photo_variants(photo)
+            if variants:
+                logger.info(f"Найдены готовые версии для содержимого {content_hash}")
+            return variants
+        return None
+
+    @staticmethod
+    def photo_variants(photo: Any) -> Optional[Dict[str, Any]]:
+        """
+        Версии готового фото для переноса в новую запись.
+
+        Returns:
+            Пути версий и вычисленные поля или None, если файлов фото уже нет на диске.
+        """
+        if not photo.file_path or not os.path.exists(os.path.join(MEDIA_DIR, photo.file_path)):
+            logger.warning(f"Версии содержимого {photo.content_hash} отсутствуют на диске, будут созданы заново")
+            return None
+        return {
+            field: getattr(photo, field) for field in VARIANT_FIELDS + DERIVED_FIELDS if getattr(photo, field, None)
+        }
+
+    @staticmethod
+    async def referenced_hashes(content_hashes: Iterable[str]) -> Set[str]:
+        """Хэши, на которые ссылается хотя бы одна запись фото (один запрос на таблицу)."""
+        pending = set(content_hashes)
+        referenced: Set[str] = set()
+        for model in PHOTO_MODELS.values():
+            if not pending:
+                break
+            found = await PhotoRepository.get_referenced_hashes(model, list(pending))
+            referenced |= found
+            pending -= found
+        return referenced
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import MEDIA_DIR
+from core.redis import get_redis_client
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.models.photo_models.photo_registry import get_photo_model
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.utils.image import ImageOptimizer
+from use_case.utils.image_formats import collect_format_sizes
+from use_case.utils.image_profiles import SQUARE_FIELDS, largest_variant
+
+
+class PhotoJobQueue:
+    """
+    Очередь задач генерации версий изображений в Redis.
+
+    Задача забирается атомарно (BLMOVE) в список обрабатываемых этого обработчика и удаляется
+    из него после завершения (ack). Задачи обработчика, остановленного посреди работы
+    (падение процесса, перезапуск), возвращаются в очередь при запуске другого (recover):
+    живые обработчики продлевают свою отметку в Redis, а списки без отметки считаются брошенными.
+
+    Клиент Redis передается снаружи, поэтому в тестах можно использовать fakeredis.
+    """
+
+    def __init__(self, redis=None, consumer: Optional[str] = None):
+        self.redis = redis if redis is not None else get_redis_client()
+        self.key = media_config.photo_queue_key
+        self.consumer = consumer or uuid.uuid4().hex
+        self.processing_key = f"{self.key}:processing:{self.consumer}"
+        self.heartbeat_key = f"{self.key}:worker:{self.consumer}"
+
+    async def enqueue(self, job: Dict[str, Any]) -> None:
+        """Добавляет задачу в очередь."""
+        await self.redis.lpush(self.key, json.dumps(job))
+        logger.info(f"Задача обработки фото поставлена в очередь: {job['model']} id={job['photo_id']}")
+
+    async def dequeue(self, timeout: int = 1) -> Optional[Dict[str, Any]]:
+        """Забирает задачу из очереди в список обрабатываемых, ожидая не дольше timeout секунд."""
+        raw = await self.redis.blmove(self.key, self.processing_key, timeout, "RIGHT", "LEFT")
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def ack(self, job: Dict[str, Any]) -> None:
+        """
+        Удаляет завершенную задачу из списка обрабатываемых.
+
+        Задача записана в очередь через json.dumps, а повторная сериализация разобранного
+        словаря дает ту же строку, поэтому исходное значение не хранится.
+        """
+        await self.redis.lrem(self.processing_key, 1, json.dumps(job))
+
+    async def heartbeat(self) -> None:
+        """Продлевает отметку обработчика: пока она есть, его задачи не возвращаются в очередь."""
+        await self.redis.set(self.heartbeat_key, "1", ex=media_config.photo_worker_heartbeat_ttl)
+
+    async def release(self) -> None:
+        """Снимает отметку при остановке: прерванные задачи сразу доступны для recover."""
+        await self.redis.delete(self.heartbeat_key)
+
+    async def recover(self) -> int:
+        """Возвращает в очередь задачи обработчиков без отметки. Returns: число возвращенных задач."""
+        prefix = f"{self.key}:processing:"
+        recovered = 0
+        async for processing_key in self.redis.scan_iter(match=f"{prefix}*"):
+            consumer = processing_key[len(prefix):]
+            if consumer == self.consumer or await self.redis.exists(f"{self.key}:worker:{consumer}"):
+                continue
+            # Брошенные задачи ставятся в голову очереди: они ждали дольше остальных
+            while await self.redis.lmove(processing_key, self.key, "RIGHT", "RIGHT") is not None:
+                recovered += 1
+        if recovered:
+            logger.warning(f"Возвращено в очередь незавершенных задач обработки фото: {recovered}")
+        return recovered
+
+
+class PhotoJobWorker:
+    """Пул фоновых обработчиков, заполняющих версии фото по профилю его image_type."""
+
+    def __init__(self, queue: Optional[PhotoJobQueue] = None, concurrency: Optional[int] = None):
+        self.queue = queue or PhotoJobQueue()
+        self.concurrency = concurrency or media_config.photo_worker_concurrency
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        try:
+            await self.queue.heartbeat()
+            await self.queue.recover()
+        except Exception as e:
+            logger.error(f"Не удалось вернуть в очередь незавершенные задачи обработки фото: {e}")
+
+        self._tasks.append(asyncio.create_task(self._keep_alive()))
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run()))
+        logger.info(f"Запущены фоновые обработчики фото: {self.concurrency}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        try:
+            await self.queue.release()
+        except Exception as e:
+            logger.error(f"Не удалось снять отметку обработчика фото: {e}")
+        logger.info("Фоновые обработчики фото остановлены")
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(media_config.photo_worker_heartbeat_ttl / 3)
+            try:
+                await self.queue.heartbeat()
+            except Exception as e:
+                logger.error(f"Не удалось продлить отметку обработчика фото: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await self.queue.dequeue()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка чтения очереди обработки фото: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not job:
+                continue
+            try:
+                await self.handle_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Задача остается в списке обрабатываемых и вернется в очередь при следующем запуске
+                logger.error(f"Не удалось завершить задачу обработки фото {job.get('model')} "
+                             f"id={job.get('photo_id')}: {e}")
+
+    async def handle_job(self, job: Dict[str, Any]) -> None:
+        """Обрабатывает задачу; при исключении ставит ее повторно (до photo_job_max_attempts попыток)."""
+        try:
+            await self.process_job(job)
+        except Exception as e:
+            attempts = job.get("attempts", 0) + 1
+            if attempts < media_config.photo_job_max_attempts:
+                logger.error(f"Ошибка задачи обработки фото {job['model']} id={job['photo_id']}, "
+                             f"попытка {attempts}: {e}")
+                await self.queue.enqueue({**job, "attempts": attempts})
+            else:
+                logger.error(f"Задача обработки фото {job['model']} id={job['photo_id']} отброшена "
+                             f"после {attempts} попыток: {e}")
+        await self.queue.ack(job)
+
+    @staticmethod
+    async def process_job(job: Dict[str, Any]) -> None:
+        """
+        Генерирует версии изображения и обновляет запись фото.
+
+        При ошибке генерации фото получает статус failed. Исходный файл удаляется после записи
+        статуса: если обновить запись не удалось, исключение уходит в обработчик, и повтор задачи
+        снова найдет исходник.
+        """
+        model = get_photo_model(job["model"])
+        if model is None:
+            logger.error(f"Неизвестная модель фото в задаче: {job['model']}")
+            return
+
+        source = os.path.join(MEDIA_DIR, job["source"])
+        try:
+            saved_paths = await ImageOptimizer.optimize_and_save_async(
+                source,
+                city=job["city"],
+                role=job["role"],
+                slug=job["slug"],
+                image_type=job["image_type"],
+                new_filename=job["new_filename"],
+                save_dir=job.get("save_dir"),
+            )
+            fields = dict(
+                status=PhotoStatus.ready,
+                file_path=largest_variant(saved_paths) or "",
+                small=saved_paths.get("small"),
+                medium=saved_paths.get("medium"),
+                large=saved_paths.get("large"),
+                original=saved_paths.get("original"),
+                placeholder=saved_paths.get("placeholder"),
+                dominant_color=saved_paths.get("dominant_color"),
+                quality=saved_paths.get("quality"),
+                formats=collect_format_sizes(largest_variant(saved_paths)),
+                **{field: path for field, path in saved_paths.items() if field in SQUARE_FIELDS},
+            )
+        except Exception as e:
+            logger.error(f"Ошибка фоновой обработки фото {model.__name__} id={job['photo_id']}: {e}")
+            fields = {"status": PhotoStatus.failed}
+
+        await PhotoRepository.update_photo_fields(model, job["photo_id"], **fields)
+        if fields["status"] == PhotoStatus.ready:
+            logger.info(f"Фото {model.__name__} id={job['photo_id']} обработано в фоне")
+        if os.path.exists(source):
+            os.remove(source)
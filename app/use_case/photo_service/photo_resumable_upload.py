@@ -0,0 +1,263 @@
+import base64
+import binascii
+import contextlib
+import fcntl
+import json
+import os
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import INCOMING_DIR, MEDIA_DIR
+from use_case.utils.image_ingest import sniff_mime_type
+
+# Версия протокола tus, которую поддерживает сервер
+TUS_VERSION = "1.0.0"
+# Расширения протокола: создание, удаление и срок хранения незавершенных загрузок
+TUS_EXTENSIONS = "creation,termination,expiration"
+
+# Идентификатор загрузки — uuid4 в hex, другие значения не превращаются в путь
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Как часто (секунды) при создании загрузки удаляются просроченные
+PURGE_INTERVAL = 60
+
+
+@dataclass
+class UploadSession:
+    """Метаданные возобновляемой загрузки; принятые байты лежат рядом в <id>.part."""
+    id: str
+    user_id: Any
+    length: int
+    filename: str
+    created_at: float
+    offset: int = 0
+
+    @property
+    def expires_at(self) -> float:
+        return self.created_at + media_config.upload_resumable_ttl
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+
+def parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+    """
+    Разбирает заголовок Upload-Metadata: пары «ключ base64(значение)» через запятую.
+
+    Raises:
+        HTTPException: 400 — значение не в base64.
+    """
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1], validate=True).decode() if len(parts) > 1 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Некорректный заголовок Upload-Metadata")
+    return metadata
+
+
+class ResumableUploadService:
+    """
+    Возобновляемая загрузка файлов по протоколу tus: создание, дозапись частями по смещению, завершение.
+
+    Принятые байты пишутся на диск в каталог UPLOAD_RESUMABLE_DIR (по умолчанию MEDIA_DIR/.incoming/resumable),
+    поэтому при обрыве соединения клиент узнает смещение (HEAD) и продолжает с него, а не загружает файл заново.
+    Завершенная загрузка передается в PhotoHandler как UploadFile по upload_id в запросе создания
+    мастера или услуги. Незавершенные и неиспользованные загрузки удаляются через UPLOAD_RESUMABLE_TTL.
+    """
+
+    _last_purge = 0.0
+
+    @staticmethod
+    def upload_dir() -> str:
+        return media_config.upload_resumable_dir or os.path.join(MEDIA_DIR, INCOMING_DIR, "resumable")
+
+    @staticmethod
+    def _paths(upload_id: str) -> tuple:
+        base = os.path.join(ResumableUploadService.upload_dir(), upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    @staticmethod
+    async def create(user_id: Any, length: int, metadata: Optional[Dict[str, str]] = None) -> UploadSession:
+        """
+        Создает пустую загрузку заданной длины.
+
+        Raises:
+            HTTPException: 400 — пустой файл, 413 — длина больше UPLOAD_MAX_BYTES.
+        """
+        if length <= 0:
+            raise HTTPException(status_code=400, detail="Загруженный файл пуст")
+        if length > media_config.upload_max_bytes:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+
+        await ResumableUploadService.purge_expired()
+
+        metadata = metadata or {}
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            length=length,
+            filename=os.path.basename(metadata.get("filename", "")) or "upload",
+            created_at=time.time(),
+        )
+        meta_path, part_path = ResumableUploadService._paths(session.id)
+        os.makedirs(ResumableUploadService.upload_dir(), exist_ok=True)
+        open(part_path, "wb").close()
+        async with aiofiles.open(meta_path, "w", encoding="utf-8") as file:
+            await file.write(json.dumps({k: v for k, v in asdict(session).items() if k != "offset"}))
+
+        logger.info(f"Создана возобновляемая загрузка {session.id}: {length} байт, пользователь {user_id}")
+        return session
+
+    @staticmethod
+    async def get(upload_id: str, user_id: Any) -> UploadSession:
+        """
+        Загрузка пользователя с текущим смещением (размер принятых на диск байт).
+
+        Raises:
+            HTTPException: 404 — загрузки нет, она чужая или просрочена.
+        """
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise HTTPException(status_code=404, detail="Загрузка не найдена")
+        meta_path, part_path = ResumableUploadService._paths(upload_id)
+        try:
+            async with aiofiles.open(meta_path, encoding="utf-8") as file:
+                session = UploadSession(**json.loads(await file.read()))
+            session.offset = os.path.getsize(part_path)
+        except (FileNotFoundError, ValueError, TypeError):
+            raise HTTPException(status_code=404, detail="Загрузка не найдена")
+
+        if str(session.user_id) != str(user_id) or session.expires_at < time.time():
+            raise HTTPException(status_code=404, detail="Загрузка не найдена")
+        return session
+
+    @staticmethod
+    async def append(upload_id: str, user_id: Any, offset: int, chunks: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Дописывает часть файла, начиная с offset.
+
+        Смещение должно совпадать с уже принятым размером. При обрыве соединения записанные
+        байты сохраняются, и клиент продолжает с нового смещения. Одновременная дозапись
+        одной загрузки (в том числе из разных процессов) запрещается блокировкой файла.
+
+        Raises:
+            HTTPException: 404 — загрузка не найдена, 409 — смещение не совпадает или загрузка занята,
+                413 — данных больше заявленной длины.
+        """
+        session = await ResumableUploadService.get(upload_id, user_id)
+        _, part_path = ResumableUploadService._paths(upload_id)
+
+        async with aiofiles.open(part_path, "ab") as part:
+            try:
+                fcntl.flock(part.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise HTTPException(status_code=409, detail="Загрузка уже дописывается другим запросом")
+
+            # Смещение перечитывается под блокировкой: параллельный запрос мог успеть дописать часть
+            session.offset = os.path.getsize(part_path)
+            if offset != session.offset:
+                raise HTTPException(status_code=409, detail=f"Ожидалось смещение {session.offset}")
+
+            try:
+                async for chunk in chunks:
+                    if session.offset + len(chunk) > session.length:
+                        raise HTTPException(status_code=413, detail="Данных больше заявленной длины файла")
+                    await part.write(chunk)
+                    session.offset += len(chunk)
+            finally:
+                await part.flush()
+
+        return session
+
+    @staticmethod
+    async def delete(upload_id: str, user_id: Any) -> None:
+        await ResumableUploadService.get(upload_id, user_id)
+        ResumableUploadService._remove(upload_id)
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def finalize(upload_ids: Optional[List[str]], user_id: Any) -> AsyncIterator[List[UploadFile]]:
+        """
+        Завершенные загрузки как UploadFile для PhotoHandler.
+
+        Файлы удаляются, если блок выполнен без ошибки. При ошибке обработки загрузки остаются
+        до истечения срока, и запрос можно повторить, не загружая файлы заново.
+
+        Raises:
+            HTTPException: 404 — загрузка не найдена, 409 — загрузка не завершена,
+                400 — файл не является изображением.
+        """
+        sessions = [await ResumableUploadService.get(upload_id, user_id) for upload_id in upload_ids or []]
+        async with contextlib.AsyncExitStack() as stack:
+            files = []
+            for session in sessions:
+                if not session.complete:
+                    raise HTTPException(
+                        status_code=409, detail=f"Загрузка {session.id} не завершена: {session.offset} из {session.length} байт"
+                    )
+                _, part_path = ResumableUploadService._paths(session.id)
+                handle = stack.enter_context(open(part_path, "rb"))
+                mime_type = sniff_mime_type(handle.read(16))
+                if mime_type is None:
+                    raise HTTPException(status_code=400, detail="Загруженный файл не является изображением")
+                handle.seek(0)
+                files.append(UploadFile(
+                    file=handle, size=session.length, filename=session.filename,
+                    headers=Headers({"content-type": mime_type}),
+                ))
+
+            yield files
+
+        for session in sessions:
+            ResumableUploadService._remove(session.id)
+            logger.info(f"Возобновляемая загрузка {session.id} передана в обработку")
+
+    @staticmethod
+    async def purge_expired(force: bool = False) -> int:
+        """Удаляет просроченные загрузки (не чаще раза в PURGE_INTERVAL без force). Возвращает их число."""
+        now = time.time()
+        if not force and now - ResumableUploadService._last_purge < PURGE_INTERVAL:
+            return 0
+        ResumableUploadService._last_purge = now
+
+        threshold = now - media_config.upload_resumable_ttl
+        removed = 0
+        try:
+            entries = list(os.scandir(ResumableUploadService.upload_dir()))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            upload_id, extension = os.path.splitext(entry.name)
+            if extension != ".json":
+                continue
+            try:
+                if entry.stat().st_mtime < threshold:
+                    ResumableUploadService._remove(upload_id)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            logger.info(f"Удалено просроченных возобновляемых загрузок: {removed}")
+        return removed
+
+    @staticmethod
+    def _remove(upload_id: str) -> None:
+        for path in ResumableUploadService._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Type
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from db.models.photo_models.photo_registry import get_owner_field
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.utils.image_hash import MultiIndexHash, hamming, hash_to_int
+
+# Значение в индексе: (id фото, dHash для подтверждения совпадения)
+IndexValue = Tuple[int, Optional[int]]
+
+
+@dataclass
+class NearDuplicate:
+    photo_id: int
+    distance: int
+    same_owner: bool
+
+
+@dataclass
+class _TableIndex:
+    global_index: MultiIndexHash = field(default_factory=MultiIndexHash)
+    owners: Dict[Any, MultiIndexHash] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+
+class NearDuplicateIndex:
+    """
+    Индекс pHash загруженных фото для поиска похожих (повторная загрузка с другим кадрированием или сжатием).
+
+    Для каждой таблицы строится мульти-индекс хэшей по всем фото и по фото каждого владельца.
+    Индекс хранится в памяти процесса, загружается из БД при первом обращении и
+    перечитывается раз в IMAGE_NEAR_DUP_INDEX_TTL, чтобы учесть загрузки других процессов
+    (до перечитывания они не видны). Каждый воркер держит хэши всех фото таблицы, около 2 КБ
+    на фото, поэтому поиск включается явно (IMAGE_NEAR_DUP_MODE, по умолчанию off).
+    Кандидат по pHash подтверждается dHash (расстояние не больше удвоенного порога).
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, _TableIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def find(
+            self, model: Type[Any], phash: str, dhash: Optional[str], owner_id: Any = None,
+            radius: Optional[int] = None,
+    ) -> Optional[NearDuplicate]:
+        """
+        Ищет ближайшее похожее фото: сначала среди фото владельца, затем во всей таблице.
+
+        Returns:
+            Найденное фото или None.
+        """
+        radius = media_config.image_near_dup_distance if radius is None else radius
+        index = await self._table(model)
+        key, confirm = hash_to_int(phash), hash_to_int(dhash) if dhash else None
+
+        scopes = []
+        if owner_id is not None and owner_id in index.owners:
+            scopes.append((index.owners[owner_id], True))
+        scopes.append((index.global_index, False))
+
+        for hashes, same_owner in scopes:
+            for distance, (photo_id, photo_dhash) in hashes.search(key, radius):
+                if confirm is None or photo_dhash is None or hamming(confirm, photo_dhash) <= radius * 2:
+                    return NearDuplicate(photo_id=photo_id, distance=distance, same_owner=same_owner)
+        return None
+
+    async def add(self, model: Type[Any], photo_id: int, phash: str, dhash: Optional[str], owner_id: Any = None) -> None:
+        index = await self._table(model)
+        value: IndexValue = (photo_id, hash_to_int(dhash) if dhash else None)
+        index.global_index.add(hash_to_int(phash), value)
+        if owner_id is not None:
+            index.owners.setdefault(owner_id, MultiIndexHash()).add(hash_to_int(phash), value)
+
+    def remove(self, model: Type[Any], photo_id: int, phash: str, dhash: Optional[str], owner_id: Any = None) -> None:
+        index = self._tables.get(model._meta.db_table)
+        if index is None:
+            return
+        value: IndexValue = (photo_id, hash_to_int(dhash) if dhash else None)
+        index.global_index.remove(hash_to_int(phash), value)
+        if owner_id in index.owners:
+            index.owners[owner_id].remove(hash_to_int(phash), value)
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+    async def _table(self, model: Type[Any]) -> _TableIndex:
+        table = model._meta.db_table
+        index = self._tables.get(table)
+        if index is not None and time.monotonic() - index.loaded_at < media_config.image_near_dup_index_ttl:
+            return index
+
+        lock = self._locks.setdefault(table, asyncio.Lock())
+        async with lock:
+            index = self._tables.get(table)
+            if index is None or time.monotonic() - index.loaded_at >= media_config.image_near_dup_index_ttl:
+                index = await self._load(model)
+                self._tables[table] = index
+        return index
+
+    @staticmethod
+    async def _load(model: Type[Any]) -> _TableIndex:
+        started = time.monotonic()
+        owner_field = get_owner_field(model)
+        index = _TableIndex()
+
+        for photo_id, phash, dhash, owner_id in await PhotoRepository.get_perceptual_hashes(model, owner_field):
+            value: IndexValue = (photo_id, hash_to_int(dhash) if dhash else None)
+            index.global_index.add(hash_to_int(phash), value)
+            if owner_id is not None:
+                index.owners.setdefault(owner_id, MultiIndexHash()).add(hash_to_int(phash), value)
+
+        index.loaded_at = time.monotonic()
+        logger.info(
+            f"Индекс pHash {model._meta.db_table} загружен: {index.global_index.size} фото "
+            f"за {index.loaded_at - started:.3f} с"
+        )
+        return index
+
+
+near_duplicate_index = NearDuplicateIndex()
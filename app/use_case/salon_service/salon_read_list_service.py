@@ -1,10 +1,17 @@
+from typing import Optional
+
 from db.repositories.salon_repositories.salon_repositories import SalonRepository
+from use_case.photo_service.photo_base_servise import PhotoHandler
 
 
 class SalonListService:
     @staticmethod
-    async def get_salon_by_city(city_slug: str, limit: int = 10, offset: int = 0):
+    async def get_salon_by_city(city_slug: str, limit: int = 10, cursor: Optional[str] = None):
         """
-        Получение всех салонов города по slug
+        Страница салонов города по slug (с квадратным аватаром для карточки) и курсор следующей
         """
-        return await SalonRepository.get_salon_in_city(city_slug, limit, offset)
\ No newline at end of file
+        salons, next_cursor = await SalonRepository.get_salon_in_city(city_slug, limit, cursor)
+        for salon in salons:
+            avatars = list(salon.images)
+            salon.avatar_urls = PhotoHandler.build_card_urls(avatars[0]) if avatars else None
+        return salons, next_cursor
@@ -5,8 +5,8 @@ from db.repositories.photo_repositories.photo_repository import PhotoRepository
 from core.exceptions.service import ResourceNotFoundException, BusinessRuleException, ServiceException
 from core.exceptions.validation import ValidationException
 from core.exceptions.repository import EntityNotFoundException
-from config.constants import MEDIA_URL
 from db.schemas.salon_schemas.salon_schemas import SalonDetailsSchema # Импортируем SalonDetailsSchema
+from use_case.photo_service.photo_base_servise import PhotoHandler
 
 
 class SalonReadService:
@@ -40,14 +40,8 @@ class SalonReadService:
             if avatar_photos: # Если есть аватарки
                 avatar_photo = avatar_photos[0] # Берем первую аватарку (можно доработать, если нужно несколько)
 
-                if avatar_photo.small:
-                    avatar_urls['small'] = f"{MEDIA_URL}{avatar_photo.small}" # Формируем URL
-                if avatar_photo.medium:
-                    avatar_urls['medium'] = f"{MEDIA_URL}{avatar_photo.medium}"
-                if avatar_photo.large:
-                    avatar_urls['large'] = f"{MEDIA_URL}{avatar_photo.large}"
-                if avatar_photo.original:
-                    avatar_urls['original'] = f"{MEDIA_URL}{avatar_photo.original}"
+                # URL версий (включая квадратные), заглушка и доминирующий цвет
+                avatar_urls = PhotoHandler.build_detail_urls(avatar_photo)
 
 
             salon_data = { # Формируем словарь данных салона
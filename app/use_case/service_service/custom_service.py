@@ -9,7 +9,6 @@ from db.repositories.services_repositories.service_standart_repositories import
 from db.repositories.services_repositories.service_custom_repositories import ServiceCustomRepository
 from db.models.photo_models.photo_standart_service_model import CustomServicePhoto
 from use_case.photo_service.photo_base_servise import PhotoHandler
-from use_case.photo_service.photo_custom_service import PhotoCustomRepository
 from config.components.logging_config import logger
 from use_case.utils.permissions import UserAccessService
 
@@ -121,7 +120,8 @@ class CustomServiceService():
 
             # Работа с фотографиями (без изменений)
             if images:
-                await PhotoCustomRepository.delete_by_custom_service_id(custom_service_id)
+                # Прежние фото удаляются вместе с файлами: записи одним DELETE, файлы одним пакетом
+                await PhotoHandler.delete_photos(CustomServicePhoto, custom_service_id=custom_service_id)
 
                 try:
                     photo_ids = await PhotoHandler.add_photos_to_service(
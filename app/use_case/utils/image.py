@@ -1,9 +1,123 @@
 import asyncio
+import base64
+import math
+import multiprocessing
 import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
 from PIL import Image
 from config.constants import MEDIA_DIR
 from config.components.logging_config import logger
+from config.components.media import media_config
+from core.exceptions.service import ServiceException
+from use_case.utils.image_crop import saliency_map, square_crop_box, square_crop_offset
+from use_case.utils.image_formats import FORMAT_PROFILES, PRIMARY_FORMAT
+from use_case.utils.image_profiles import VariantProfile, get_variant_profile, profile_formats, square_field
+from use_case.utils.image_quality import encode_adaptive
+from use_case.utils.media_layout import ensure_dir, entity_media_dir
+
+
+# Пул процессов для обработки изображений (создается лениво при первом обращении)
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_slots: Optional[asyncio.Semaphore] = None
+
+
+class ImageBackend(ABC):
+    """
+    Движок обработки изображения: декодирование, ресайз и кодирование всех версий одного исходника.
+
+    Движки взаимозаменяемы: версии сохраняются под одинаковыми именами
+    (<size>_<new_filename>.<ext> и sq<side>_<new_filename>.<ext> в save_path), а render_variants
+    возвращает одинаковый saved_paths — пути версий основного формата относительно MEDIA_DIR
+    (квадратные — под ключами square_<side>), quality, placeholder и dominant_color.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def render_variants(
+            self, source, save_path: str, new_filename: str, quality: int, cascade: bool,
+            formats: Sequence[str], sizes: Optional[Sequence[str]], adaptive: Optional[Dict[str, Any]],
+            squares: Sequence[int] = (),
+    ) -> Dict[str, Any]:
+        ...
+
+
+class PillowBackend(ImageBackend):
+    """Движок на Pillow: полное декодирование (для JPEG — с уменьшением через draft) и ресайз LANCZOS."""
+
+    name = "pillow"
+
+    def render_variants(self, source, save_path, new_filename, quality, cascade, formats, sizes, adaptive, squares=()):
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+
+        with Image.open(source) as image:
+            image = ImageOptimizer._open_for_variants(image, cascade, sizes)
+            saved_paths: Dict[str, Any] = {"quality": {}}
+            smallest = image
+            square_source = None
+
+            for size_name, resized_image in ImageOptimizer._iter_variants(image, cascade, sizes):
+                if resized_image.width < smallest.width:
+                    smallest = resized_image
+                square_source = ImageOptimizer._pick_square_source(square_source, resized_image, squares)
+                for fmt in formats:
+                    file_path = os.path.join(save_path, f"{size_name}_{new_filename}.{FORMAT_PROFILES[fmt].extension}")
+
+                    used_quality = ImageOptimizer._write_variant(resized_image, file_path, fmt, quality, size_name, adaptive)
+                    if fmt == PRIMARY_FORMAT:
+                        saved_paths[size_name] = os.path.relpath(file_path, MEDIA_DIR)
+                        saved_paths["quality"][size_name] = used_quality
+
+            ImageOptimizer._write_squares(
+                square_source, smallest, save_path, new_filename, formats, quality, squares, saved_paths
+            )
+            saved_paths["placeholder"], saved_paths["dominant_color"] = ImageOptimizer._placeholder(smallest)
+            return saved_paths
+
+
+def get_image_backend(name: Optional[str] = None) -> ImageBackend:
+    """
+    Движок по имени (по умолчанию IMAGE_BACKEND из настроек).
+
+    libvips — необязательная зависимость: если pyvips или сама библиотека не установлены,
+    используется Pillow.
+    """
+    name = name or media_config.image_backend
+    if name == PillowBackend.name:
+        return PillowBackend()
+    if name == "vips":
+        from use_case.utils.image_vips import VipsBackend, vips_available
+
+        if vips_available():
+            return VipsBackend()
+        logger.warning("Движок vips недоступен (pyvips или libvips не установлены), используется Pillow")
+        return PillowBackend()
+    raise ValueError(f"Неизвестный движок обработки изображений: {name}")
+
+
+def _render_variants(
+        source, save_path: str, new_filename: str, quality: int, cascade: bool = True,
+        formats: Sequence[str] = (PRIMARY_FORMAT,), sizes: Optional[Sequence[str]] = None,
+        adaptive: Optional[Dict[str, Any]] = None, squares: Sequence[int] = (), backend: str = PillowBackend.name,
+) -> Dict[str, Any]:
+    """
+    Полный цикл обработки одного изображения: декодирование, ресайз и кодирование версий sizes
+    (по умолчанию всех) во всех форматах. Возвращаются пути версий основного формата,
+    placeholder и dominant_color, посчитанные по самой маленькой версии, и качество
+    основного формата по версиям (quality), подобранное при заданном adaptive,
+    и квадратные версии squares.
+
+    Функция верхнего уровня, чтобы ее можно было передать в ProcessPoolExecutor.
+    """
+    return get_image_backend(backend).render_variants(
+        source, save_path, new_filename, quality, cascade, formats, sizes, adaptive, squares
+    )
 
 
 class ImageOptimizer:
@@ -15,51 +129,159 @@ class ImageOptimizer:
         "original": 1920 # Оригинальная версия (1920px максимум)
     }
 
+    # Размер встраиваемой заглушки (LQIP) по большей стороне и ее качество
+    PLACEHOLDER_SIZE = 16
+    PLACEHOLDER_QUALITY = 40
+
     @staticmethod
-    async def optimize_and_save_async(image_file, city, role, slug, image_type, new_filename: str, quality=85):
+    async def optimize_and_save_async(
+            image_file, city, role, slug, image_type, new_filename: str, quality: Optional[int] = None,
+            cascade: Optional[bool] = None, save_dir: Optional[str] = None, profile: Optional[VariantProfile] = None,
+    ):
+        """
+        Создает версии изображения по профилю (см. VARIANT_PROFILES): профиль определяет,
+        какие размеры и форматы нужны и с каким качеством. По умолчанию берется профиль image_type.
+        Версии создает движок IMAGE_BACKEND (см. get_image_backend).
+        """
         logger.info("Начало асинхронной обработки изображения")
 
+        if cascade is None:
+            cascade = media_config.image_cascade
+        if profile is None:
+            _, profile = get_variant_profile(image_type, role)
+        if quality is None:
+            quality = profile.quality
+        formats = profile_formats(profile)
+        sizes = profile.sizes
+        squares = profile.squares
+        adaptive = ImageOptimizer._adaptive_settings()
+        backend = get_image_backend().name
+
         try:
-            # Открытие изображения
-            if isinstance(image_file, BytesIO):
-                image = Image.open(image_file)
+            if not isinstance(image_file, (BytesIO, str, os.PathLike)):
+                raise ValueError("Поддерживаются только путь к файлу или объекты BytesIO")
+
+            # Создаем базовый путь для сохранения (save_dir — готовый путь относительно MEDIA_DIR)
+            if save_dir:
+                save_path = ensure_dir(os.path.join(MEDIA_DIR, save_dir))
             else:
-                raise ValueError("Поддерживаются только объекты BytesIO")
+                save_path = ImageOptimizer._create_save_path(city, role, slug, image_type)
 
-            image = ImageOptimizer._convert_to_rgb(image)
-            saved_paths = {}
+            source = image_file.getvalue() if isinstance(image_file, BytesIO) else os.fspath(image_file)
+            if media_config.image_engine == "process":
+                # Весь цикл decode→resize→encode выполняется в отдельном процессе.
+                # Путь к файлу передается как есть, чтобы не копировать байты между процессами.
+                return await ImageOptimizer._run_in_pool(
+                    _render_variants, source, save_path, new_filename, quality, cascade, formats, sizes, adaptive,
+                    squares, backend,
+                )
+            # Тот же цикл в потоке: декодирование, ресайз и кодирование не блокируют цикл событий
+            # (Pillow и libvips освобождают GIL на тяжелых операциях)
+            return await asyncio.to_thread(
+                _render_variants, source, save_path, new_filename, quality, cascade, formats, sizes, adaptive,
+                squares, backend,
+            )
 
-            # Создаем базовый путь для сохранения
-            save_path = ImageOptimizer._create_save_path(city, role, slug, image_type)
+        except Exception as e:
+            logger.error(f"Ошибка оптимизации изображения: {e}")
+            raise
 
-            # Обрабатываем каждый размер изображения
-            for size_name, max_dim in ImageOptimizer.SIZE_CONFIGS.items():
-                resized_image = ImageOptimizer._resize_image(image, max_dim)
+    @staticmethod
+    def _get_process_pool() -> ProcessPoolExecutor:
+        global _process_pool
+        if _process_pool is None:
+            # spawn вместо fork: воркер uvicorn многопоточный, fork может унаследовать захваченные блокировки
+            _process_pool = ProcessPoolExecutor(
+                max_workers=media_config.image_pool_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Запущен пул обработки изображений: {media_config.image_pool_workers} процессов")
+        return _process_pool
 
-                file_name = f"{size_name}_{new_filename}.webp"
-                file_path = os.path.join(save_path, file_name)
+    @staticmethod
+    async def _run_in_pool(func, *args):
+        """
+        Выполняет задачу в пуле процессов, ограничивая число задач в очереди.
 
-                relative_path = await ImageOptimizer._save_image_async(resized_image, file_path,
-                                                                       quality)  # Получаем относительный путь!
-                saved_paths[size_name] = relative_path  # Сохраняем относительный путь в saved_paths!
+        Raises:
+            ServiceException: Если очередь пула заполнена.
+        """
+        global _pool_slots
+        if _pool_slots is None:
+            _pool_slots = asyncio.Semaphore(media_config.image_pool_max_queue)
 
-            return saved_paths
+        if _pool_slots.locked():
+            logger.warning("Очередь обработки изображений переполнена")
+            raise ServiceException(
+                message="Сервер перегружен обработкой изображений, попробуйте позже",
+                error_code="IMAGE_QUEUE_FULL",
+                status_code=503,
+            )
 
-        except Exception as e:
-            logger.error(f"Ошибка оптимизации изображения: {e}")
-            raise
+        async with _pool_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(ImageOptimizer._get_process_pool(), func, *args)
 
-        except Exception as e:
-            logger.error(f"Ошибка оптимизации изображения: {e}")
-            raise
+    @staticmethod
+    def shutdown_pool() -> None:
+        """Останавливает пул процессов (вызывается при завершении приложения)."""
+        global _process_pool, _pool_slots
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+            _pool_slots = None
+            logger.info("Пул обработки изображений остановлен")
+
+    @staticmethod
+    def _open_for_variants(image, cascade: bool, sizes: Optional[Sequence[str]] = None):
+        """
+        Подготавливает открытое изображение к нарезке версий.
+
+        В каскадном режиме JPEG декодируется сразу в уменьшенном масштабе (draft: 1/2, 1/4, 1/8),
+        но не меньше самой большой из нужных версий, поэтому полный кадр в память не попадает.
+        """
+        if cascade and image.format == "JPEG":
+            max_dim = max(ImageOptimizer._size_configs(sizes).values())
+            width, height = image.size
+            if max(width, height) > max_dim:
+                scale = max_dim / max(width, height)
+                image.draft(image.mode, (math.ceil(width * scale), math.ceil(height * scale)))
+        return ImageOptimizer._convert_to_rgb(image)
+
+    @staticmethod
+    def _iter_variants(image, cascade: bool, sizes: Optional[Sequence[str]] = None):
+        """
+        Возвращает пары (имя версии, изображение) для версий sizes (по умолчанию всех).
+
+        Без каскада каждая версия уменьшается из исходника. В каскадном режиме версии
+        идут от большей к меньшей, и каждая следующая получается из предыдущей.
+        """
+        size_configs = ImageOptimizer._size_configs(sizes)
+        if not cascade:
+            for size_name, max_dim in size_configs.items():
+                yield size_name, ImageOptimizer._resize_image(image, max_dim)
+            return
+
+        current = image
+        for size_name, max_dim in sorted(size_configs.items(), key=lambda item: item[1], reverse=True):
+            # reducing_gap: при большом коэффициенте сначала целочисленный reduce(), затем LANCZOS
+            current = ImageOptimizer._resize_image(current, max_dim, reducing_gap=2.0)
+            yield size_name, current
+
+    @staticmethod
+    def _size_configs(sizes: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Размеры из SIZE_CONFIGS для выбранных версий."""
+        if sizes is None:
+            return ImageOptimizer.SIZE_CONFIGS
+        return {name: max_dim for name, max_dim in ImageOptimizer.SIZE_CONFIGS.items() if name in sizes}
 
     @staticmethod
-    def _resize_image(image, max_dim):
+    def _resize_image(image, max_dim, reducing_gap: Optional[float] = None):
         width, height = image.size
         if max(width, height) > max_dim:
             scale = max_dim / max(width, height)
             new_size = (int(width * scale), int(height * scale))
-            image = image.resize(new_size, Image.LANCZOS)
+            image = image.resize(new_size, Image.LANCZOS, reducing_gap=reducing_gap)
         return image
 
     @staticmethod
@@ -71,22 +293,147 @@ class ImageOptimizer:
         return image
 
     @staticmethod
-    def _create_save_path(city, role, slug, image_type):
-        save_path = os.path.join(MEDIA_DIR, city, role, slug, image_type)
-        os.makedirs(save_path, exist_ok=True)
-        return save_path
+    def _placeholder(image) -> Tuple[str, str]:
+        """
+        Заглушка для первой отрисовки: WebP не больше PLACEHOLDER_SIZE px в base64 (data URI)
+        и доминирующий цвет в виде #rrggbb.
+
+        Считается по уже уменьшенной версии, поэтому стоит доли миллисекунды.
+        """
+        thumb = image.convert("RGB")
+        thumb.thumbnail((ImageOptimizer.PLACEHOLDER_SIZE, ImageOptimizer.PLACEHOLDER_SIZE), Image.BILINEAR)
+
+        buffer = BytesIO()
+        thumb.save(buffer, format="WEBP", quality=ImageOptimizer.PLACEHOLDER_QUALITY)
+        data_uri = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+        return data_uri, ImageOptimizer._dominant_color(image)
 
     @staticmethod
-    async def _save_image_async(image, path, quality):
-        try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, lambda: image.save(path, format="WEBP", quality=quality))
+    def _dominant_color(image) -> str:
+        """
+        Доминирующий цвет: пиксели квантуются до 4 бит на канал, берется самая частая
+        ячейка гистограммы и средний цвет ее пикселей. Считается векторно через numpy.
+        """
+        sample = image.convert("RGB")
+        if max(sample.size) > 64:
+            sample = sample.reduce(max(1, max(sample.size) // 64))
 
-            relative_path = os.path.relpath(path, MEDIA_DIR)
-            return relative_path
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении изображения {path}: {e}")
-            raise
+        pixels = np.asarray(sample, dtype=np.uint8).reshape(-1, 3)
+        bins = (pixels >> 4).astype(np.uint16)
+        keys = (bins[:, 0] << 8) | (bins[:, 1] << 4) | bins[:, 2]
+        top = np.bincount(keys, minlength=4096).argmax()
+        red, green, blue = pixels[keys == top].mean(axis=0).round().astype(int)
+        return f"#{red:02x}{green:02x}{blue:02x}"
+
+    @staticmethod
+    def _pick_square_source(current, candidate, squares: Sequence[int]):
+        """
+        Версия, из которой вырезаются квадраты: самая маленькая, у которой меньшая сторона
+        не меньше самого большого квадрата, а если таких нет — самая большая.
+        """
+        if not squares:
+            return None
+        if current is None:
+            return candidate
+        needed = max(squares)
+        # width/height, а не size: функция вызывается и для изображений libvips
+        candidate_fits = min(candidate.width, candidate.height) >= needed
+        current_fits = min(current.width, current.height) >= needed
+        if candidate_fits and (not current_fits or candidate.width < current.width):
+            return candidate
+        if not current_fits and candidate.width > current.width:
+            return candidate
+        return current
+
+    @staticmethod
+    def _write_squares(
+            source, smallest, save_path: str, new_filename: str, formats: Sequence[str], quality: int,
+            squares: Sequence[int], saved_paths: Dict[str, Any],
+    ) -> None:
+        """
+        Квадратные версии для списков и карточек: центр кадрирования выбирается по карте
+        значимости самой маленькой версии (см. image_crop), квадрат вырезается из source
+        и уменьшается каскадом от большей стороны к меньшей. Пути и качество добавляются в saved_paths.
+        """
+        if not squares or source is None:
+            return
+        offset = square_crop_offset(saliency_map(smallest))
+        square = source.crop(square_crop_box(source.size, offset))
+
+        for side in sorted(squares, reverse=True):
+            square = ImageOptimizer._resize_image(square, side, reducing_gap=2.0)
+            field = square_field(side)
+            for fmt in formats:
+                file_path = os.path.join(save_path, f"sq{side}_{new_filename}.{FORMAT_PROFILES[fmt].extension}")
+                used_quality = ImageOptimizer._write_variant(square, file_path, fmt, quality, field)
+                if fmt == PRIMARY_FORMAT:
+                    saved_paths[field] = os.path.relpath(file_path, MEDIA_DIR)
+                    saved_paths["quality"][field] = used_quality
+
+    @staticmethod
+    def _adaptive_settings() -> Optional[Dict[str, Any]]:
+        """
+        Параметры подбора качества из настроек (None в режиме "fixed").
+        Передаются в _render_variants явно, так как процессы пула не видят изменений настроек.
+        """
+        mode = media_config.image_quality_mode
+        if mode == "fixed":
+            return None
+        if mode not in ("budget", "perceptual"):
+            raise ValueError(f"Неизвестный режим подбора качества: {mode}")
+        return {
+            "mode": mode,
+            "byte_budgets": dict(media_config.image_byte_budgets),
+            "max_error": media_config.image_max_error,
+            "min_quality": media_config.image_quality_min,
+            "max_quality": media_config.image_quality_max,
+            "max_steps": media_config.image_quality_steps,
+        }
+
+    @staticmethod
+    def _write_variant(
+            image, file_path: str, fmt: str, quality: int, size_name: str, adaptive: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Кодирует версию и записывает ее в файл, возвращает использованное качество.
+
+        При заданном adaptive качество основного формата подбирается под бюджет версии
+        или порог ошибки (см. encode_adaptive), остальные форматы кодируются с качеством профиля.
+        """
+        prepared = ImageOptimizer._prepare_for_format(image, fmt)
+        pil_format = FORMAT_PROFILES[fmt].pil_format
+
+        budget = adaptive["byte_budgets"].get(size_name) if adaptive and adaptive["mode"] == "budget" else None
+        if fmt == PRIMARY_FORMAT and adaptive and (budget or adaptive["mode"] == "perceptual"):
+            data, quality = encode_adaptive(
+                prepared, pil_format, adaptive["min_quality"], adaptive["max_quality"], adaptive["max_steps"],
+                byte_budget=budget, max_error=None if budget else adaptive["max_error"],
+            )
+            with open(file_path, "wb") as file:
+                file.write(data)
+            return quality
+
+        quality = ImageOptimizer._format_quality(fmt, quality)
+        prepared.save(file_path, format=pil_format, quality=quality)
+        return quality
+
+    @staticmethod
+    def _format_quality(fmt: str, quality: int) -> int:
+        """Качество кодирования: для основного формата — переданное, для остальных — из профиля."""
+        return quality if fmt == PRIMARY_FORMAT else FORMAT_PROFILES[fmt].quality
+
+    @staticmethod
+    def _prepare_for_format(image, fmt: str):
+        """JPEG и AVIF кодируются из RGB/L, палитровые и прочие режимы приводятся к RGB."""
+        if fmt != PRIMARY_FORMAT and image.mode not in ("RGB", "L"):
+            return image.convert("RGB")
+        return image
+
+    @staticmethod
+    def _create_save_path(city, role, slug, image_type):
+        # Раскладка каталогов задается MEDIA_LAYOUT (см. entity_media_dir)
+        return ensure_dir(os.path.join(MEDIA_DIR, entity_media_dir(city, role, slug, image_type)))
 
     @staticmethod
     async def delete_file(relative_path):
@@ -99,4 +446,4 @@ class ImageOptimizer:
                 logger.warning(f"Файл не найден: {file_path}")
         except Exception as e:
             logger.error(f"Ошибка при удалении файла {file_path}: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,95 @@
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+# Большая сторона кадра, по которому считается карта значимости
+SALIENCY_SIZE = 64
+# Сторона блока для локальной энтропии яркости
+ENTROPY_BLOCK = 4
+# Уровней квантования яркости для энтропии
+ENTROPY_LEVELS = 16
+# Вес априорного предпочтения центра кадра (0 — не учитывается)
+CENTER_BIAS = 0.3
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    spread = values.max() - values.min()
+    return (values - values.min()) / spread if spread > 0 else np.zeros_like(values)
+
+
+def _local_entropy(luma: np.ndarray) -> np.ndarray:
+    """Энтропия распределения яркости в блоках ENTROPY_BLOCK x ENTROPY_BLOCK, растянутая на пиксели."""
+    height, width = luma.shape
+    rows, cols = height // ENTROPY_BLOCK, width // ENTROPY_BLOCK
+    if not rows or not cols:
+        return np.zeros_like(luma)
+
+    levels = (luma[:rows * ENTROPY_BLOCK, :cols * ENTROPY_BLOCK] * (ENTROPY_LEVELS - 1) / 255).astype(np.int64)
+    blocks = levels.reshape(rows, ENTROPY_BLOCK, cols, ENTROPY_BLOCK).swapaxes(1, 2).reshape(rows * cols, -1)
+    # Гистограммы всех блоков одним bincount: номер блока * число уровней + уровень
+    keys = blocks + (np.arange(rows * cols) * ENTROPY_LEVELS)[:, None]
+    counts = np.bincount(keys.ravel(), minlength=rows * cols * ENTROPY_LEVELS).reshape(rows * cols, ENTROPY_LEVELS)
+    probabilities = counts / blocks.shape[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.nansum(probabilities * np.log2(probabilities), axis=1).reshape(rows, cols)
+
+    expanded = np.repeat(np.repeat(entropy, ENTROPY_BLOCK, axis=0), ENTROPY_BLOCK, axis=1)
+    result = np.zeros_like(luma)
+    result[:expanded.shape[0], :expanded.shape[1]] = expanded
+    return result
+
+
+def saliency_map(image: Image.Image) -> np.ndarray:
+    """
+    Карта значимости кадра не больше SALIENCY_SIZE px по большей стороне.
+
+    Сумма двух нормированных признаков: отличие цвета пикселя от среднего цвета кадра
+    (frequency-tuned saliency — фон обычно занимает большую часть кадра и близок к среднему)
+    и локальная энтропия яркости (детали лица, волос, рук плотнее однотонного фона).
+    """
+    thumb = image.convert("RGB")
+    thumb.thumbnail((SALIENCY_SIZE, SALIENCY_SIZE), Image.BOX)
+    pixels = np.asarray(thumb, dtype=np.float32)
+
+    # Оппонентные каналы: яркость и две цветоразностные оси
+    red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    luma = 0.299 * red + 0.587 * green + 0.114 * blue
+    opponent = np.stack([luma, red - green, 0.5 * (red + green) - blue], axis=-1)
+    rarity = np.linalg.norm(opponent - opponent.reshape(-1, 3).mean(axis=0), axis=-1)
+
+    return _normalize(rarity) + _normalize(_local_entropy(luma))
+
+
+def square_crop_offset(saliency: np.ndarray) -> float:
+    """
+    Положение квадратного окна со стороной меньшей стороны кадра вдоль большей стороны:
+    доля от 0 (левый/верхний край) до 1 (правый/нижний), 0.5 — центр.
+
+    Выбирается окно с наибольшей суммой значимости; суммы окон считаются
+    через кумулятивную сумму проекции карты, центр кадра получает небольшой приоритет.
+    """
+    height, width = saliency.shape
+    if height == width:
+        return 0.5
+
+    profile = saliency.sum(axis=0 if width > height else 1)
+    if not profile.any():
+        return 0.5
+    side = min(height, width)
+    # Сумма окна — разность кумулятивных сумм на его краях: O(n) для любой стороны окна
+    cumulative = np.concatenate(([0.0], np.cumsum(profile, dtype=np.float64)))
+    windows = cumulative[side:] - cumulative[:-side]
+    positions = np.linspace(-1, 1, len(windows))
+    scores = windows * (1 - CENTER_BIAS * np.abs(positions))
+    return float(scores.argmax() / (len(windows) - 1))
+
+
+def square_crop_box(size: Tuple[int, int], offset: float) -> Tuple[int, int, int, int]:
+    """Квадрат (left, top, right, bottom) со стороной меньшей стороны size и положением offset."""
+    width, height = size
+    side = min(width, height)
+    shift = round(offset * (max(width, height) - side))
+    if width > height:
+        return shift, 0, shift + side, side
+    return 0, shift, side, shift + side
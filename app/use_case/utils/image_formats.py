@@ -0,0 +1,119 @@
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from PIL import features
+
+from config.components.media import media_config
+from config.constants import MEDIA_DIR, MEDIA_URL
+
+
+class FormatProfile(NamedTuple):
+    pil_format: str   # Формат для Image.save
+    extension: str    # Расширение файла версии
+    mime_type: str
+    quality: int      # Качество по умолчанию для формата
+
+
+FORMAT_PROFILES: Dict[str, FormatProfile] = {
+    "avif": FormatProfile("AVIF", "avif", "image/avif", 50),
+    "webp": FormatProfile("WEBP", "webp", "image/webp", 85),
+    "jpeg": FormatProfile("JPEG", "jpg", "image/jpeg", 85),
+}
+
+# Основной формат: его пути хранятся в полях small/medium/large/original
+PRIMARY_FORMAT = "webp"
+
+# Параметр запроса /media со списком форматов версии (от меньшего к большему)
+FORMATS_QUERY_PARAM = "f"
+
+
+def is_format_supported(fmt: str) -> bool:
+    """Проверяет, умеет ли установленный Pillow кодировать формат."""
+    if fmt == "avif":
+        return bool(features.check("avif"))
+    return fmt in FORMAT_PROFILES
+
+
+def enabled_formats() -> List[str]:
+    """Форматы, в которых сохраняются версии: основной и дополнительные из настроек."""
+    formats = [PRIMARY_FORMAT]
+    for fmt in media_config.image_extra_formats:
+        if fmt in FORMAT_PROFILES and fmt not in formats and is_format_supported(fmt):
+            formats.append(fmt)
+    return formats
+
+
+def format_path(path: str, fmt: str) -> str:
+    """Путь к той же версии в другом формате (отличается только расширением)."""
+    return f"{os.path.splitext(path)[0]}.{FORMAT_PROFILES[fmt].extension}"
+
+
+def collect_format_sizes(path: Optional[str]) -> Optional[Dict[str, int]]:
+    """
+    Размеры самой большой версии во всех сохраненных форматах — записываются в поле formats фото.
+
+    Вызывается один раз при сохранении версий, чтобы при отдаче не обращаться к диску.
+    """
+    if not path:
+        return None
+    sizes = {}
+    for fmt in FORMAT_PROFILES:
+        full_path = os.path.join(MEDIA_DIR, format_path(path, fmt))
+        if os.path.exists(full_path):
+            sizes[fmt] = os.path.getsize(full_path)
+    return sizes or None
+
+
+def media_url(path: str, formats: Optional[Dict[str, int]] = None) -> str:
+    """
+    URL версии. Если у версии несколько форматов, их список (от меньшего к большему)
+    передается в параметре f, и /media выбирает формат по заголовку Accept.
+    """
+    url = f"{MEDIA_URL}{path}"
+    if formats and len(formats) > 1:
+        ordered = sorted(formats, key=formats.get)
+        url += f"?{FORMATS_QUERY_PARAM}={','.join(ordered)}"
+    return url
+
+
+def _accepted_types(accept: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for item in (accept or "").split(","):
+        parts = [part.strip() for part in item.split(";")]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].lower()] = quality
+    return accepted
+
+
+def negotiate_format(accept: Optional[str], candidates: List[str]) -> str:
+    """
+    Выбирает первый формат из candidates (упорядочены от меньшего к большему),
+    который клиент принимает по заголовку Accept.
+
+    image/* и */* разрешают только JPEG: AVIF и WebP отдаются лишь тем, кто явно их заявил,
+    так как wildcard отправляют и старые клиенты без их поддержки. Если JPEG-версии нет,
+    отдается основной формат.
+    """
+    accepted = _accepted_types(accept)
+    wildcard = accepted.get("image/*", accepted.get("*/*", 0.0)) > 0
+
+    for fmt in candidates:
+        mime_type = FORMAT_PROFILES[fmt].mime_type
+        if mime_type in accepted:
+            if accepted[mime_type] > 0:
+                return fmt
+            continue
+        if wildcard and fmt == "jpeg":
+            return fmt
+
+    if PRIMARY_FORMAT in candidates:
+        return PRIMARY_FORMAT
+    return candidates[0]
@@ -0,0 +1,152 @@
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Generic, List, Set, Tuple, TypeVar
+
+import numpy as np
+from PIL import Image
+
+# Сторона изображения для pHash и число коэффициентов DCT по каждой оси
+PHASH_SIZE = 32
+PHASH_LOW = 8
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Матрица DCT-II (без нормировки — для сравнения с медианой она не нужна)."""
+    n = np.arange(size)
+    return np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    return np.packbits(bits.astype(np.uint8).ravel()).tobytes().hex()
+
+
+def _to_grayscale(image: Image.Image) -> Image.Image:
+    """Кадр в оттенках серого, общий для обоих хэшей (декодируется один раз)."""
+    # draft: JPEG декодируется сразу в уменьшенном масштабе, но не меньше 4x кадра pHash
+    if image.format == "JPEG":
+        image.draft("L", (PHASH_SIZE * 4, PHASH_SIZE * 4))
+    return image.convert("L")
+
+
+def _pixels(gray: Image.Image, size: Tuple[int, int]) -> np.ndarray:
+    return np.asarray(gray.resize(size, Image.BOX), dtype=np.float32)
+
+
+def _dhash(gray: Image.Image) -> str:
+    pixels = _pixels(gray, (9, 8))
+    return _bits_to_hex(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _phash(gray: Image.Image) -> str:
+    pixels = _pixels(gray, (PHASH_SIZE, PHASH_SIZE))
+    low = (_DCT @ pixels @ _DCT.T)[:PHASH_LOW, :PHASH_LOW]
+    return _bits_to_hex(low > np.median(low))
+
+
+def dhash(image: Image.Image) -> str:
+    """Разностный хэш (64 бита, hex): сравнение соседних пикселей в строках кадра 9x8."""
+    return _dhash(_to_grayscale(image))
+
+
+def phash(image: Image.Image) -> str:
+    """Перцептивный хэш (64 бита, hex): низкие частоты DCT кадра 32x32 относительно их медианы."""
+    return _phash(_to_grayscale(image))
+
+
+def image_hashes(path: str) -> Tuple[str, str]:
+    """pHash и dHash файла изображения: файл декодируется один раз, хэши считаются по одному кадру."""
+    with Image.open(path) as image:
+        gray = _to_grayscale(image)
+    return _phash(gray), _dhash(gray)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+T = TypeVar("T")
+
+# Хэш делится на CHUNKS частей по CHUNK_BITS бит для мульти-индекса
+CHUNKS = 4
+CHUNK_BITS = 16
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(max_bits: int) -> Tuple[int, ...]:
+    """Все маски из не более чем max_bits единиц в пределах одной части хэша."""
+    masks = [0]
+    for bits in range(1, max_bits + 1):
+        for positions in combinations(range(CHUNK_BITS), bits):
+            masks.append(sum(1 << position for position in positions))
+    return tuple(masks)
+
+
+class MultiIndexHash(Generic[T]):
+    """
+    Мульти-индекс 64-битных хэшей для поиска по расстоянию Хэмминга.
+
+    Хэш делится на 4 части по 16 бит, для каждой части — своя таблица «значение части → хэши».
+    Если хэши отличаются не больше чем на r бит, то хотя бы одна часть отличается не больше
+    чем на r // 4 бит, поэтому достаточно перебрать соседей каждой части в этом радиусе
+    (17 вариантов при r < 8) и проверить найденных кандидатов. В отличие от BK-дерева,
+    число просматриваемых хэшей почти не растет с размером индекса.
+    """
+
+    def __init__(self):
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(CHUNKS)]
+        self._values: Dict[int, List[T]] = {}
+        self.size = 0
+
+    def add(self, key: int, value: T) -> None:
+        self.size += 1
+        if key in self._values:
+            self._values[key].append(value)
+            return
+        self._values[key] = [value]
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            table.setdefault(chunk, set()).add(key)
+
+    def remove(self, key: int, value: T) -> bool:
+        values = self._values.get(key)
+        if not values or value not in values:
+            return False
+        values.remove(value)
+        self.size -= 1
+        if not values:
+            del self._values[key]
+            for table, chunk in zip(self._tables, self._chunks(key)):
+                table[chunk].discard(key)
+                if not table[chunk]:
+                    del table[chunk]
+        return True
+
+    def search(self, key: int, radius: int) -> List[Tuple[int, T]]:
+        """Значения с расстоянием до key не больше radius, от ближайших."""
+        masks = _flip_masks(radius // CHUNKS)
+        candidates: Set[int] = set()
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if bucket:
+                    candidates |= bucket
+
+        found = []
+        for candidate in candidates:
+            distance = hamming(key, candidate)
+            if distance <= radius:
+                found.extend((distance, value) for value in self._values[candidate])
+        found.sort(key=lambda item: item[0])
+        return found
+
+    @staticmethod
+    def _chunks(key: int) -> List[int]:
+        return [(key >> (CHUNK_BITS * i)) & _CHUNK_MASK for i in range(CHUNKS)]
+
+
+def hash_to_int(value: str) -> int:
+    return int(value, 16)
+
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from use_case.utils.image_hash import image_hashes
+
+# Размер блока при чтении загрузки
+CHUNK_SIZE = 1024 * 1024
+
+# Сигнатуры поддерживаемых форматов: (префикс, MIME-тип)
+MAGIC_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+@dataclass
+class IngestedImage:
+    """Загруженное изображение, сохраненное во временный файл и проверенное по заголовку."""
+    path: str
+    size: int
+    width: int
+    height: int
+    mime_type: str
+    sha256: str = ""
+    phash: Optional[str] = None
+    dhash: Optional[str] = None
+    # Временный файл уже удален или перенесен (release) — cleanup его не трогает
+    released: bool = field(default=False, repr=False)
+
+    def release(self) -> None:
+        """Отмечает, что временный файл перенесен и больше не принадлежит загрузке."""
+        self.released = True
+
+    def cleanup(self) -> None:
+        """Удаляет временный файл. Повторный вызов ничего не делает."""
+        if self.released:
+            return
+        self.released = True
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """Определяет MIME-тип изображения по первым байтам файла."""
+    for signature, mime_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def probe_dimensions(path: str) -> Tuple[int, int]:
+    """
+    Читает размеры изображения только из заголовка, без декодирования пикселей.
+
+    Raises:
+        HTTPException: Если файл не читается или превышает лимит пикселей (decompression bomb).
+    """
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=400, detail="Слишком большое разрешение изображения")
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать заголовок изображения {path}: {e}")
+        raise HTTPException(status_code=400, detail="Загруженный файл не является изображением")
+
+    if width * height > media_config.image_max_pixels:
+        logger.warning(f"Отклонено изображение {width}x{height}: превышен лимит {media_config.image_max_pixels} пикселей")
+        raise HTTPException(status_code=400, detail="Слишком большое разрешение изображения")
+
+    return width, height
+
+
+async def ingest_upload(upload: UploadFile) -> IngestedImage:
+    """
+    Потоково сохраняет загрузку во временный файл и проверяет ее.
+
+    Память на одну загрузку ограничена размером блока: файл читается по CHUNK_SIZE,
+    размер ограничен UPLOAD_MAX_BYTES, формат проверяется по сигнатуре,
+    размеры — по заголовку до декодирования пикселей. SHA-256 считается по ходу записи,
+    pHash/dHash для поиска похожих фото — по уменьшенному кадру (если поиск включен).
+
+    Returns:
+        IngestedImage: Путь к временному файлу и метаданные изображения.
+
+    Raises:
+        HTTPException: 400 — не изображение или слишком большое разрешение, 413 — превышен размер файла.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload_", dir=media_config.upload_tmp_dir or None)
+    os.close(fd)
+
+    try:
+        total = 0
+        mime_type = None
+        digest = hashlib.sha256()
+        async with aiofiles.open(path, "wb") as spool:
+            while chunk := await upload.read(CHUNK_SIZE):
+                if mime_type is None:
+                    mime_type = sniff_mime_type(chunk)
+                    if mime_type is None:
+                        raise HTTPException(status_code=400, detail="Загруженный файл не является изображением")
+
+                total += len(chunk)
+                if total > media_config.upload_max_bytes:
+                    raise HTTPException(status_code=413, detail="Файл слишком большой")
+
+                digest.update(chunk)
+                await spool.write(chunk)
+
+        if mime_type is None:
+            raise HTTPException(status_code=400, detail="Загруженный файл пуст")
+
+        width, height = await asyncio.to_thread(probe_dimensions, path)
+
+        phash = dhash = None
+        if media_config.image_near_dup_mode != "off":
+            try:
+                phash, dhash = await asyncio.to_thread(image_hashes, path)
+            except Exception as e:
+                logger.warning(f"Не удалось вычислить перцептивный хэш {path}: {e}")
+
+        return IngestedImage(path=path, size=total, width=width, height=height, mime_type=mime_type,
+                             sha256=digest.hexdigest(), phash=phash, dhash=dhash)
+
+    except BaseException:
+        os.remove(path)
+        raise
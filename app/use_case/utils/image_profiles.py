@@ -0,0 +1,66 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from use_case.utils.image_formats import PRIMARY_FORMAT, enabled_formats
+
+# Все версии от меньшей к большей (ключи ImageOptimizer.SIZE_CONFIGS)
+ALL_SIZES = ("small", "medium", "large", "original")
+
+# Стороны квадратных версий аватаров (кадрирование по карте значимости, см. image_crop)
+SQUARE_SIZES = (96, 192, 384)
+
+
+class VariantProfile(NamedTuple):
+    sizes: Tuple[str, ...]                    # Какие версии создавать
+    formats: Optional[Tuple[str, ...]] = None # Форматы версий (None — все включенные в настройках)
+    quality: int = 85                         # Качество основного формата
+    squares: Tuple[int, ...] = ()             # Стороны квадратных версий
+
+
+DEFAULT_PROFILE = "default"
+
+# Профили версий по image_type (или role), который передает PhotoHandler
+VARIANT_PROFILES: Dict[str, VariantProfile] = {
+    DEFAULT_PROFILE: VariantProfile(sizes=ALL_SIZES),
+    # Аватар показывается только миниатюрой и в карточке, в списках — квадратом
+    "avatar": VariantProfile(sizes=("small", "medium"), quality=80, squares=SQUARE_SIZES),
+    "portfolio": VariantProfile(sizes=ALL_SIZES),
+    # Новости выводятся в ленте и на странице новости, миниатюра не нужна
+    "news_photo": VariantProfile(sizes=("medium", "large")),
+}
+
+
+def get_variant_profile(image_type: Optional[str], role: Optional[str] = None) -> Tuple[str, VariantProfile]:
+    """Профиль версий по image_type, затем по role; если не найден — профиль по умолчанию."""
+    for key in (image_type, role):
+        if key in VARIANT_PROFILES:
+            return key, VARIANT_PROFILES[key]
+    return DEFAULT_PROFILE, VARIANT_PROFILES[DEFAULT_PROFILE]
+
+
+def profile_formats(profile: VariantProfile) -> List[str]:
+    """Форматы профиля среди включенных; основной формат создается всегда."""
+    formats = enabled_formats()
+    if profile.formats is None:
+        return formats
+    return [fmt for fmt in formats if fmt == PRIMARY_FORMAT or fmt in profile.formats]
+
+
+def largest_size(profile: VariantProfile) -> str:
+    """Самая большая версия профиля."""
+    return max(profile.sizes, key=ALL_SIZES.index)
+
+
+def largest_variant(paths: Dict[str, Optional[str]]) -> Optional[str]:
+    """Путь самой большой из созданных версий — он хранится в file_path записи фото."""
+    for size in reversed(ALL_SIZES):
+        if paths.get(size):
+            return paths[size]
+    return None
+
+
+def square_field(side: int) -> str:
+    """Поле записи фото (и ключ saved_paths) для квадратной версии."""
+    return f"square_{side}"
+
+
+SQUARE_FIELDS = tuple(square_field(side) for side in SQUARE_SIZES)
@@ -0,0 +1,100 @@
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Сторона блока при поблочном SSIM
+SSIM_BLOCK = 8
+# Константы SSIM для 8-битного диапазона
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def _luma(image: Image.Image) -> np.ndarray:
+    return np.asarray(image.convert("L"), dtype=np.float32)
+
+
+def perceptual_error(reference: Image.Image, candidate: Image.Image) -> float:
+    """
+    Ошибка кодирования как 1 - SSIM по яркости, усредненный по блокам 8x8.
+
+    Считается по пикселям уже уменьшенной версии (не больше 1920px), дополнительное
+    уменьшение скрыло бы артефакты сжатия. 0 — изображения совпадают.
+    """
+    ref, cand = _luma(reference), _luma(candidate)
+    height = min(ref.shape[0], cand.shape[0]) // SSIM_BLOCK * SSIM_BLOCK
+    width = min(ref.shape[1], cand.shape[1]) // SSIM_BLOCK * SSIM_BLOCK
+    if not height or not width:
+        return float(np.abs(ref.mean() - cand.mean()) / 255)
+
+    def blocks(pixels: np.ndarray) -> np.ndarray:
+        pixels = pixels[:height, :width]
+        return pixels.reshape(height // SSIM_BLOCK, SSIM_BLOCK, width // SSIM_BLOCK, SSIM_BLOCK).swapaxes(1, 2)
+
+    x, y = blocks(ref), blocks(cand)
+    mu_x, mu_y = x.mean(axis=(2, 3)), y.mean(axis=(2, 3))
+    var_x, var_y = x.var(axis=(2, 3)), y.var(axis=(2, 3))
+    cov = ((x - mu_x[..., None, None]) * (y - mu_y[..., None, None])).mean(axis=(2, 3))
+
+    ssim = ((2 * mu_x * mu_y + _C1) * (2 * cov + _C2)) / ((mu_x ** 2 + mu_y ** 2 + _C1) * (var_x + var_y + _C2))
+    return float(1 - ssim.mean())
+
+
+def _encode(image: Image.Image, pil_format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def encode_adaptive(
+        image: Image.Image,
+        pil_format: str,
+        min_quality: int,
+        max_quality: int,
+        max_steps: int,
+        byte_budget: Optional[int] = None,
+        max_error: Optional[float] = None,
+) -> Tuple[bytes, int]:
+    """
+    Подбирает качество двоичным поиском в [min_quality, max_quality] (не больше max_steps кодирований).
+
+    С byte_budget ищется наибольшее качество, при котором файл не превышает бюджет;
+    с max_error — наименьшее качество, при котором perceptual_error не превышает порог.
+    Если условие недостижимо, берется граница диапазона: min_quality для бюджета, max_quality для ошибки.
+
+    Returns:
+        Закодированные байты и выбранное качество.
+    """
+    if (byte_budget is None) == (max_error is None):
+        raise ValueError("Нужно задать ровно одно условие: byte_budget или max_error")
+
+    def acceptable(data: bytes) -> bool:
+        if byte_budget is not None:
+            return len(data) <= byte_budget
+        with Image.open(BytesIO(data)) as decoded:
+            return perceptual_error(image, decoded) <= max_error
+
+    low, high = min_quality, max_quality
+    best: Optional[Tuple[bytes, int]] = None
+    for _ in range(max_steps):
+        if low > high:
+            break
+        quality = (low + high + 1) // 2 if byte_budget is not None else (low + high) // 2
+        data = _encode(image, pil_format, quality)
+        if acceptable(data):
+            best = (data, quality)
+            # Для бюджета пробуем качество выше, для порога ошибки — ниже
+            if byte_budget is not None:
+                low = quality + 1
+            else:
+                high = quality - 1
+        elif byte_budget is not None:
+            high = quality - 1
+        else:
+            low = quality + 1
+
+    if best is not None:
+        return best
+    fallback = min_quality if byte_budget is not None else max_quality
+    return _encode(image, pil_format, fallback), fallback
@@ -0,0 +1,233 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from PIL import Image
+
+from config.components.logging_config import logger
+from config.components.media import media_config
+from config.constants import INCOMING_DIR, MEDIA_DIR, QUARANTINE_DIR, RESIZE_CACHE_DIR
+from use_case.utils.image import ImageOptimizer
+from use_case.utils.image_formats import FORMAT_PROFILES, is_format_supported, negotiate_format
+from use_case.utils.image_profiles import ALL_SIZES
+
+# Префиксы версий от большей к меньшей: источником берется самая большая версия того же фото
+VARIANT_PREFIXES = tuple(f"{size}_" for size in reversed(ALL_SIZES))
+
+# Служебные каталоги MEDIA_DIR, недоступные как источник (те же, что PRIVATE_MEDIA_DIRS у /media)
+SERVICE_DIRS = (INCOMING_DIR, RESIZE_CACHE_DIR, QUARANTINE_DIR)
+
+
+def _render_resized(source: str, dest: str, width: int, pil_format: str, quality: int) -> int:
+    """
+    Создает версию изображения заданной ширины (без увеличения) и возвращает ее размер в байтах.
+
+    Файл пишется во временный и переименовывается, поэтому в кэше не бывает недописанных версий.
+    Функция верхнего уровня, чтобы ее можно было передать в ProcessPoolExecutor.
+    """
+    with Image.open(source) as image:
+        src_width, src_height = image.size
+        target = min(width, src_width)
+        target_height = max(1, round(src_height * target / src_width))
+
+        if image.format == "JPEG" and target < src_width:
+            image.draft(image.mode, (target, target_height))
+
+        image = ImageOptimizer._convert_to_rgb(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if image.width > target:
+            image = image.resize((target, target_height), Image.LANCZOS, reducing_gap=2.0)
+
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        image.save(tmp_path, format=pil_format, quality=quality)
+        os.replace(tmp_path, dest)
+
+    return os.path.getsize(dest)
+
+
+class ResizeCache:
+    """
+    LRU-кэш версий на диске с ограничением по суммарному размеру.
+
+    Порядок использования хранится в памяти и восстанавливается по mtime файлов
+    при первом обращении, обращение к версии обновляет ее mtime.
+    Одновременные запросы одной версии ждут одну и ту же задачу генерации.
+
+    Ограничение соблюдается в каждом процессе отдельно: процесс учитывает файлы, найденные
+    при первом обращении, и созданные им самим, а версии других воркеров не видит. При N воркерах
+    каталог кэша может вырасти примерно до N × max_bytes, а каждый воркер держит в памяти
+    свой индекс (запись на файл).
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = os.fspath(root)
+        self.max_bytes = max_bytes
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._index_lock = asyncio.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    async def get_or_create(self, key: str, factory: Callable[[str], Awaitable[int]]) -> str:
+        """
+        Возвращает путь к версии из кэша, при отсутствии создает ее через factory(путь) -> размер.
+        """
+        await self._ensure_index()
+        path = os.path.join(self.root, key)
+
+        if key in self._index and os.path.exists(path):
+            self._touch(key, path)
+            return path
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create(key, path, factory))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shield: отключение одного клиента не отменяет генерацию для остальных
+        return await asyncio.shield(task)
+
+    async def _create(self, key: str, path: str, factory: Callable[[str], Awaitable[int]]) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = await factory(path)
+        self._add(key, size)
+        logger.info(f"Создана версия {key} ({size} байт), кэш {self._total}/{self.max_bytes} байт")
+        return path
+
+    async def _ensure_index(self) -> None:
+        if self._index is not None:
+            return
+        async with self._index_lock:
+            if self._index is None:
+                self._index, self._total = await asyncio.to_thread(self._scan)
+
+    def _scan(self) -> Tuple["OrderedDict[str, int]", int]:
+        entries = []
+        stack = [self.root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(".tmp"):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, os.path.relpath(entry.path, self.root), stat.st_size))
+            except FileNotFoundError:
+                continue
+
+        entries.sort()
+        index = OrderedDict((key, size) for _, key, size in entries)
+        return index, sum(index.values())
+
+    def _touch(self, key: str, path: str) -> None:
+        self._index.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _add(self, key: str, size: int) -> None:
+        self._total += size - self._index.pop(key, 0)
+        self._index[key] = size
+        self._evict(keep=key)
+
+    def _evict(self, keep: str) -> None:
+        while self._total > self.max_bytes:
+            oldest = next(iter(self._index))
+            if oldest == keep:
+                break
+            self._total -= self._index.pop(oldest)
+            try:
+                os.remove(os.path.join(self.root, oldest))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Версия {oldest} вытеснена из кэша")
+
+
+class MediaResizer:
+    """Создание версий изображений из MEDIA_DIR по запросу с кэшированием на диске."""
+
+    def __init__(self, media_root=MEDIA_DIR, cache: Optional[ResizeCache] = None):
+        self.media_root = os.path.realpath(media_root)
+        self.cache = cache or ResizeCache(
+            os.path.join(self.media_root, RESIZE_CACHE_DIR), media_config.resize_cache_max_bytes
+        )
+
+    @staticmethod
+    def allowed_formats() -> List[str]:
+        """Разрешенные форматы, которые поддерживает установленный Pillow (от меньшего к большему)."""
+        return [
+            fmt for fmt in FORMAT_PROFILES
+            if fmt in media_config.resize_allowed_formats and is_format_supported(fmt)
+        ]
+
+    async def get_variant(self, path: str, width: int, fmt: Optional[str] = None,
+                          accept: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Возвращает путь к версии и ее MIME-тип.
+
+        Если формат не указан, он выбирается по заголовку Accept.
+
+        Raises:
+            HTTPException: 400 — ширина или формат не разрешены, 404 — исходник не найден.
+        """
+        if width not in media_config.resize_allowed_widths:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимая ширина изображения")
+
+        allowed = self.allowed_formats()
+        if fmt is None:
+            fmt = negotiate_format(accept, allowed)
+        if fmt not in allowed:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый формат изображения")
+
+        source_rel = self._resolve_source(path)
+        pil_format, media_type = FORMAT_PROFILES[fmt].pil_format, FORMAT_PROFILES[fmt].mime_type
+
+        stem = os.path.splitext(source_rel)[0]
+        key = f"{stem}.w{width}.{fmt}"
+        source = os.path.join(self.media_root, source_rel)
+
+        async def factory(dest: str) -> int:
+            args = (source, dest, width, pil_format, media_config.resize_quality)
+            if media_config.image_engine == "process":
+                return await ImageOptimizer._run_in_pool(_render_resized, *args)
+            return await asyncio.to_thread(_render_resized, *args)
+
+        return await self.cache.get_or_create(key, factory), media_type
+
+    def _resolve_source(self, path: str) -> str:
+        """
+        Проверяет путь (без выхода за MEDIA_DIR и служебных каталогов) и возвращает
+        относительный путь к исходнику, для заранее созданных версий — к самой большой
+        версии того же фото (original, если профиль его создает).
+        """
+        full_path = os.path.realpath(os.path.join(self.media_root, path))
+        if os.path.commonpath([full_path, self.media_root]) != self.media_root:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено")
+
+        relative = os.path.relpath(full_path, self.media_root)
+        if relative.split(os.sep, 1)[0] in SERVICE_DIRS:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено")
+
+        directory, name = os.path.split(relative)
+        for prefix in VARIANT_PREFIXES:
+            if name.startswith(prefix):
+                for larger in VARIANT_PREFIXES[:VARIANT_PREFIXES.index(prefix)]:
+                    candidate = os.path.join(directory, larger + name[len(prefix):])
+                    if os.path.isfile(os.path.join(self.media_root, candidate)):
+                        return candidate
+                break
+
+        if not os.path.isfile(full_path):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено")
+        return relative
+
+
+media_resizer = MediaResizer()
@@ -0,0 +1,129 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+from PIL import Image
+
+from config.constants import MEDIA_DIR
+from use_case.utils.image import ImageBackend, ImageOptimizer
+from use_case.utils.image_formats import FORMAT_PROFILES, PRIMARY_FORMAT
+
+try:
+    import pyvips
+except (ImportError, OSError):  # OSError — pyvips установлен, но нет libvips
+    pyvips = None
+
+# Параметры кодировщиков libvips по форматам. AVIF: effort 3 соответствует скорости 6
+# кодировщика aom, с которой AVIF кодирует Pillow (по умолчанию libvips в несколько раз медленнее)
+VIPS_FORMAT_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "avif": {"effort": 3},
+}
+
+
+def vips_available() -> bool:
+    return pyvips is not None
+
+
+@lru_cache(maxsize=None)
+def _vips_suffixes() -> frozenset:
+    """Расширения, которые умеет записывать установленная libvips (AVIF — только со сборкой libheif)."""
+    return frozenset(pyvips.base.get_suffixes())
+
+
+def _save_options() -> Dict[str, Any]:
+    # Метаданные (EXIF с координатами и т.п.) не переносятся в версии, как и при сохранении через Pillow
+    if pyvips.at_least_libvips(8, 15):
+        return {"keep": "none"}
+    return {"strip": True}
+
+
+class VipsBackend(ImageBackend):
+    """
+    Движок на libvips.
+
+    Исходник не декодируется целиком: thumbnail уменьшает JPEG/WebP уже при загрузке
+    и читает файл потоково, поэтому память и время почти не зависят от разрешения исходника.
+    В каскадном режиме с диска загружается только самая большая версия, остальные
+    уменьшаются из нее. EXIF-ориентация не применяется, как и в движке Pillow.
+
+    Версии кодируются самой libvips. Через Pillow кодируются только основной формат
+    при подборе качества (encode_adaptive) и форматы, которые libvips не умеет записывать;
+    placeholder, dominant_color и квадратные версии создаются из версий libvips так же, как в Pillow.
+    """
+
+    name = "vips"
+
+    def render_variants(self, source, save_path, new_filename, quality, cascade, formats, sizes, adaptive, squares=()):
+        size_configs = sorted(
+            ImageOptimizer._size_configs(sizes).items(), key=lambda item: item[1], reverse=True
+        )
+        saved_paths: Dict[str, Any] = {"quality": {}}
+        current = None
+        smallest = None
+        square_source = None
+
+        for size_name, max_dim in size_configs:
+            if current is None or not cascade:
+                current = self._thumbnail(source, max_dim)
+            else:
+                current = current.thumbnail_image(max_dim, height=max_dim, size="down")
+            # Версия используется несколько раз (форматы, следующая версия каскада) — держим ее в памяти
+            current = current.copy_memory()
+            smallest = current
+            square_source = ImageOptimizer._pick_square_source(square_source, current, squares)
+
+            for fmt in formats:
+                file_path = os.path.join(save_path, f"{size_name}_{new_filename}.{FORMAT_PROFILES[fmt].extension}")
+                used_quality = self._write_variant(current, file_path, fmt, quality, size_name, adaptive)
+                if fmt == PRIMARY_FORMAT:
+                    saved_paths[size_name] = os.path.relpath(file_path, MEDIA_DIR)
+                    saved_paths["quality"][size_name] = used_quality
+
+        smallest = self._to_pillow(smallest)
+        if square_source is not None:
+            ImageOptimizer._write_squares(
+                self._to_pillow(square_source), smallest, save_path, new_filename, formats, quality, squares, saved_paths
+            )
+        saved_paths["placeholder"], saved_paths["dominant_color"] = ImageOptimizer._placeholder(smallest)
+        return saved_paths
+
+    @staticmethod
+    def _thumbnail(source, max_dim: int):
+        """Загрузка с уменьшением до max_dim по большей стороне (меньшие изображения не увеличиваются)."""
+        options = {"height": max_dim, "size": "down", "no_rotate": True}
+        if isinstance(source, (bytes, bytearray)):
+            image = pyvips.Image.thumbnail_buffer(source, max_dim, **options)
+        else:
+            image = pyvips.Image.thumbnail(os.fspath(source), max_dim, **options)
+        return VipsBackend._normalize(image)
+
+    @staticmethod
+    def _normalize(image):
+        """Приводит к 8-битному sRGB или оттенкам серого, прозрачность заливается белым."""
+        if image.interpretation not in ("srgb", "b-w"):
+            image = image.colourspace("srgb")
+        if image.hasalpha():
+            image = image.flatten(background=[255] * (image.bands - 1))
+        if image.format != "uchar":
+            image = image.cast("uchar")
+        return image
+
+    @staticmethod
+    def _write_variant(image, file_path: str, fmt: str, quality: int, size_name: str, adaptive) -> int:
+        extension = f".{FORMAT_PROFILES[fmt].extension}"
+        if (fmt == PRIMARY_FORMAT and adaptive) or extension not in _vips_suffixes():
+            return ImageOptimizer._write_variant(
+                VipsBackend._to_pillow(image), file_path, fmt, quality, size_name, adaptive
+            )
+
+        quality = ImageOptimizer._format_quality(fmt, quality)
+        image.write_to_file(file_path, Q=quality, **VIPS_FORMAT_OPTIONS.get(fmt, {}), **_save_options())
+        return quality
+
+    @staticmethod
+    def _to_pillow(image) -> Image.Image:
+        pixels = np.ndarray(
+            buffer=image.write_to_memory(), dtype=np.uint8, shape=(image.height, image.width, image.bands)
+        )
+        return Image.fromarray(pixels[:, :, 0] if image.bands == 1 else pixels, "L" if image.bands == 1 else "RGB")
@@ -0,0 +1,56 @@
+import hashlib
+import os
+from typing import Optional, Set
+
+from config.components.media import media_config
+from config.constants import CONTENT_DIR
+
+# Раскладки каталогов версий: "flat" — <город>/<роль>/<slug>/<тип>,
+# "sharded" — <город>/<роль>/<ab>/<cd>/<slug>/<тип>, где ab/cd — префикс хэша slug
+MEDIA_LAYOUTS = ("flat", "sharded")
+
+# Уровни шардирования по два hex-символа: не больше 256 подкаталогов на уровне
+SHARD_LEVELS = 2
+
+# Каталоги, уже созданные этим процессом. Приложение каталоги версий не удаляет,
+# поэтому os.makedirs для каждого каталога вызывается один раз за время жизни процесса
+_created_dirs: Set[str] = set()
+
+
+def shard_prefix(key: str) -> str:
+    """Префикс каталога из первых байт хэша ключа: "3f/a1"."""
+    digest = hashlib.blake2b(key.encode(), digest_size=SHARD_LEVELS).hexdigest()
+    return os.path.join(*(digest[level * 2:level * 2 + 2] for level in range(SHARD_LEVELS)))
+
+
+def entity_media_dir(city, role: str, slug: str, image_type: str, layout: Optional[str] = None) -> str:
+    """Каталог версий сущности относительно MEDIA_DIR в раскладке layout (по умолчанию MEDIA_LAYOUT)."""
+    layout = layout or media_config.media_layout
+    if layout == "sharded":
+        return os.path.join(str(city), role, shard_prefix(slug), slug, image_type)
+    if layout == "flat":
+        return os.path.join(str(city), role, slug, image_type)
+    raise ValueError(f"Неизвестная раскладка каталогов медиа: {layout}")
+
+
+def ensure_dir(path: str) -> str:
+    """Создает каталог, если этот процесс его еще не создавал."""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+    return path
+
+
+def sharded_path(relative_path: str) -> Optional[str]:
+    """
+    Путь версии в раскладке "sharded" для пути в раскладке "flat".
+
+    Returns:
+        Новый путь относительно MEDIA_DIR или None, если путь уже в шардированной раскладке,
+        лежит в хранилище по хэшу содержимого (оно шардировано само) или в служебном каталоге.
+    """
+    parts = relative_path.split(os.sep)
+    if len(parts) != 5 or parts[0] == CONTENT_DIR or parts[0].startswith("."):
+        return None
+    city, role, slug, image_type, name = parts
+    return os.path.join(entity_media_dir(city, role, slug, image_type, layout="sharded"), name)
@@ -0,0 +1,236 @@
+"""
+Бенчмарк ImageOptimizer на фиксированном наборе сгенерированных изображений.
+
+Для каждой библиотеки (pillow/vips), движка (inline/process) и уровня параллелизма
+запускается отдельный процесс, чтобы пиковый RSS не накапливался между прогонами.
+Результаты пишутся в JSON, сводка выводится по библиотекам рядом для одинаковых прогонов.
+
+Запуск из корня репозитория:
+    python tests/benchmarks/bench_image_pipeline.py --output bench_image.json
+    python tests/benchmarks/bench_image_pipeline.py --sizes 0.3 2 --engines inline --concurrency 1 2
+    python tests/benchmarks/bench_image_pipeline.py --backends pillow vips --engines process
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT_DIR / "app"), str(ROOT_DIR)]
+
+import numpy as np  # noqa: E402
+import PIL  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from config.components.media import media_config  # noqa: E402
+from use_case.utils.image import ImageOptimizer  # noqa: E402
+from use_case.utils.image_vips import pyvips, vips_available  # noqa: E402
+from use_case.utils.image_formats import FORMAT_PROFILES, enabled_formats  # noqa: E402
+
+# Размеры корпуса в мегапикселях
+DEFAULT_SIZES = [0.3, 2, 12, 24, 48]
+# Варианты исходников: (имя, формат файла, режим)
+KINDS = [("jpeg", "JPEG", "RGB"), ("png", "PNG", "RGB"), ("rgba", "PNG", "RGBA")]
+ORIENTATIONS = {"landscape": (4, 3), "portrait": (3, 4)}
+
+
+def corpus_name(megapixels: float, kind: str, orientation: str) -> str:
+    extension = "jpg" if kind == "jpeg" else "png"
+    return f"{megapixels:g}mp_{kind}_{orientation}.{extension}"
+
+
+def generate_image(megapixels: float, mode: str, orientation: str, seed: int) -> Image.Image:
+    """Градиент с шумом: сжимается похоже на фотографию, в отличие от однотонной заливки."""
+    ratio_w, ratio_h = ORIENTATIONS[orientation]
+    unit = (megapixels * 1_000_000 / (ratio_w * ratio_h)) ** 0.5
+    width, height = int(unit * ratio_w), int(unit * ratio_h)
+
+    # Генерируем в уменьшенном масштабе и растягиваем: полноразмерный шум на 48 Мп занимает гигабайты
+    rng = np.random.default_rng(seed)
+    small_w, small_h = max(1, width // 8), max(1, height // 8)
+    gradient = np.linspace(0, 255, small_w, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 40, (small_h, small_w, 3)).astype(np.float32)
+    pixels = np.clip(gradient + noise + np.array([0, 60, 120], dtype=np.float32), 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels, "RGB").resize((width, height), Image.BILINEAR)
+
+    if mode == "RGBA":
+        alpha = Image.linear_gradient("L").resize((width, height))
+        image.putalpha(alpha)
+    return image
+
+
+def build_corpus(directory: Path, sizes) -> list:
+    """Создает недостающие файлы корпуса и возвращает их описание."""
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    seed = 0
+    for megapixels in sizes:
+        for kind, file_format, mode in KINDS:
+            for orientation in ORIENTATIONS:
+                seed += 1
+                path = directory / corpus_name(megapixels, kind, orientation)
+                if not path.exists():
+                    image = generate_image(megapixels, mode, orientation, seed)
+                    image.save(path, format=file_format, **({"quality": 90} if file_format == "JPEG" else {}))
+                with Image.open(path) as image:
+                    width, height = image.size
+                corpus.append({
+                    "file": path.name,
+                    "megapixels": megapixels,
+                    "kind": kind,
+                    "orientation": orientation,
+                    "width": width,
+                    "height": height,
+                    "bytes": path.stat().st_size,
+                })
+    return corpus
+
+
+def output_bytes(directory: str) -> dict:
+    """Суммарный размер версий по SIZE_CONFIGS и форматам."""
+    extensions = {f".{profile.extension}": fmt for fmt, profile in FORMAT_PROFILES.items()}
+    totals = {size: {} for size in ImageOptimizer.SIZE_CONFIGS}
+    for name in os.listdir(directory):
+        size_name = name.split("_", 1)[0]
+        fmt = extensions.get(os.path.splitext(name)[1])
+        if size_name in totals and fmt:
+            totals[size_name][fmt] = totals[size_name].get(fmt, 0) + os.path.getsize(os.path.join(directory, name))
+    return totals
+
+
+async def run_case(corpus_dir: Path, files: list, backend: str, engine: str, concurrency: int) -> dict:
+    media_config.image_backend = backend
+    media_config.image_engine = engine
+    media_config.image_pool_workers = concurrency
+    media_config.image_pool_max_queue = max(media_config.image_pool_max_queue, concurrency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    with tempfile.TemporaryDirectory(prefix="bench_out_") as out_dir:
+        async def process(index: int, name: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                # Абсолютный save_dir: версии пишутся во временный каталог, а не в MEDIA_DIR
+                await ImageOptimizer.optimize_and_save_async(
+                    str(corpus_dir / name), city="", role="", slug="", image_type="",
+                    new_filename=f"img{index}", save_dir=out_dir,
+                )
+                latencies.append(time.perf_counter() - started)
+
+        if engine == "process":
+            # Прогрев пула: запуск процессов не должен попадать в замер
+            await ImageOptimizer._run_in_pool(os.getpid)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(process(index, name) for index, name in enumerate(files)))
+        elapsed = time.perf_counter() - started
+
+        ImageOptimizer.shutdown_pool()
+        variants = len(files) * len(ImageOptimizer.SIZE_CONFIGS)
+
+        return {
+            "backend": backend,
+            "engine": engine,
+            "concurrency": concurrency,
+            "images": len(files),
+            "seconds": round(elapsed, 3),
+            "images_per_sec": round(len(files) / elapsed, 3),
+            "ms_per_variant": round(sum(latencies) * 1000 / variants, 2),
+            "ms_per_image_p50": round(sorted(latencies)[len(latencies) // 2] * 1000, 1),
+            "ms_per_image_max": round(max(latencies) * 1000, 1),
+            "peak_rss_mb": _peak_rss_mb(),
+            "output_bytes": output_bytes(out_dir),
+        }
+
+
+def _peak_rss_mb() -> dict:
+    # ru_maxrss в Linux — килобайты; RUSAGE_CHILDREN — максимум среди завершенных процессов пула
+    return {
+        "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def run_isolated(corpus_dir: Path, files: list, backend: str, engine: str, concurrency: int) -> dict:
+    """Запускает один прогон в отдельном процессе и возвращает его результат."""
+    command = [
+        sys.executable, __file__, "--case", backend, engine, str(concurrency),
+        "--corpus-dir", str(corpus_dir), "--files", *files,
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера обработки изображений")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES, help="Размеры корпуса, Мп")
+    parser.add_argument("--backends", nargs="+", default=["pillow", "vips"], choices=["pillow", "vips"])
+    parser.add_argument("--engines", nargs="+", default=["inline", "process"], choices=["inline", "process"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--corpus-dir", type=Path, default=Path(tempfile.gettempdir()) / "image_bench_corpus")
+    parser.add_argument("--output", type=Path, default=Path("bench_image.json"))
+    # Внутренние параметры для изолированного прогона
+    parser.add_argument("--case", nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument("--files", nargs="+", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.case:
+        backend, engine, concurrency = args.case[0], args.case[1], int(args.case[2])
+        result = asyncio.run(run_case(args.corpus_dir, args.files, backend, engine, concurrency))
+        print(json.dumps(result))
+        return
+
+    corpus = build_corpus(args.corpus_dir, args.sizes)
+    files = [item["file"] for item in corpus]
+
+    backends = [backend for backend in args.backends if backend != "vips" or vips_available()]
+    if len(backends) < len(args.backends):
+        print("pyvips/libvips не установлены, движок vips пропущен")
+
+    results = []
+    for engine in args.engines:
+        for concurrency in args.concurrency:
+            for backend in backends:
+                result = run_isolated(args.corpus_dir, files, backend, engine, concurrency)
+                results.append(result)
+                print(
+                    f"{backend:6} {engine:8} x{concurrency}: {result['images_per_sec']:.2f} img/s, "
+                    f"{result['ms_per_variant']:.1f} мс/версия, пик RSS {result['peak_rss_mb']}"
+                )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "libvips": "{}.{}.{}".format(*(pyvips.version(i) for i in range(3))) if vips_available() else None,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "formats": enabled_formats(),
+            "cascade": media_config.image_cascade,
+            "quality_mode": media_config.image_quality_mode,
+            "size_configs": ImageOptimizer.SIZE_CONFIGS,
+        },
+        "corpus": corpus,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Результаты записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
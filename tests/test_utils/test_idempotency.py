@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from fakeredis import aioredis
+from fastapi import FastAPI, Request
+
+from config.components.redis import redis_config
+from server.middleware.idempotency_middleware import IdempotencyMiddleware
+
+
+def _client(handled, delay=0.0, status_code=201):
+    app = FastAPI()
+
+    @app.post("/items", status_code=201)
+    async def create_item(request: Request):
+        body = await request.body()
+        handled.append(body)
+        await asyncio.sleep(delay)
+        if status_code >= 500:
+            raise RuntimeError("сбой обработки")
+        return {"id": len(handled), "size": len(body)}
+
+    app.add_middleware(IdempotencyMiddleware, redis=aioredis.FakeRedis(decode_responses=True))
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_retry_returns_stored_response_without_reprocessing():
+    handled = []
+    async with _client(handled) as client:
+        headers = {"Idempotency-Key": "abc", "Authorization": "Bearer user-1"}
+        first = await client.post("/items", content=b"x" * 200_000, headers=headers)
+        retry = await client.post("/items", content=b"x" * 200_000, headers=headers)
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json() == {"id": 1, "size": 200_000}
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert len(handled) == 1
+
+        # Другое тело с тем же ключом — ошибка, другой пользователь — свой ключ
+        assert (await client.post("/items", content=b"y", headers=headers)).status_code == 422
+        other = await client.post("/items", content=b"y", headers={"Idempotency-Key": "abc", "Authorization": "Bearer 2"})
+        assert other.json() == {"id": 2, "size": 1}
+        # Без заголовка запрос обрабатывается каждый раз
+        await client.post("/items", content=b"z")
+        assert len(handled) == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_waits_for_first_request():
+    handled = []
+    async with _client(handled, delay=0.3) as client:
+        headers = {"Idempotency-Key": "same"}
+        first, second = await asyncio.gather(
+            client.post("/items", content=b"data", headers=headers),
+            client.post("/items", content=b"data", headers=headers),
+        )
+
+    assert len(handled) == 1
+    assert first.json() == second.json()
+    assert {first.headers.get("idempotent-replayed"), second.headers.get("idempotent-replayed")} == {None, "true"}
+
+
+@pytest.mark.asyncio
+async def test_failed_request_is_not_stored_and_wait_is_bounded(monkeypatch):
+    handled = []
+    async with _client(handled, status_code=500) as client:
+        for _ in range(2):
+            response = await client.post("/items", content=b"data", headers={"Idempotency-Key": "k"})
+            assert response.status_code == 500
+    assert len(handled) == 2
+
+    monkeypatch.setattr(redis_config, "idempotency_wait_timeout", 0)
+    handled = []
+    async with _client(handled, delay=0.3) as client:
+        headers = {"Idempotency-Key": "slow"}
+        responses = await asyncio.gather(
+            client.post("/items", content=b"data", headers=headers),
+            client.post("/items", content=b"data", headers=headers),
+        )
+    assert sorted(response.status_code for response in responses) == [201, 409]
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from PIL import Image
+
+from use_case.utils import image_vips
+from use_case.utils.image import ImageBackend, PillowBackend, _render_variants, get_image_backend
+from use_case.utils.image_vips import vips_available
+
+
+def _source(tmp_path, mode="RGB"):
+    path = tmp_path / "source.png"
+    image = Image.linear_gradient("L").resize((2000, 1500)).convert(mode)
+    image.save(path)
+    return path
+
+
+def _render(tmp_path, source, backend, cascade=True):
+    out = tmp_path / backend
+    out.mkdir()
+    saved = _render_variants(
+        str(source), str(out), "x", 80, cascade, ("webp", "jpeg"), None, None, squares=(96, 384), backend=backend
+    )
+    return out, saved
+
+
+@pytest.mark.skipif(not vips_available(), reason="pyvips/libvips не установлены")
+@pytest.mark.parametrize("cascade", [True, False])
+def test_vips_backend_keeps_pillow_layout_and_contract(tmp_path, cascade):
+    source = _source(tmp_path, "RGBA")
+    pillow_dir, pillow_saved = _render(tmp_path, source, "pillow", cascade)
+    vips_dir, vips_saved = _render(tmp_path, source, "vips", cascade)
+
+    assert sorted(os.listdir(vips_dir)) == sorted(os.listdir(pillow_dir))
+    assert vips_saved.keys() == pillow_saved.keys()
+    assert vips_saved["quality"] == pillow_saved["quality"]
+    assert vips_saved["placeholder"].startswith("data:image/webp;base64,")
+    for name in os.listdir(pillow_dir):
+        with Image.open(pillow_dir / name) as expected, Image.open(vips_dir / name) as actual:
+            assert actual.mode == "RGB"
+            assert abs(actual.width - expected.width) <= 1 and abs(actual.height - expected.height) <= 1
+
+
+def test_missing_vips_falls_back_to_pillow(monkeypatch):
+    monkeypatch.setattr(image_vips, "pyvips", None)
+    assert isinstance(get_image_backend("vips"), PillowBackend)
+    with pytest.raises(ValueError):
+        get_image_backend("imagemagick")
+
+
+def test_backend_must_implement_render_variants():
+    with pytest.raises(TypeError):
+        ImageBackend()
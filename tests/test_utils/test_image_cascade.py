@@ -0,0 +1,37 @@
+from io import BytesIO
+
+from PIL import Image
+
+from app.use_case.utils.image import ImageOptimizer
+
+
+def _jpeg(width: int, height: int) -> Image.Image:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color="pink").save(buffer, format="JPEG")
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def test_cascade_matches_direct_sizes():
+    # Каскадный и прямой режимы должны давать одинаковые размеры версий
+    direct = dict(ImageOptimizer._iter_variants(Image.new("RGB", (4000, 3000)), cascade=False))
+    cascaded = dict(ImageOptimizer._iter_variants(Image.new("RGB", (4000, 3000)), cascade=True))
+
+    assert set(direct) == set(cascaded) == set(ImageOptimizer.SIZE_CONFIGS)
+    for size_name, max_dim in ImageOptimizer.SIZE_CONFIGS.items():
+        assert max(cascaded[size_name].size) == max_dim
+        assert cascaded[size_name].size == direct[size_name].size
+
+
+def test_draft_decodes_near_largest_target():
+    # JPEG 6000x4000 декодируется в 1/2 масштаба, но не меньше самой большой версии
+    image = ImageOptimizer._open_for_variants(_jpeg(6000, 4000), cascade=True)
+    largest = max(ImageOptimizer.SIZE_CONFIGS.values())
+
+    assert largest <= max(image.size) < 6000
+
+
+def test_no_draft_without_cascade():
+    image = ImageOptimizer._open_for_variants(_jpeg(6000, 4000), cascade=False)
+
+    assert image.size == (6000, 4000)
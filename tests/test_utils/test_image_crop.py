@@ -0,0 +1,44 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from use_case.utils.image import _render_variants
+from use_case.utils.image_crop import saliency_map, square_crop_box, square_crop_offset
+
+
+def _subject_on_right(size=(1600, 800)) -> Image.Image:
+    """Однотонный фон и пестрый объект у правого края кадра."""
+    image = Image.new("RGB", size, (200, 200, 205))
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 255, (size[1] // 2, size[0] // 5, 3), dtype=np.uint8)
+    image.paste(Image.fromarray(texture, "RGB"), (size[0] * 3 // 4, size[1] // 4))
+    ImageDraw.Draw(image).ellipse((size[0] * 3 // 4, size[1] // 4, size[0] * 19 // 20, size[1] * 3 // 4), fill=(220, 40, 60))
+    return image
+
+
+def test_crop_window_follows_salient_subject():
+    image = _subject_on_right()
+    offset = square_crop_offset(saliency_map(image))
+
+    assert offset > 0.8
+    left, top, right, bottom = square_crop_box(image.size, offset)
+    assert (right - left, bottom - top) == (800, 800)
+    assert left <= 1600 * 3 // 4 and right >= 1600 * 19 // 20
+
+
+def test_flat_image_is_cropped_at_center():
+    assert square_crop_offset(saliency_map(Image.new("RGB", (300, 900), (90, 90, 90)))) == 0.5
+    assert square_crop_box((300, 900), 0.5) == (0, 300, 300, 600)
+
+
+def test_render_variants_writes_square_versions(tmp_path):
+    source = tmp_path / "source.png"
+    _subject_on_right().save(source)
+
+    saved = _render_variants(str(source), str(tmp_path), "x", 80, True, ("webp",), ("small", "medium"), squares=(96, 384))
+
+    assert saved["square_96"].endswith("sq96_x.webp") and saved["square_384"].endswith("sq384_x.webp")
+    assert set(saved["quality"]) == {"small", "medium", "square_96", "square_384"}
+    with Image.open(tmp_path / "sq96_x.webp") as square:
+        assert square.size == (96, 96)
+        # Квадрат вырезан на объекте, а не на сером фоне по центру
+        assert np.asarray(square.convert("RGB"), dtype=np.float32).std() > 30
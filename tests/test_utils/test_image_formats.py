@@ -0,0 +1,63 @@
+from io import BytesIO
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.server.utils.media_files import MediaStaticFiles
+from app.use_case.utils.image import _render_variants
+from app.use_case.utils.image_formats import media_url, negotiate_format
+
+CHROME_ACCEPT = "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"
+OLD_SAFARI_ACCEPT = "image/png,image/svg+xml,image/*;q=0.8,video/*;q=0.8,*/*;q=0.5"
+
+
+def test_negotiate_format_prefers_smallest_accepted():
+    candidates = ["avif", "webp", "jpeg"]
+    assert negotiate_format(CHROME_ACCEPT, candidates) == "avif"
+    # Wildcard не означает поддержку AVIF и WebP: такие клиенты получают JPEG
+    assert negotiate_format(OLD_SAFARI_ACCEPT, candidates) == "jpeg"
+    assert negotiate_format("*/*", candidates) == "jpeg"
+    assert negotiate_format("image/webp,*/*", candidates) == "webp"
+    assert negotiate_format("*/*", ["avif", "webp"]) == "webp"
+    assert negotiate_format("image/jpeg", candidates) == "jpeg"
+    assert negotiate_format("image/avif;q=0,image/webp", candidates) == "webp"
+    assert negotiate_format(None, candidates) == "webp"
+
+
+def test_media_url_orders_formats_by_size():
+    assert media_url("a/small_x.webp", {"webp": 30, "avif": 20, "jpeg": 50}) == "/media/a/small_x.webp?f=avif,webp,jpeg"
+    assert media_url("a/small_x.webp", {"webp": 30}) == "/media/a/small_x.webp"
+    assert media_url("a/small_x.webp", None) == "/media/a/small_x.webp"
+
+
+def test_render_variants_writes_every_format(tmp_path):
+    buffer = BytesIO()
+    Image.new("P", (400, 300)).save(buffer, format="PNG")
+
+    saved = _render_variants(buffer.getvalue(), str(tmp_path), "x", 80, True, ("webp", "jpeg"))
+
+    assert saved["small"].endswith("small_x.webp")
+    assert (tmp_path / "small_x.jpg").exists()
+    assert (tmp_path / "original_x.webp").exists()
+
+
+def test_media_static_files_negotiates_by_accept(tmp_path):
+    (tmp_path / "small_x.webp").write_bytes(b"webp")
+    (tmp_path / "small_x.jpg").write_bytes(b"jpeg")
+    app = FastAPI()
+    app.mount("/media", MediaStaticFiles(directory=tmp_path), name="media")
+    client = TestClient(app)
+
+    response = client.get("/media/small_x.webp?f=avif,webp,jpeg", headers={"Accept": "image/jpeg"})
+    assert response.content == b"jpeg"
+    assert response.headers["vary"] == "Accept"
+
+    # AVIF нет на диске — отдается запрошенный файл
+    response = client.get("/media/small_x.webp?f=avif,webp,jpeg", headers={"Accept": CHROME_ACCEPT})
+    assert response.content == b"webp"
+
+    response = client.get("/media/small_x.webp", headers={"Accept": "image/jpeg"})
+    assert response.content == b"webp"
+    assert "vary" not in response.headers
@@ -0,0 +1,91 @@
+import random
+from io import BytesIO
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.use_case.utils.image_hash import MultiIndexHash, dhash, hamming, image_hashes, phash
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_similarity import NearDuplicateIndex
+
+
+def _photo(seed: int) -> Image.Image:
+    pixels = np.random.default_rng(seed).integers(0, 255, (12, 16, 3), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGB").resize((1600, 1200), Image.BICUBIC)
+
+
+def _jpeg(image: Image.Image, quality: int) -> Image.Image:
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def _distance(a: str, b: str) -> int:
+    return hamming(int(a, 16), int(b, 16))
+
+
+def test_hashes_survive_recompression_and_light_crop():
+    image = _photo(1)
+    recompressed = _jpeg(image.resize((800, 600)), 40)
+    cropped = image.crop((40, 30, 1560, 1170))
+
+    assert _distance(phash(image), phash(recompressed)) <= 4
+    assert _distance(phash(image), phash(cropped)) <= 6
+    assert _distance(dhash(image), dhash(recompressed)) <= 6
+    assert _distance(phash(image), phash(_photo(2))) > 16
+
+
+def test_multi_index_search_matches_brute_force():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(2000)]
+    tree = MultiIndexHash()
+    for photo_id, key in enumerate(keys):
+        tree.add(key, photo_id)
+
+    query = keys[10] ^ 0b1011  # 3 бита отличаются
+    expected = sorted((hamming(query, key), photo_id) for photo_id, key in enumerate(keys) if hamming(query, key) <= 8)
+
+    assert sorted(tree.search(query, 8)) == expected
+    assert tree.remove(keys[10], 10)
+    assert all(photo_id != 10 for _, photo_id in tree.search(query, 8))
+
+
+@pytest.mark.asyncio
+async def test_index_prefers_same_owner(monkeypatch):
+    base = int(phash(_photo(3)), 16)
+    rows = [
+        (1, f"{base ^ 0b1:016x}", None, 100),     # другой владелец, ближе
+        (2, f"{base ^ 0b111:016x}", None, 200),   # тот же владелец
+        (3, f"{base ^ (2 ** 64 - 1):016x}", None, 200),
+    ]
+
+    async def get_perceptual_hashes(model, owner_field):
+        assert owner_field == "master_id"
+        return rows
+
+    monkeypatch.setattr(PhotoRepository, "get_perceptual_hashes", get_perceptual_hashes)
+    model = SimpleNamespace(_meta=SimpleNamespace(db_table="avatar_photo_master", fk_fields={"master"}))
+    index = NearDuplicateIndex()
+
+    own = await index.find(model, f"{base:016x}", None, owner_id=200, radius=6)
+    other = await index.find(model, f"{base:016x}", None, owner_id=300, radius=6)
+
+    assert (own.photo_id, own.distance, own.same_owner) == (2, 3, True)
+    assert (other.photo_id, other.same_owner) == (1, False)
+
+
+def test_image_hashes_decode_file_once(tmp_path, monkeypatch):
+    path = tmp_path / "photo.jpg"
+    _photo(3).save(path, format="JPEG", quality=90)
+    with Image.open(path) as image:
+        expected = (phash(image), dhash(image))
+
+    opened = []
+    original_open = Image.open
+    monkeypatch.setattr(Image, "open", lambda *args, **kwargs: opened.append(args) or original_open(*args, **kwargs))
+
+    assert image_hashes(str(path)) == expected
+    assert len(opened) == 1
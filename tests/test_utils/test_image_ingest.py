@@ -0,0 +1,91 @@
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from config.components.media import media_config
+from app.use_case.utils.image_ingest import ingest_upload, sniff_mime_type
+
+
+def _upload(data: bytes, filename: str = "photo.png") -> UploadFile:
+    return UploadFile(file=BytesIO(data), filename=filename)
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_sniff_mime_type():
+    assert sniff_mime_type(_png(2, 2)) == "image/png"
+    assert sniff_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_mime_type(b"<html>") is None
+
+
+@pytest.mark.asyncio
+async def test_ingest_upload_spools_to_file():
+    ingested = await ingest_upload(_upload(_png(40, 30)))
+    try:
+        assert os.path.exists(ingested.path)
+        assert (ingested.width, ingested.height) == (40, 30)
+        assert ingested.mime_type == "image/png"
+        assert ingested.sha256 == hashlib.sha256(_png(40, 30)).hexdigest()
+    finally:
+        ingested.cleanup()
+    assert not os.path.exists(ingested.path)
+
+
+@pytest.mark.asyncio
+async def test_ingest_upload_rejects_non_image():
+    with pytest.raises(HTTPException) as exc:
+        await ingest_upload(_upload(b"not an image at all"))
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ingest_upload_rejects_too_many_pixels(monkeypatch):
+    # Проверка идет по заголовку, до декодирования пикселей
+    monkeypatch.setattr(media_config, "image_max_pixels", 100)
+    with pytest.raises(HTTPException) as exc:
+        await ingest_upload(_upload(_png(20, 20)))
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ingest_upload_enforces_size_cap(monkeypatch):
+    monkeypatch.setattr(media_config, "upload_max_bytes", 10)
+    with pytest.raises(HTTPException) as exc:
+        await ingest_upload(_upload(_png(20, 20)))
+    assert exc.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_prepare_photo_removes_temp_file_on_lookup_error(tmp_path, monkeypatch):
+    from contextlib import ExitStack
+
+    from use_case.photo_service.photo_base_servise import PhotoHandler
+
+    async def lookup_fails(*args, **kwargs):
+        raise RuntimeError("БД недоступна")
+
+    monkeypatch.setattr(media_config, "upload_tmp_dir", str(tmp_path))
+    monkeypatch.setattr(PhotoHandler, "_find_near_duplicate", lookup_fails)
+
+    with pytest.raises(RuntimeError), ExitStack() as pins:
+        await PhotoHandler._prepare_photo(
+            _upload(_png(40, 30)), model=object, entity_id=1, owner_id=None, role="masters",
+            image_type="avatar", is_main=False, sort_order=0, city="1", background=False, pins=pins,
+        )
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_cleanup_is_idempotent():
+    ingested = await ingest_upload(_upload(_png(4, 4)))
+    ingested.cleanup()
+    ingested.cleanup()
+    assert ingested.released and not os.path.exists(ingested.path)
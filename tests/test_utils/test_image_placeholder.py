@@ -0,0 +1,53 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from app.use_case.utils.image import ImageOptimizer, _render_variants
+
+
+def test_dominant_color_picks_most_frequent_bucket():
+    image = Image.new("RGB", (100, 100), (250, 10, 10))
+    image.paste((10, 10, 250), (0, 0, 100, 30))  # синего меньше, чем красного
+
+    assert ImageOptimizer._dominant_color(image) == "#fa0a0a"
+
+
+def test_placeholder_is_tiny_inline_webp():
+    image = Image.new("RGB", (320, 200), (40, 120, 200))
+
+    data_uri, color = ImageOptimizer._placeholder(image)
+
+    assert data_uri.startswith("data:image/webp;base64,")
+    payload = base64.b64decode(data_uri.split(",", 1)[1])
+    with Image.open(BytesIO(payload)) as thumb:
+        assert max(thumb.size) <= ImageOptimizer.PLACEHOLDER_SIZE
+    assert len(data_uri) < 400
+    assert color == "#2878c8"
+
+
+def test_render_variants_returns_placeholder(tmp_path):
+    buffer = BytesIO()
+    Image.new("RGBA", (800, 600), (0, 200, 0, 255)).save(buffer, format="PNG")
+
+    saved = _render_variants(buffer.getvalue(), str(tmp_path), "x", 80)
+
+    assert saved["placeholder"].startswith("data:image/webp;base64,")
+    assert saved["dominant_color"] == "#00c800"
+
+
+def test_detail_and_card_urls_carry_placeholder():
+    from types import SimpleNamespace
+
+    from use_case.photo_service.photo_base_servise import PhotoHandler
+
+    photo = SimpleNamespace(small="a/small_x.jpg", medium=None, large=None, original="a/original_x.jpg",
+                            square_96="a/square_96_x.jpg", formats=None,
+                            placeholder="data:image/webp;base64,AA", dominant_color="#2878c8")
+
+    detail = PhotoHandler.build_detail_urls(photo)
+    card = PhotoHandler.build_card_urls(photo)
+
+    assert set(detail) == {"small", "original", "square_96", "placeholder", "dominant_color"}
+    assert set(card) == {"square_96", "placeholder", "dominant_color"}
+    assert detail["placeholder"] == card["placeholder"] == photo.placeholder
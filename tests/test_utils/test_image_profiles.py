@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from PIL import Image
+
+from app.use_case.utils.image import ImageOptimizer
+from app.use_case.utils.image_profiles import (
+    DEFAULT_PROFILE, VARIANT_PROFILES, get_variant_profile, largest_variant,
+)
+from config.components.media import media_config
+
+
+def test_profile_lookup_by_image_type_then_role():
+    assert get_variant_profile("avatar", "masters") == ("avatar", VARIANT_PROFILES["avatar"])
+    assert get_variant_profile("IMAGE_TYPE", "news_photo")[0] == "news_photo"
+    assert get_variant_profile("gallery", "salons")[0] == DEFAULT_PROFILE
+
+
+def test_largest_variant_skips_missing_sizes():
+    assert largest_variant({"small": "s.webp", "medium": "m.webp", "placeholder": "data:"}) == "m.webp"
+    assert largest_variant({"placeholder": "data:"}) is None
+
+
+@pytest.mark.asyncio
+async def test_optimizer_creates_only_profile_sizes(tmp_path, monkeypatch):
+    source = tmp_path / "source.png"
+    Image.new("RGB", (2400, 1800), (10, 120, 200)).save(source)
+    monkeypatch.setattr(media_config, "image_engine", "inline")
+    monkeypatch.setattr(media_config, "image_extra_formats", [])
+
+    saved = await ImageOptimizer.optimize_and_save_async(
+        str(source), city="", role="salons", slug="", image_type="news_photo",
+        new_filename="x", save_dir=str(tmp_path / "out"),
+    )
+
+    assert {"small", "original"}.isdisjoint(saved)
+    assert sorted(os.listdir(tmp_path / "out")) == ["large_x.webp", "medium_x.webp"]
+    with Image.open(tmp_path / "out" / "large_x.webp") as large:
+        assert max(large.size) == ImageOptimizer.SIZE_CONFIGS["large"]
@@ -0,0 +1,62 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from app.use_case.utils.image import _render_variants
+from app.use_case.utils.image_quality import encode_adaptive, perceptual_error
+
+
+def _flat() -> Image.Image:
+    return Image.new("RGB", (768, 512), (230, 120, 160))
+
+
+def _busy() -> Image.Image:
+    pixels = np.random.default_rng(1).integers(0, 255, (128, 192, 3), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGB").resize((768, 512), Image.BICUBIC)
+
+
+def _webp_size(image: Image.Image, quality: int) -> int:
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=quality)
+    return len(buffer.getvalue())
+
+
+def test_perceptual_error_is_zero_for_identical_images():
+    image = _busy()
+
+    assert perceptual_error(image, image.copy()) == 0
+    assert perceptual_error(image, _flat()) > 0.5
+
+
+def test_budget_search_picks_highest_quality_within_budget():
+    image = _busy()
+    budget = (_webp_size(image, 40) + _webp_size(image, 90)) // 2
+
+    data, quality = encode_adaptive(image, "WEBP", 40, 90, 6, byte_budget=budget)
+
+    assert len(data) <= budget
+    assert 40 < quality < 90
+    # Следующее качество уже не укладывается в бюджет (поиск не останавливается раньше)
+    assert _webp_size(image, quality + 1) > budget
+
+
+def test_error_threshold_gives_flat_images_lower_quality():
+    _, flat_quality = encode_adaptive(_flat(), "WEBP", 40, 90, 6, max_error=0.01)
+    _, busy_quality = encode_adaptive(_busy(), "WEBP", 40, 90, 6, max_error=0.01)
+
+    assert flat_quality < busy_quality
+
+
+def test_render_variants_reports_quality_per_variant(tmp_path):
+    buffer = BytesIO()
+    _busy().save(buffer, format="PNG")
+    budget = _webp_size(_busy().resize((320, 213)), 60)
+    adaptive = {"mode": "budget", "byte_budgets": {"small": budget}, "max_error": 0.01,
+                "min_quality": 40, "max_quality": 90, "max_steps": 6}
+
+    saved = _render_variants(buffer.getvalue(), str(tmp_path), "x", 85, True, ("webp",), ("small", "medium"), adaptive)
+
+    assert saved["quality"]["medium"] == 85  # бюджета для medium нет — качество профиля
+    assert saved["quality"]["small"] < 85
+    assert (tmp_path / "small_x.webp").stat().st_size <= budget
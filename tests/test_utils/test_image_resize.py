@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from config.components.media import media_config
+from app.use_case.utils.image_resize import MediaResizer, ResizeCache
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_config, "image_engine", "inline")
+    target = tmp_path / "1" / "masters" / "slug" / "avatar"
+    target.mkdir(parents=True)
+    Image.new("RGB", (1600, 1200), (200, 50, 50)).save(target / "original_abc.webp", format="WEBP")
+    Image.new("RGB", (320, 240), (200, 50, 50)).save(target / "small_abc.webp", format="WEBP")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_resize_builds_variant_from_original(media_root):
+    resizer = MediaResizer(media_root)
+
+    path, media_type = await resizer.get_variant("1/masters/slug/avatar/small_abc.webp", 640, "jpeg")
+
+    assert media_type == "image/jpeg"
+    assert path.endswith(os.path.join("original_abc.w640.jpeg"))
+    with Image.open(path) as image:
+        assert image.size == (640, 480)
+
+
+@pytest.mark.asyncio
+async def test_resize_rejects_unlisted_width_and_traversal(media_root):
+    resizer = MediaResizer(media_root)
+
+    with pytest.raises(HTTPException) as exc:
+        await resizer.get_variant("1/masters/slug/avatar/original_abc.webp", 641, "webp")
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        await resizer.get_variant("../outside.webp", 640, "webp")
+    assert exc.value.status_code == 404
+
+    # Файлы в карантине сборщика не служат источником версий
+    quarantined = media_root / ".quarantine" / "20260101000000" / "1" / "masters" / "slug" / "avatar"
+    quarantined.mkdir(parents=True)
+    Image.new("RGB", (1600, 1200)).save(quarantined / "original_abc.webp", format="WEBP")
+    with pytest.raises(HTTPException) as exc:
+        await resizer.get_variant(".quarantine/20260101000000/1/masters/slug/avatar/original_abc.webp", 640, "webp")
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cache_coalesces_concurrent_requests(tmp_path):
+    cache = ResizeCache(tmp_path, max_bytes=1024)
+    calls = 0
+
+    async def factory(dest):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        with open(dest, "wb") as f:
+            f.write(b"x" * 10)
+        return 10
+
+    paths = await asyncio.gather(*(cache.get_or_create("a/b.w320.webp", factory) for _ in range(5)))
+
+    assert calls == 1
+    assert len(set(paths)) == 1
+    # Повторный запрос — попадание в кэш
+    await cache.get_or_create("a/b.w320.webp", factory)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResizeCache(tmp_path, max_bytes=25)
+
+    def writer(size):
+        async def factory(dest):
+            with open(dest, "wb") as f:
+                f.write(b"x" * size)
+            return size
+        return factory
+
+    await cache.get_or_create("a.webp", writer(10))
+    await cache.get_or_create("b.webp", writer(10))
+    await cache.get_or_create("a.webp", writer(10))  # a становится самым свежим
+    await cache.get_or_create("c.webp", writer(10))
+
+    assert os.path.exists(tmp_path / "a.webp")
+    assert not os.path.exists(tmp_path / "b.webp")
+    assert os.path.exists(tmp_path / "c.webp")
+    assert cache.total_bytes == 20
@@ -0,0 +1,64 @@
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from tortoise import Tortoise
+
+from db.models import StandardService
+from db.repositories.base_repositories.base_repositories import BaseRepository
+
+
+class ServiceRepository(BaseRepository):
+    model = StandardService
+
+
+@pytest_asyncio.fixture
+async def services():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"server": ["db.models"]})
+    await Tortoise.generate_schemas()
+    # Повторяющиеся значения сортировки: страницы должны различаться по id
+    for index in range(23):
+        await StandardService.create(name=f"Услуга {index % 4}", slug=f"s{index}")
+    yield
+    await Tortoise.close_connections()
+
+
+async def _all_pages(order_by, limit):
+    pages, cursor = [], None
+    while True:
+        items, cursor = await ServiceRepository.paginate_keyset(order_by=order_by, cursor=cursor, limit=limit)
+        pages.append([item.slug for item in items])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order_by", [("id",), ("-name", "id"), ("name", "-id"), ("-created_at", "-id")])
+async def test_pages_cover_ordered_set_without_gaps(services, order_by):
+    pages = await _all_pages(order_by, limit=5)
+    expected = [service.slug for service in await StandardService.all().order_by(*order_by)]
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [slug for page in pages for slug in page] == expected
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_bound_to_sort_order(services):
+    _, cursor = await ServiceRepository.paginate_keyset(order_by=("name",), limit=5)
+
+    for bad in (cursor + "x", "not-a-cursor"):
+        with pytest.raises(HTTPException) as error:
+            await ServiceRepository.paginate_keyset(order_by=("name",), cursor=bad, limit=5)
+        assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await ServiceRepository.paginate_keyset(order_by=("-name",), cursor=cursor, limit=5)
+
+
+@pytest.mark.asyncio
+async def test_get_all_with_pagination_pages_by_cursor(services):
+    first, cursor = await ServiceRepository.get_all_with_pagination(10)
+    second, cursor = await ServiceRepository.get_all_with_pagination(10, cursor)
+    third, cursor = await ServiceRepository.get_all_with_pagination(10, cursor)
+
+    assert [len(first), len(second), len(third)] == [10, 10, 3]
+    assert cursor is None
+    assert [s.slug for s in first + second + third] == [f"s{index}" for index in range(23)]
@@ -0,0 +1,159 @@
+import gzip
+from urllib.parse import unquote
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config.components.media import media_config
+from app.server.utils.media_files import IMMUTABLE_CACHE_CONTROL, MediaStaticFiles, PrecompressedStaticFiles
+
+
+@pytest.fixture
+def client(tmp_path):
+    media = tmp_path / "media"
+    static = tmp_path / "static"
+    media.mkdir()
+    static.mkdir()
+    (media / "small_x.webp").write_bytes(bytes(range(256)) * 4)
+    (static / "app.js").write_text("console.log('hello');" * 50)
+    (static / "app.js.gz").write_bytes(gzip.compress((static / "app.js").read_bytes()))
+
+    app = FastAPI()
+    app.mount("/media", MediaStaticFiles(directory=media), name="media")
+    app.mount("/static", PrecompressedStaticFiles(directory=static, cache_control="public, max-age=60"), name="static")
+    return TestClient(app)
+
+
+def test_media_is_immutable_and_revalidates_with_304(client):
+    response = client.get("/media/small_x.webp")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    response = client.get("/media/small_x.webp", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.content == b""
+
+
+def test_media_supports_byte_ranges(client):
+    response = client.get("/media/small_x.webp", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+
+
+def test_static_serves_precompressed_copy(client):
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.text.startswith("console.log")
+
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+
+@pytest.mark.asyncio
+async def test_media_uses_pathsend_extension(tmp_path):
+    (tmp_path / "small_x.webp").write_bytes(b"data")
+    files = MediaStaticFiles(directory=tmp_path)
+    scope = {
+        "type": "http", "method": "GET", "path": "/small_x.webp", "root_path": "", "query_string": b"",
+        "headers": [], "extensions": {"http.response.pathsend": {}},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        messages.append(message)
+
+    await files(scope, receive, send)
+
+    assert messages[0]["status"] == 200
+    assert messages[1] == {"type": "http.response.pathsend", "path": str(tmp_path / "small_x.webp")}
+
+    # Range-запрос и HEAD обрабатывает FileResponse, расширение не используется
+    messages.clear()
+    await files({**scope, "headers": [(b"range", b"bytes=0-1")]}, receive, send)
+    assert messages[0]["status"] == 206
+    assert messages[1] == {"type": "http.response.body", "body": b"da", "more_body": False}
+
+    messages.clear()
+    await files({**scope, "method": "HEAD"}, receive, send)
+    assert [message["type"] for message in messages] == ["http.response.start", "http.response.body"]
+
+
+class AccelRedirectDouble:
+    """
+    Замена nginx для тестов: если приложение ответило X-Accel-Redirect,
+    отдает файл из каталога internal location вместо пустого тела ответа.
+    """
+
+    def __init__(self, app, prefix, directory):
+        self.app, self.prefix, self.directory = app, prefix, directory
+        self.redirects = []
+
+    async def __call__(self, scope, receive, send):
+        start = {}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message.get("more_body"):
+                return
+            headers = dict(start["headers"])
+            location = headers.pop(b"x-accel-redirect", None)
+            if location is None:
+                await send(start)
+                await send(message)
+                return
+            self.redirects.append(location.decode())
+            body = (self.directory / unquote(location.decode())[len(self.prefix):]).read_bytes()
+            headers[b"content-length"] = str(len(body)).encode()
+            await send({**start, "headers": list(headers.items())})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, capture)
+
+
+def test_x_accel_mode_leaves_file_transfer_to_nginx(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_config, "media_accel_prefix", "/_media/")
+    (tmp_path / "small_x.webp").write_bytes(b"webp")
+    (tmp_path / "small_x.avif").write_bytes(b"avif")
+    (tmp_path / ".incoming").mkdir()
+    (tmp_path / ".incoming" / "upload.jpg").write_bytes(b"private")
+    app = FastAPI()
+    app.mount("/media", MediaStaticFiles(directory=tmp_path, delivery="x-accel"), name="media")
+
+    response = TestClient(app).get("/media/small_x.webp?f=avif,webp", headers={"Accept": "image/avif"})
+    assert response.headers["x-accel-redirect"] == "/_media/small_x.avif"
+    assert response.headers["content-type"] == "image/avif"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.content == b""
+
+    nginx = AccelRedirectDouble(app, "/_media/", tmp_path)
+    response = TestClient(nginx).get("/media/small_x.webp?f=avif,webp", headers={"Accept": "image/webp"})
+    assert nginx.redirects == ["/_media/small_x.webp"]
+    assert response.content == b"webp"
+
+    # Приложение по-прежнему проверяет путь: служебные каталоги и выход за MEDIA_DIR не отдаются
+    assert TestClient(nginx).get("/media/.incoming/upload.jpg").status_code == 404
+    assert TestClient(nginx).get("/media/../secret").status_code == 404
+    assert len(nginx.redirects) == 1
+
+
+def test_x_sendfile_mode_returns_absolute_path(tmp_path):
+    (tmp_path / "small_x.webp").write_bytes(b"webp")
+    app = FastAPI()
+    app.mount("/media", MediaStaticFiles(directory=tmp_path, delivery="x-sendfile"), name="media")
+
+    response = TestClient(app).get("/media/small_x.webp")
+    assert response.headers["x-sendfile"] == str((tmp_path / "small_x.webp").resolve())
+    assert response.content == b""
@@ -0,0 +1,88 @@
+import os
+import time
+
+import pytest
+
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.media_gc import MediaGarbageCollector, iter_media_files
+
+
+def _write(root, relative_path, size=10, age=7200):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    _write(tmp_path, "1/masters/masters_1/avatar/original_a.webp")
+    _write(tmp_path, "1/masters/masters_1/avatar/original_a.avif")
+    _write(tmp_path, "1/masters/masters_1/avatar/small_a.webp")
+    _write(tmp_path, "1/masters/masters_2/avatar/original_b.webp", size=100)
+    _write(tmp_path, "1/masters/masters_2/avatar/original_b.jpg", size=50)
+    _write(tmp_path, "1/masters/masters_3/avatar/original_c.webp", age=0)  # загрузка в процессе
+    _write(tmp_path, ".resize/1/original_b.w320.webp")
+    return tmp_path
+
+
+def _fake_references(monkeypatch, referenced):
+    calls = []
+
+    async def get_referenced_paths(model, paths):
+        calls.append(len(paths))
+        return {path for path in paths if path in referenced}
+
+    monkeypatch.setattr(PhotoRepository, "get_referenced_paths", get_referenced_paths)
+    return calls
+
+
+def test_parallel_scan_skips_service_dirs(media_root):
+    files = [path for batch in iter_media_files(media_root, workers=4) for path, _, _ in batch]
+    assert len(files) == 6
+    assert not any(path.startswith(".resize") for path in files)
+
+
+@pytest.mark.asyncio
+async def test_gc_quarantines_orphans_in_batches(media_root, monkeypatch):
+    calls = _fake_references(monkeypatch, {
+        "1/masters/masters_1/avatar/original_a.webp",
+        "1/masters/masters_1/avatar/small_a.webp",
+    })
+
+    report = await MediaGarbageCollector(media_root, mode="quarantine", min_age=3600, batch_size=2).run()
+
+    assert report.orphans == 2
+    assert report.reclaimed_bytes == 150
+    assert report.skipped_recent == 1
+    assert max(calls) <= 2
+    # AVIF-версия ссылающегося фото остается на месте
+    assert os.path.exists(media_root / "1/masters/masters_1/avatar/original_a.avif")
+    assert not os.path.exists(media_root / "1/masters/masters_2/avatar/original_b.webp")
+    quarantined = [files for _, _, files in os.walk(media_root / ".quarantine") if files]
+    assert sorted(quarantined[0]) == ["original_b.jpg", "original_b.webp"]
+
+
+@pytest.mark.asyncio
+async def test_gc_dry_run_keeps_files(media_root, monkeypatch):
+    _fake_references(monkeypatch, set())
+
+    report = await MediaGarbageCollector(media_root, mode="delete", min_age=3600, dry_run=True).run()
+
+    assert report.orphans == 5
+    assert os.path.exists(media_root / "1/masters/masters_2/avatar/original_b.webp")
+
+
+@pytest.mark.asyncio
+async def test_gc_keeps_stale_incoming_files(media_root, monkeypatch):
+    _fake_references(monkeypatch, set())
+    _write(media_root, ".incoming/abc.jpg")
+    _write(media_root, ".incoming/resumable/u1/data")
+
+    await MediaGarbageCollector(media_root, mode="delete", min_age=3600).run()
+
+    assert os.path.exists(media_root / ".incoming/abc.jpg")
+    assert os.path.exists(media_root / ".incoming/resumable/u1/data")
+    assert not os.path.exists(media_root / "1/masters/masters_2/avatar/original_b.webp")
@@ -0,0 +1,86 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service import media_shard
+from use_case.photo_service.media_shard import MediaShardMigrator
+from use_case.utils import media_layout
+from use_case.utils.media_layout import ensure_dir, entity_media_dir, shard_prefix, sharded_path
+
+
+def test_sharded_layout_spreads_entities_over_prefixes():
+    assert entity_media_dir(844, "masters", "masters_23", "avatar", "flat") == "844/masters/masters_23/avatar"
+
+    path = entity_media_dir(844, "masters", "masters_23", "avatar", "sharded")
+    prefix = shard_prefix("masters_23")
+    assert path == f"844/masters/{prefix}/masters_23/avatar"
+    assert len(prefix.split("/")) == 2 and all(len(level) == 2 for level in prefix.split("/"))
+    assert len({shard_prefix(f"services_{i}") for i in range(1000)}) > 900
+
+
+def test_sharded_path_skips_content_store_and_migrated_paths():
+    new = sharded_path("844/masters/masters_23/avatar/small_x.webp")
+    assert new == f"844/masters/{shard_prefix('masters_23')}/masters_23/avatar/small_x.webp"
+    assert sharded_path(new) is None
+    assert sharded_path("content/ab/cd/abcd/small_abcd-avatar.webp") is None
+
+
+def test_ensure_dir_creates_directory_once(tmp_path, monkeypatch):
+    calls = []
+    makedirs = os.makedirs
+    monkeypatch.setattr(media_layout.os, "makedirs", lambda path, **kwargs: (calls.append(path), makedirs(path, **kwargs)))
+
+    for _ in range(3):
+        ensure_dir(str(tmp_path / "a" / "b"))
+
+    assert calls.count(str(tmp_path / "a" / "b")) == 1
+    assert (tmp_path / "a" / "b").is_dir()
+
+
+@pytest.mark.asyncio
+async def test_migration_moves_all_formats_and_is_restartable(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_shard, "MEDIA_DIR", str(tmp_path))
+    legacy = tmp_path / "all_city" / "services" / "services_7" / "portfolio"
+    legacy.mkdir(parents=True)
+    for name in ("small_x.webp", "small_x.avif", "original_x.webp"):
+        (legacy / name).write_bytes(name.encode())
+
+    old = "all_city/services/services_7/portfolio"
+    photos = [
+        SimpleNamespace(id=1, file_path=f"{old}/original_x.webp", small=f"{old}/small_x.webp",
+                        medium=None, large=None, original=f"{old}/original_x.webp", status=PhotoStatus.ready),
+        # Вторая запись на те же файлы: они уже перенесены при обработке первой
+        # Запись, обработка которой завершилась ошибкой, тоже переносится
+        SimpleNamespace(id=2, file_path=f"{old}/original_x.webp", small=None,
+                        medium=None, large=None, original=f"{old}/original_x.webp", status=PhotoStatus.failed),
+        # Запись в обработке: версий еще нет, исходник в .incoming не трогается
+        SimpleNamespace(id=3, file_path=".incoming/x", small=None,
+                        medium=None, large=None, original=None, status=PhotoStatus.processing),
+    ]
+    updated = []
+
+    async def get_photos_after(model, last_id, limit, status=PhotoStatus.ready):
+        return [photo for photo in photos if photo.id > last_id and status in (None, photo.status)][:limit]
+
+    async def bulk_update_photos(model, changed, fields):
+        updated.extend(photo.id for photo in changed)
+
+    monkeypatch.setattr(PhotoRepository, "get_photos_after", get_photos_after)
+    monkeypatch.setattr(PhotoRepository, "bulk_update_photos", bulk_update_photos)
+
+    report = await MediaShardMigrator(tables=["standard_service_photo"], batch_size=1).run()
+
+    new = entity_media_dir("all_city", "services", "services_7", "portfolio", "sharded")
+    assert photos[0].small == f"{new}/small_x.webp" and photos[1].original == f"{new}/original_x.webp"
+    assert sorted(os.listdir(tmp_path / new)) == ["original_x.webp", "small_x.avif", "small_x.webp"]
+    assert os.listdir(legacy) == []
+    assert updated == [1, 2]
+    assert (report.scanned, report.moved_photos, report.moved_files, report.missing_files) == (3, 2, 3, 0)
+    assert report.processing == 1
+
+    # Повторный запуск ничего не меняет
+    report = await MediaShardMigrator(tables=["standard_service_photo"]).run()
+    assert (report.moved_photos, report.moved_files) == (0, 0)
@@ -0,0 +1,92 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from db.models.photo_models.photo_registry import PHOTO_MODELS
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.media_reencode import MediaReencoder, settings_fingerprint, variant_base_name
+from use_case.photo_service.photo_content_store import ContentStore
+from use_case.utils.image_profiles import VARIANT_PROFILES
+
+
+def test_variant_base_name_strips_size_and_fingerprint():
+    assert variant_base_name("a/b/original_abc-photo.webp") == "abc-photo"
+    assert variant_base_name("a/b/large_abc-photo.cf47102c.webp") == "abc-photo"
+
+
+def test_fingerprint_depends_on_profile():
+    assert settings_fingerprint(VARIANT_PROFILES["avatar"]) != settings_fingerprint(VARIANT_PROFILES["portfolio"])
+    assert len(settings_fingerprint(VARIANT_PROFILES["avatar"])) == 8
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint_in_keyset_order(tmp_path, monkeypatch):
+    rows = [SimpleNamespace(id=i, content_hash=None) for i in (3, 5, 8, 13, 21)]
+    requested, updated = [], []
+
+    async def get_photos_after(model, last_id, limit):
+        requested.append(last_id)
+        return [row for row in rows if row.id > last_id][:limit]
+
+    async def bulk_update_photos(model, photos, fields):
+        updated.extend(photo.id for photo in photos)
+
+    async def reencode_photo(self, photo, *args):
+        return True
+
+    monkeypatch.setattr(PhotoRepository, "get_photos_after", get_photos_after)
+    monkeypatch.setattr(PhotoRepository, "bulk_update_photos", bulk_update_photos)
+    monkeypatch.setattr(MediaReencoder, "_reencode_photo", reencode_photo)
+
+    checkpoint = tmp_path / "checkpoint.json"
+    fingerprint = settings_fingerprint(VARIANT_PROFILES["news_photo"])
+    checkpoint.write_text(json.dumps({"photo_news": {"last_id": 5, "fingerprint": fingerprint}}))
+
+    report = await MediaReencoder(tables=["photo_news"], batch_size=2, checkpoint_path=str(checkpoint)).run()
+
+    assert requested == [5, 13, 21]
+    assert updated == [8, 13, 21]
+    assert report.scanned == 3
+    assert json.loads(checkpoint.read_text())["photo_news"]["last_id"] == 21
+
+
+@pytest.mark.asyncio
+async def test_shared_content_is_reencoded_once_for_all_rows(tmp_path, monkeypatch):
+    content_hash = "ab" * 32
+    file_path = f"content/ab/ab/{content_hash}/original_{content_hash}-avatar.webp"
+    rows = [SimpleNamespace(id=i, content_hash=content_hash, file_path=file_path, original=file_path)
+            for i in (1, 2)]
+    rendered, updates, bulk_updated = [], [], []
+
+    async def get_photos_after(model, last_id, limit):
+        return [row for row in rows if row.id > last_id][:limit]
+
+    async def bulk_update_photos(model, photos, fields):
+        bulk_updated.extend(photos)
+
+    async def update_content_photos(model, hash_, path, **fields):
+        updates.append((model.__name__, hash_, path, fields["file_path"]))
+        return 2 if model.__name__ == "AvatarPhotoMaster" else 0
+
+    async def render(self, photo, source, save_dir, new_filename, *args):
+        rendered.append((save_dir, new_filename))
+        return {"original": f"{save_dir}/original_{new_filename}.webp"}
+
+    monkeypatch.setattr(PhotoRepository, "get_photos_after", get_photos_after)
+    monkeypatch.setattr(PhotoRepository, "bulk_update_photos", bulk_update_photos)
+    monkeypatch.setattr(PhotoRepository, "update_content_photos", update_content_photos)
+    monkeypatch.setattr(MediaReencoder, "_source", staticmethod(lambda photo: photo.original))
+    monkeypatch.setattr(MediaReencoder, "_render", render)
+
+    reencoder = MediaReencoder(tables=["avatar_photo_master"], checkpoint_path=str(tmp_path / "checkpoint.json"))
+    report = await reencoder.run()
+
+    fingerprint = settings_fingerprint(VARIANT_PROFILES["avatar"])
+    new_name = f"{ContentStore.stored_name(content_hash, 'avatar')}.{fingerprint}"
+    assert rendered == [(ContentStore.content_dir(content_hash), new_name)]
+    # Обновляются записи всех таблиц, ссылающиеся на тот же набор версий
+    assert {update[0] for update in updates} == {model.__name__ for model in PHOTO_MODELS.values()}
+    assert all(update[2] == file_path and new_name in update[3] for update in updates)
+    assert bulk_updated == []
+    assert report.reencoded == 2
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from config.components.media import media_config
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_base_servise import PhotoHandler
+from use_case.utils.image import ImageOptimizer
+
+
+def _png_upload(color: str) -> UploadFile:
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), color=color).save(buffer, format="PNG")
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename=f"{color}.png", headers=Headers({"content-type": "image/png"}))
+
+
+@pytest.mark.asyncio
+async def test_images_are_processed_concurrently_and_inserted_once(monkeypatch):
+    bulk_calls = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def optimize(source, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        name = kwargs["new_filename"]
+        return {size: f"{size}_{name}.webp" for size in ("small", "medium", "large", "original")}
+
+    async def bulk_create_photos(model, rows):
+        bulk_calls.append(rows)
+        return [10 + i for i in range(len(rows))]
+
+    monkeypatch.setattr(media_config, "media_dedup", False)
+    monkeypatch.setattr(media_config, "image_near_dup_mode", "off")
+    monkeypatch.setattr(media_config, "upload_concurrency", 2)
+    monkeypatch.setattr(ImageOptimizer, "optimize_and_save_async", optimize)
+    monkeypatch.setattr(PhotoRepository, "bulk_create_photos", bulk_create_photos)
+
+    images = [_png_upload(color) for color in ("red", "green", "blue", "white")]
+    model = SimpleNamespace(__name__="StandardServicePhoto")
+
+    started = time.perf_counter()
+    photo_ids = await PhotoHandler.add_photos_to_entity(
+        images, model=model, entity_id=3, entity_field_name="standard_service_id", background=False
+    )
+    elapsed = time.perf_counter() - started
+
+    assert photo_ids == [10, 11, 12, 13]
+    assert max_in_flight == 2
+    assert elapsed < 0.35  # 4 изображения по 0.1 с при параллелизме 2
+    assert len(bulk_calls) == 1
+    rows = bulk_calls[0]
+    assert [row["file_name"].rsplit("-", 1)[1] for row in rows] == ["red", "green", "blue", "white"]
+    assert all(row["standard_service_id"] == 3 for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_failed_image_discards_files_of_the_others(monkeypatch):
+    removed = []
+
+    async def optimize(source, **kwargs):
+        name = kwargs["new_filename"]
+        if name.endswith("blue"):
+            raise OSError("cannot identify image file")
+        await asyncio.sleep(0.05)  # Остальные изображения завершаются после ошибки
+        return {"small": f"small_{name}.webp", "original": f"original_{name}.webp"}
+
+    async def bulk_create_photos(model, rows):
+        raise AssertionError("записи не должны создаваться")
+
+    monkeypatch.setattr(media_config, "media_dedup", False)
+    monkeypatch.setattr(media_config, "image_near_dup_mode", "off")
+    monkeypatch.setattr(ImageOptimizer, "optimize_and_save_async", optimize)
+    monkeypatch.setattr(PhotoRepository, "bulk_create_photos", bulk_create_photos)
+    monkeypatch.setattr(PhotoHandler, "_unlink_files", staticmethod(lambda paths: removed.extend(paths) or len(paths)))
+
+    images = [_png_upload(color) for color in ("red", "blue", "white")]
+    with pytest.raises(HTTPException):
+        await PhotoHandler.add_photos_to_entity(
+            images, model=SimpleNamespace(__name__="StandardServicePhoto"), entity_id=3,
+            entity_field_name="standard_service_id", background=False,
+        )
+
+    assert sorted(path.rsplit("-", 1)[1] for path in removed) == ["red.webp", "red.webp", "white.webp", "white.webp"]
@@ -0,0 +1,119 @@
+import hashlib
+import os
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from config.components.media import media_config
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_base_servise import PhotoHandler
+from use_case.photo_service.photo_content_store import ContentStore
+from use_case.utils.image import ImageOptimizer
+
+
+def _png_upload() -> UploadFile:
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), color="white").save(buffer, format="PNG")
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename="photo.png", headers=Headers({"content-type": "image/png"}))
+
+
+def test_content_dir_is_sharded_by_hash():
+    content_hash = hashlib.sha256(b"photo").hexdigest()
+    assert ContentStore.content_dir(content_hash) == os.path.join(
+        "content", content_hash[:2], content_hash[2:4], content_hash
+    )
+
+
+@pytest.mark.asyncio
+async def test_hash_hit_skips_optimizer(monkeypatch):
+    created = []
+    cached = {"small": "content/s.webp", "medium": "content/m.webp",
+              "large": "content/l.webp", "original": "content/o.webp"}
+
+    async def find_variants(content_hash, file_path):
+        return cached
+
+    async def bulk_create_photos(model, rows):
+        created.extend(rows)
+        return [1]
+
+    async def optimizer_must_not_run(*args, **kwargs):
+        raise AssertionError("оптимизатор не должен запускаться для известного содержимого")
+
+    monkeypatch.setattr(media_config, "media_dedup", True)
+    monkeypatch.setattr(media_config, "image_near_dup_mode", "off")
+    monkeypatch.setattr(ContentStore, "find_variants", find_variants)
+    monkeypatch.setattr(PhotoRepository, "bulk_create_photos", bulk_create_photos)
+    monkeypatch.setattr(ImageOptimizer, "optimize_and_save_async", optimizer_must_not_run)
+
+    model = SimpleNamespace(__name__="AvatarPhotoMaster")
+    photo_ids = await PhotoHandler.add_photos_to_entity(_png_upload(), model=model, background=False)
+
+    assert photo_ids == [1]
+    assert created[0]["original"] == "content/o.webp"
+    assert len(created[0]["content_hash"]) == 64
+
+
+@pytest.mark.asyncio
+async def test_delete_keeps_files_while_referenced(monkeypatch):
+    photo = SimpleNamespace(id=5, content_hash="ab" * 32, original="content/o.webp",
+                            small=None, medium=None, large=None, formats={"webp": 10, "jpeg": 20})
+    deleted_files = []
+    referenced = [{photo.content_hash}]
+
+    async def get_content_hashes(model, photo_ids=None, **filters):
+        return {photo.content_hash}
+
+    async def delete_photos(model, photo_ids=None, **filters):
+        return [photo]
+
+    async def referenced_hashes(content_hashes):
+        return referenced[0] & set(content_hashes)
+
+    monkeypatch.setattr(PhotoRepository, "get_content_hashes", get_content_hashes)
+    monkeypatch.setattr(PhotoRepository, "delete_photos", delete_photos)
+    monkeypatch.setattr(ContentStore, "referenced_hashes", referenced_hashes)
+    monkeypatch.setattr(PhotoHandler, "_unlink_files", lambda paths: deleted_files.extend(sorted(paths)) or len(paths))
+
+    await PhotoHandler.delete_photo(photo_id=5, model=object)
+    assert deleted_files == []
+
+    # Последняя ссылка — файлы удаляются
+    referenced[0] = set()
+    await PhotoHandler.delete_photo(photo_id=5, model=object)
+    assert deleted_files == ["content/o.jpg", "content/o.webp"]
+
+
+@pytest.mark.asyncio
+async def test_delete_keeps_files_pinned_by_pending_upload(monkeypatch):
+    photo = SimpleNamespace(id=5, content_hash="cd" * 32, original="content/o.webp",
+                            small=None, medium=None, large=None, formats={"webp": 10})
+    deleted_files = []
+
+    async def get_content_hashes(model, photo_ids=None, **filters):
+        return {photo.content_hash}
+
+    async def delete_photos(model, photo_ids=None, **filters):
+        return [photo]
+
+    async def referenced_hashes(content_hashes):
+        return set()
+
+    monkeypatch.setattr(PhotoRepository, "get_content_hashes", get_content_hashes)
+    monkeypatch.setattr(PhotoRepository, "delete_photos", delete_photos)
+    monkeypatch.setattr(ContentStore, "referenced_hashes", referenced_hashes)
+    monkeypatch.setattr(PhotoHandler, "_unlink_files", lambda paths: deleted_files.extend(sorted(paths)) or len(paths))
+
+    # Загрузка выбрала версии хэша, но запись еще не создана — файлы остаются
+    with ContentStore.pin(photo.content_hash):
+        await PhotoHandler.delete_photo(photo_id=5, model=object)
+    assert deleted_files == []
+    assert ContentStore.pinned_hashes([photo.content_hash]) == set()
+
+    await PhotoHandler.delete_photo(photo_id=5, model=object)
+    assert deleted_files == ["content/o.webp"]
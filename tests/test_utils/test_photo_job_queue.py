@@ -0,0 +1,150 @@
+import json
+
+import pytest
+from fakeredis import aioredis
+
+from config.components.media import media_config
+from db.models.abstract.abstract_photo import PhotoStatus
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+from use_case.photo_service.photo_base_servise import PhotoHandler
+from use_case.photo_service.photo_job_queue import PhotoJobQueue, PhotoJobWorker
+from use_case.utils.image import ImageOptimizer
+
+
+def _job(**overrides) -> dict:
+    job = {
+        "model": "avatar_photo_master",
+        "photo_id": 7,
+        "source": ".incoming/missing-file",
+        "city": "1",
+        "role": "masters",
+        "slug": "masters_7",
+        "image_type": "avatar",
+        "new_filename": "abc-photo",
+    }
+    job.update(overrides)
+    return job
+
+
+@pytest.mark.asyncio
+async def test_queue_roundtrip_with_fake_redis():
+    queue = PhotoJobQueue(redis=aioredis.FakeRedis(decode_responses=True))
+
+    await queue.enqueue(_job(photo_id=1))
+    await queue.enqueue(_job(photo_id=2))
+
+    # Очередь FIFO: задачи забираются в порядке постановки
+    assert (await queue.dequeue())["photo_id"] == 1
+    assert (await queue.dequeue())["photo_id"] == 2
+    assert await queue.dequeue(timeout=1) is None
+
+
+@pytest.mark.asyncio
+async def test_process_job_marks_photo_ready(monkeypatch):
+    updates = []
+
+    async def fake_optimize(source, **kwargs):
+        return {"small": "s.webp", "medium": "m.webp", "large": "l.webp", "original": "o.webp"}
+
+    async def fake_update(model, photo_id, **fields):
+        updates.append((model.__name__, photo_id, fields))
+        return True
+
+    monkeypatch.setattr(ImageOptimizer, "optimize_and_save_async", fake_optimize)
+    monkeypatch.setattr(PhotoRepository, "update_photo_fields", fake_update)
+
+    await PhotoJobWorker.process_job(_job())
+
+    assert updates == [("AvatarPhotoMaster", 7, {
+        "status": PhotoStatus.ready,
+        "file_path": "o.webp",
+        "small": "s.webp",
+        "medium": "m.webp",
+        "large": "l.webp",
+        "original": "o.webp",
+        "placeholder": None,
+        "dominant_color": None,
+        "quality": None,
+        "formats": None,
+    })]
+
+
+@pytest.mark.asyncio
+async def test_process_job_marks_photo_failed(monkeypatch):
+    updates = []
+
+    async def broken_optimize(source, **kwargs):
+        raise OSError("cannot identify image file")
+
+    async def fake_update(model, photo_id, **fields):
+        updates.append(fields)
+        return True
+
+    monkeypatch.setattr(ImageOptimizer, "optimize_and_save_async", broken_optimize)
+    monkeypatch.setattr(PhotoRepository, "update_photo_fields", fake_update)
+
+    await PhotoJobWorker.process_job(_job())
+
+    assert updates == [{"status": PhotoStatus.failed}]
+
+
+@pytest.mark.asyncio
+async def test_unacked_jobs_of_dead_worker_are_recovered():
+    redis = aioredis.FakeRedis(decode_responses=True)
+    dead = PhotoJobQueue(redis=redis, consumer="dead")
+    await dead.enqueue(_job(photo_id=1))
+    await dead.enqueue(_job(photo_id=2))
+    await dead.heartbeat()
+    assert (await dead.dequeue())["photo_id"] == 1
+
+    # Пока отметка обработчика жива, его задача не трогается
+    alive = PhotoJobQueue(redis=redis, consumer="alive")
+    assert await alive.recover() == 0
+
+    await redis.delete(dead.heartbeat_key)
+    assert await alive.recover() == 1
+    assert (await alive.dequeue())["photo_id"] == 1
+    assert (await alive.dequeue())["photo_id"] == 2
+    await alive.ack(_job(photo_id=1))
+    assert await redis.lrange(alive.processing_key, 0, -1) == [json.dumps(_job(photo_id=2))]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_and_acked(monkeypatch):
+    redis = aioredis.FakeRedis(decode_responses=True)
+    queue = PhotoJobQueue(redis=redis, consumer="w1")
+    worker = PhotoJobWorker(queue=queue)
+
+    async def broken_update(model, photo_id, **fields):
+        raise ConnectionError("БД недоступна")
+
+    monkeypatch.setattr(PhotoRepository, "update_photo_fields", broken_update)
+    monkeypatch.setattr(media_config, "photo_job_max_attempts", 2)
+
+    await queue.enqueue(_job())
+    await worker.handle_job(await queue.dequeue())
+    retry = await queue.dequeue()
+    assert retry["attempts"] == 1
+
+    # Последняя попытка: задача отбрасывается, обработчик продолжает работу
+    await worker.handle_job(retry)
+    assert await queue.dequeue(timeout=1) is None
+    assert await redis.llen(queue.processing_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_failure_processes_job_inline(monkeypatch):
+    processed = []
+
+    async def broken_enqueue(self, job):
+        raise ConnectionError("Redis недоступен")
+
+    async def fake_process(job):
+        processed.append(job["photo_id"])
+
+    monkeypatch.setattr(PhotoJobQueue, "enqueue", broken_enqueue)
+    monkeypatch.setattr(PhotoJobWorker, "process_job", staticmethod(fake_process))
+
+    await PhotoHandler._enqueue_job({"model": "avatar_photo_master", "photo_id": 7})
+
+    assert processed == [7]
@@ -0,0 +1,102 @@
+import pytest
+import pytest_asyncio
+from tortoise import Tortoise
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+from db.models import StandardService, StandardServicePhoto
+from db.repositories.photo_repositories.photo_repository import PhotoRepository
+
+
+@pytest_asyncio.fixture
+async def services():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"server": ["db.models"]})
+    await Tortoise.generate_schemas()
+    first = await StandardService.create(name="Маникюр")
+    second = await StandardService.create(name="Педикюр")
+    for service in (first, second):
+        for position in range(3):
+            await StandardServicePhoto.create(
+                standard_service=service, file_path=f"{service.id}/{position}.webp", size=1,
+                small=f"{service.id}/small_{position}.webp", sort_order=position, is_main=position == 0,
+            )
+    yield first, second
+    await Tortoise.close_connections()
+
+
+async def _photos(service):
+    return await StandardServicePhoto.filter(standard_service_id=service.id).order_by("id")
+
+
+@pytest.mark.asyncio
+async def test_reorder_is_one_statement_and_ignores_foreign_photos(services):
+    first, second = services
+    mine, foreign = await _photos(first), await _photos(second)
+
+    new_order = [mine[2].id, foreign[0].id, mine[0].id, mine[1].id]
+    updated = await PhotoRepository.reorder_photos(StandardServicePhoto, "standard_service_id", first.id, new_order)
+
+    assert updated == 3
+    assert [photo.sort_order for photo in await _photos(first)] == [2, 3, 0]
+    assert [photo.sort_order for photo in await _photos(second)] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_set_main_photo_is_atomic_and_checks_owner(services):
+    first, second = services
+    mine, foreign = await _photos(first), await _photos(second)
+
+    assert await PhotoRepository.set_main_photo(StandardServicePhoto, "standard_service_id", first.id, mine[1].id)
+    assert [photo.is_main for photo in await _photos(first)] == [False, True, False]
+
+    # Чужое фото: главное фото сущности не сбрасывается
+    assert not await PhotoRepository.set_main_photo(StandardServicePhoto, "standard_service_id", first.id, foreign[2].id)
+    assert [photo.is_main for photo in await _photos(first)] == [False, True, False]
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_returns_deleted_rows(services):
+    first, second = services
+    mine, foreign = await _photos(first), await _photos(second)
+
+    deleted = await PhotoRepository.delete_photos(
+        StandardServicePhoto, [mine[0].id, mine[2].id, foreign[0].id], standard_service_id=first.id
+    )
+
+    assert sorted(photo.small for photo in deleted) == [f"{first.id}/small_0.webp", f"{first.id}/small_2.webp"]
+    assert [photo.id for photo in await _photos(first)] == [mine[1].id]
+    assert len(await _photos(second)) == 3
+    assert await PhotoRepository.delete_photos(StandardServicePhoto, []) == []
+    with pytest.raises(ValueError):
+        await PhotoRepository.delete_photos(StandardServicePhoto)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_returns_ids_in_row_order(services):
+    first, _ = services
+    # Одинаковые file_name не мешают сопоставлению записей и ID
+    rows = [{"standard_service_id": first.id, "file_name": "same", "file_path": f"{n}.webp", "size": n}
+            for n in range(3)]
+
+    ids = await PhotoRepository.bulk_create_photos(StandardServicePhoto, rows)
+
+    created = {photo.id: photo.size for photo in await StandardServicePhoto.filter(id__in=ids)}
+    assert [created[photo_id] for photo_id in ids] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_postgres_bulk_insert_is_one_statement_with_returning(services):
+    first, _ = services
+    conn = AsyncpgDBClient(connection_name="pg", user="u", password="p", database="d", host="h", port=5432)
+    calls = []
+
+    async def execute_query(query, values=None):
+        calls.append((query, values))
+        return 2, [{"id": 5}, {"id": 6}]
+
+    conn.execute_query = execute_query
+    photos = [StandardServicePhoto(standard_service_id=first.id, file_path=f"{n}.webp", size=n) for n in range(2)]
+
+    assert await PhotoRepository._insert_returning_ids(StandardServicePhoto, photos, conn) == [5, 6]
+    query, values = calls[0]
+    assert len(calls) == 1 and query.endswith('RETURNING "id"')
+    assert "$48" in query and len(values) == 48
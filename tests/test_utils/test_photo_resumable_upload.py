@@ -0,0 +1,84 @@
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from config.components.media import media_config
+from use_case.photo_service.photo_resumable_upload import ResumableUploadService, parse_upload_metadata
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (200, 30, 30)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_config, "upload_resumable_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_resume_after_interrupted_chunk_and_finalize(upload_dir):
+    data = _jpeg()
+    session = await ResumableUploadService.create(7, len(data), parse_upload_metadata("filename cC5qcGc="))
+
+    await ResumableUploadService.append(session.id, 7, 0, _chunks(data[:10], data[10:20]))
+    # Клиент не знает, сколько дошло до сервера, и спрашивает смещение
+    assert (await ResumableUploadService.get(session.id, 7)).offset == 20
+
+    with pytest.raises(HTTPException) as error:
+        await ResumableUploadService.append(session.id, 7, 0, _chunks(data))
+    assert error.value.status_code == 409
+
+    session = await ResumableUploadService.append(session.id, 7, 20, _chunks(data[20:]))
+    assert session.complete
+
+    async with ResumableUploadService.finalize([session.id], 7) as files:
+        assert files[0].filename == "p.jpg"
+        assert files[0].content_type == "image/jpeg"
+        assert await files[0].read() == data
+
+    assert os.listdir(upload_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_foreign_user_overflow_and_incomplete_finalize(upload_dir):
+    session = await ResumableUploadService.create(7, 4)
+
+    with pytest.raises(HTTPException) as error:
+        await ResumableUploadService.get(session.id, 8)
+    assert error.value.status_code == 404
+
+    with pytest.raises(HTTPException) as error:
+        await ResumableUploadService.append(session.id, 7, 0, _chunks(b"12345"))
+    assert error.value.status_code == 413
+
+    with pytest.raises(HTTPException) as error:
+        async with ResumableUploadService.finalize([session.id], 7):
+            pass
+    assert error.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_failed_processing_keeps_upload_and_expired_are_purged(upload_dir, monkeypatch):
+    data = _jpeg()
+    session = await ResumableUploadService.create(7, len(data))
+    await ResumableUploadService.append(session.id, 7, 0, _chunks(data))
+
+    with pytest.raises(RuntimeError):
+        async with ResumableUploadService.finalize([session.id], 7):
+            raise RuntimeError("обработка не удалась")
+    assert (await ResumableUploadService.get(session.id, 7)).complete
+
+    monkeypatch.setattr(media_config, "upload_resumable_ttl", -1)
+    assert await ResumableUploadService.purge_expired(force=True) == 1
+    assert os.listdir(upload_dir) == []
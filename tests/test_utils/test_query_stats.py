@@ -0,0 +1,85 @@
+import logging
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from db.models import StandardService, StandardServicePhoto
+from db.query_stats import query_shape, track_queries
+from server.middleware.query_stats_middleware import QUERY_COUNT_HEADER, QueryStatsMiddleware
+from tests.utils import assert_max_queries
+
+
+@pytest_asyncio.fixture
+async def services():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"server": ["db.models"]})
+    await Tortoise.generate_schemas()
+    for number in range(6):
+        service = await StandardService.create(name=f"Услуга {number}")
+        await StandardServicePhoto.create(standard_service=service, file_path=f"{number}.webp", size=1)
+    yield
+    await Tortoise.close_connections()
+
+
+def _client(headers=True):
+    app = FastAPI()
+
+    @app.get("/n-plus-one")
+    async def n_plus_one():
+        services = await StandardService.all()
+        return [len(await StandardServicePhoto.filter(standard_service_id=s.id)) for s in services]
+
+    @app.get("/prefetched")
+    async def prefetched():
+        services = await StandardService.all().prefetch_related("images")
+        return [len(s.images) for s in services]
+
+    app.add_middleware(QueryStatsMiddleware, headers=headers)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_query_shape_ignores_parameters():
+    assert query_shape("SELECT * FROM \"photo_1\" WHERE id=$1 AND name='a''b' LIMIT 10") == (
+        query_shape("SELECT *   FROM \"photo_1\" WHERE id=$2 AND name='c' LIMIT 20")
+    )
+    assert query_shape("SELECT 1 WHERE id IN (?,?,?)") == query_shape("SELECT 2 WHERE id IN (?)")
+    assert query_shape("SELECT * FROM a WHERE x=?") != query_shape("SELECT * FROM b WHERE x=?")
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_queries_and_warns_about_n_plus_one(services, caplog):
+    async with _client() as client:
+        with caplog.at_level(logging.WARNING):
+            response = await client.get("/n-plus-one")
+        assert response.headers[QUERY_COUNT_HEADER] == "7"
+        assert "db;dur=" in response.headers["server-timing"]
+        assert "N+1" in caplog.text and "6 одинаковых" in caplog.text
+
+        caplog.clear()
+        with caplog.at_level(logging.WARNING):
+            response = await client.get("/prefetched")
+        assert response.headers[QUERY_COUNT_HEADER] == "2"
+        assert "N+1" not in caplog.text
+
+    async with _client(headers=False) as client:
+        assert QUERY_COUNT_HEADER not in (await client.get("/prefetched")).headers
+
+
+@pytest.mark.asyncio
+async def test_budget_helper_counts_endpoint_and_transaction_queries(services):
+    async with _client() as client:
+        with assert_max_queries(2, repeat_threshold=2):
+            await client.get("/prefetched")
+        with pytest.raises(AssertionError, match="N\\+1"):
+            with assert_max_queries(10, repeat_threshold=2):
+                await client.get("/n-plus-one")
+
+    # Запросы внутри транзакции идут через TransactionWrapper и учитываются по одному разу
+    with track_queries() as stats:
+        async with in_transaction():
+            await StandardService.filter(name="Услуга 0").update(name="Услуга")
+            await StandardService.all().count()
+    assert stats.count == 2
@@ -1,9 +1,11 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Iterator, Optional
 
 from asgi_lifespan import LifespanManager
 from httpx import AsyncClient, ASGITransport
 
+from db.query_stats import QueryStats, track_queries
+
 ClientManagerType = AsyncGenerator[AsyncClient, None]
 
 
@@ -14,3 +16,21 @@ async def client_manager(app, base_url="http://test", **kw) -> ClientManagerType
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url=base_url, **kw) as c:
             yield c
+
+
+@contextmanager
+def assert_max_queries(limit: int, repeat_threshold: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Проверка бюджета SQL-запросов блока: не больше limit запросов и, если задан repeat_threshold,
+    ни одного запроса, повторенного столько раз (N+1).
+
+    Пример:
+        with assert_max_queries(3, repeat_threshold=2):
+            response = await async_client.get(f"/cities/{city.slug}/masters")
+    """
+    with track_queries() as stats:
+        yield stats
+    assert stats.count <= limit, f"Ожидалось не больше {limit} SQL-запросов, выполнено {stats.report()}"
+    if repeat_threshold is not None:
+        repeated = stats.repeated(repeat_threshold)
+        assert not repeated, f"Повторяющиеся SQL-запросы (N+1): {repeated}\n{stats.report()}"